@@ -1,7 +1,10 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from dotenv import load_dotenv
+from typing import Optional
 import os
 
 # Load environment variables from .env
@@ -14,9 +17,83 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise RuntimeError("DATABASE_URL is not set in the environment")
 
-engine = create_engine(DATABASE_URL)
+# Connection pool, shared by the sync and async engines (SQLite keeps SQLAlchemy's defaults)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Connections are replaced after this many seconds, before server or proxy idle timeouts drop them
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+def engine_options(url: str) -> dict:
+    """Pool keyword arguments for create_engine / create_async_engine."""
+    if make_url(url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING
+    }
+
+def async_database_url(url: str) -> str:
+    """The same database through an async driver: asyncpg for PostgreSQL, aiosqlite for SQLite."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ("postgresql", "postgres"):
+        query = dict(parsed.query)
+        # asyncpg takes libpq's sslmode as ssl
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    return parsed.render_as_string(hide_password=False)
+
+# Async engine URL; derived from DATABASE_URL unless set explicitly
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_database_url(DATABASE_URL)
+
+# Read replica for analytics; unset sends analytics to the primary
+REPLICA_DATABASE_URL = os.getenv("REPLICA_DATABASE_URL")
+ASYNC_REPLICA_DATABASE_URL = os.getenv("ASYNC_REPLICA_DATABASE_URL") or (
+    async_database_url(REPLICA_DATABASE_URL) if REPLICA_DATABASE_URL else None
+)
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = create_engine(REPLICA_DATABASE_URL, **engine_options(REPLICA_DATABASE_URL)) if REPLICA_DATABASE_URL else engine
+
+class RoutingSession(Session):
+    """Session that reads from the replica and writes to the primary.
+
+    Flushes and DML statements (including ORM bulk INSERTs, whose row batches are
+    bound without a clause) go to the primary, and once a transaction has written
+    everything else in it does too. Other statements go to the replica. Reads may
+    lag the primary, so this is only for analytics. A handler that must see its own
+    writes before writing uses SessionLocal.
+    """
+
+    def __init__(self, primary=None, replica=None, **kw):
+        super().__init__(**kw)
+        self.primary = primary if primary is not None else engine
+        self.replica = replica if replica is not None else replica_engine
+        self.writing = False
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.writing = True
+        return self.primary if self.writing else self.replica
+
+@event.listens_for(RoutingSession, "after_transaction_end")
+def _release_primary(session, transaction):
+    # Back to the replica once the outermost transaction commits or rolls back
+    if transaction.parent is None:
+        session.writing = False
+
+AnalyticsSessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
 Base = declarative_base()
 
 def get_db():
@@ -26,4 +103,55 @@ def get_db():
     finally:
         db.close()
 
+def get_analytics_db():
+    """Session for analytics endpoints: reads from the replica, writes to the primary"""
+    db = AnalyticsSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+_async_engine = None
+_async_replica_engine = None
+_async_session_factory: Optional[async_sessionmaker] = None
+_async_analytics_session_factory: Optional[async_sessionmaker] = None
+
+def _async_engines():
+    # Created on first use so the async driver is only imported by processes that serve async routes
+    global _async_engine, _async_replica_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL))
+        _async_replica_engine = create_async_engine(
+            ASYNC_REPLICA_DATABASE_URL, **engine_options(ASYNC_REPLICA_DATABASE_URL)
+        ) if ASYNC_REPLICA_DATABASE_URL else _async_engine
+    return _async_engine, _async_replica_engine
 
+def async_session_factory() -> async_sessionmaker:
+    """AsyncSession factory on the primary"""
+    global _async_session_factory
+    if _async_session_factory is None:
+        primary, _ = _async_engines()
+        _async_session_factory = async_sessionmaker(primary, autoflush=False, expire_on_commit=False)
+    return _async_session_factory
+
+def async_analytics_session_factory() -> async_sessionmaker:
+    """AsyncSession factory routed like AnalyticsSessionLocal"""
+    global _async_analytics_session_factory
+    if _async_analytics_session_factory is None:
+        primary, replica = _async_engines()
+        _async_analytics_session_factory = async_sessionmaker(
+            sync_session_class=RoutingSession, primary=primary.sync_engine, replica=replica.sync_engine,
+            autoflush=False, expire_on_commit=False
+        )
+    return _async_analytics_session_factory
+
+async def get_async_db():
+    """AsyncSession dependency; queries await the driver instead of blocking the event loop.
+    Sync query helpers run on it through `await db.run_sync(func, *args)`."""
+    async with async_session_factory()() as db:
+        yield db
+
+async def get_async_analytics_db():
+    """AsyncSession dependency for analytics endpoints, routed like get_analytics_db"""
+    async with async_analytics_session_factory()() as db:
+        yield db
@@ -0,0 +1,101 @@
+"""
+Dialect-aware bulk upsert
+Writes rows with INSERT ... ON CONFLICT DO UPDATE (PostgreSQL, SQLite) or
+ON DUPLICATE KEY UPDATE (MySQL), falling back to a keyed select followed by
+executemany UPDATE + multi-row INSERT on other backends.
+"""
+
+from typing import Dict, List, Sequence
+from sqlalchemy import and_, bindparam, insert, tuple_, update
+from sqlalchemy.orm import Session
+
+# Rows sent per upsert statement
+UPSERT_BATCH_SIZE = 500
+
+def _dialect_insert(dialect_name: str):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect_name in ("mysql", "mariadb"):
+        from sqlalchemy.dialects.mysql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+def upsert_rows(
+    db: Session,
+    model,
+    rows: List[Dict],
+    conflict_columns: Sequence[str],
+    update_columns: Sequence[str],
+    batch_size: int = UPSERT_BATCH_SIZE,
+    increment_columns: Sequence[str] = ()
+):
+    """Insert rows, updating update_columns of rows that already exist.
+
+    increment_columns of existing rows are added to instead of overwritten, in
+    the same statement, so concurrent writers can't lose each other's counts.
+    conflict_columns must match a unique constraint of the table, and every row
+    must carry the same keys. Runs inside the caller's transaction.
+    """
+    if not rows:
+        return
+
+    table = model.__table__
+    dialect_name = db.get_bind().dialect.name
+    dialect_insert = _dialect_insert(dialect_name)
+
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+
+        if dialect_insert is None:
+            _upsert_fallback(db, table, batch, conflict_columns, update_columns, increment_columns)
+            continue
+
+        stmt = dialect_insert(table).values(batch)
+        if dialect_name in ("mysql", "mariadb"):
+            stmt = stmt.on_duplicate_key_update({
+                **{col: stmt.inserted[col] for col in update_columns},
+                **{col: table.c[col] + stmt.inserted[col] for col in increment_columns}
+            })
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=list(conflict_columns),
+                set_={
+                    **{col: stmt.excluded[col] for col in update_columns},
+                    **{col: table.c[col] + stmt.excluded[col] for col in increment_columns}
+                }
+            )
+        db.execute(stmt)
+
+def _upsert_fallback(db: Session, table, batch: List[Dict], conflict_columns: Sequence[str], update_columns: Sequence[str],
+                     increment_columns: Sequence[str] = ()):
+    """Split a batch by a single keyed lookup, then update and insert set-wise."""
+    key_columns = [table.c[col] for col in conflict_columns]
+    keys = [tuple(row[col] for col in conflict_columns) for row in batch]
+    existing = set(db.execute(table.select().with_only_columns(*key_columns).where(tuple_(*key_columns).in_(keys))).all())
+
+    updates = []
+    inserts = []
+    for key, row in zip(keys, batch):
+        if key in existing:
+            updates.append({
+                **{f"key_{col}": row[col] for col in conflict_columns},
+                **{f"new_{col}": row[col] for col in (*update_columns, *increment_columns)}
+            })
+        else:
+            inserts.append(row)
+
+    if updates:
+        db.execute(
+            update(table)
+            .where(and_(*(table.c[col] == bindparam(f"key_{col}") for col in conflict_columns)))
+            .values({
+                **{col: bindparam(f"new_{col}") for col in update_columns},
+                **{col: table.c[col] + bindparam(f"new_{col}") for col in increment_columns}
+            }),
+            updates
+        )
+    if inserts:
+        db.execute(insert(table), inserts)
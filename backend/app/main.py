@@ -1,10 +1,15 @@
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 from app.routes import user, menu, inventory, sales, dish, csv_help, csv_validation, advanced_inventory, advanced_inventory_ai, test_auth, auth_examples
 from app.db.database import Base, engine
 from app.core.config import setup_cors
 from app.utils.auth_config import get_auth_config
+from app.services.compute_pool import compute_pool
+from app.services.llm_cache import llm_cache
+from app.utils.auth_cache import auth_cache_stats
+from app.utils.auth_enhanced import get_current_admin
+from app.models.user import User
 import os
 import logging
 
@@ -33,6 +38,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # keyset pagination cursor for list endpoints
 )
 
 # Include routers with enhanced security
@@ -91,6 +97,15 @@ async def health_check():
         "security": "enhanced"
     }
 
+@app.get("/admin/metrics")
+async def admin_metrics(current_user: User = Depends(get_current_admin)):
+    """Cache and worker pool statistics - admin only"""
+    return {
+        "llm_cache": llm_cache.stats(),
+        "compute_pool": compute_pool.stats(),
+        "auth_cache": auth_cache_stats()
+    }
+
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 8000))
@@ -3,7 +3,9 @@ from .user import User
 from .inventory import InventoryItem
 from .inventory_enhanced import InventoryItemEnhanced, StockMovement, PurchaseOrder
 from .dish import Dish, DishIngredient
-from .sales import Sale
+from .sales import Sale, DishSalesCount
+from .sales_analytics import SalesAnalytics, DemandPattern, SalesPattern, DemandForecast
+from .jobs import OptimizationJob
 
 # Make all models available when importing from app.models
-__all__ = ["User", "InventoryItem", "InventoryItemEnhanced", "StockMovement", "PurchaseOrder", "Dish", "DishIngredient", "Sale"]
+__all__ = ["User", "InventoryItem", "InventoryItemEnhanced", "StockMovement", "PurchaseOrder", "Dish", "DishIngredient", "Sale", "DishSalesCount", "SalesAnalytics", "DemandPattern", "SalesPattern", "DemandForecast", "OptimizationJob"]
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, UniqueConstraint, Index, func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 
@@ -14,7 +14,10 @@ class Dish(Base):
     sales = relationship("Sale", back_populates="dish")
     
     __table_args__ = (
+        # Also serves per-user dish listings through its leading user_id
         UniqueConstraint('user_id', 'name', name='uq_user_dish_name'),
+        # Case-insensitive duplicate checks on upload
+        Index('ix_dishes_user_lower_name', 'user_id', func.lower(name)),
     )
 
 class DishIngredient(Base):
@@ -29,3 +32,9 @@ class DishIngredient(Base):
 
     dish = relationship("Dish", back_populates="ingredients")
     ingredient = relationship("InventoryItem", back_populates="dish_ingredients")
+
+    __table_args__ = (
+        # Recipe loads join on dish_id; deleting an ingredient counts its uses by ingredient_id
+        Index('ix_dish_ingredients_dish_id', 'dish_id'),
+        Index('ix_dish_ingredients_ingredient_id', 'ingredient_id'),
+    )
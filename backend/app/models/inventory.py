@@ -1,6 +1,7 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Date, UniqueConstraint
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, ForeignKey, Integer, String, Date, Float, UniqueConstraint, Index, func
+from sqlalchemy.orm import relationship, validates
 from app.db.database import Base
+from app.services.units import quantity_fields
 
 class InventoryItem(Base):
     __tablename__ = "inventory"
@@ -8,8 +9,13 @@ class InventoryItem(Base):
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, nullable=False)  # Changed from Integer to String (email)
     ingredient_name = Column(String, nullable=False) 
-    quantity = Column(String)
+    quantity = Column(String)  # as entered
     unit = Column(String)
+
+    # quantity parsed once on write (see _parse_quantity); NULL when unparseable
+    quantity_value = Column(Float)  # in unit
+    base_quantity = Column(Float)  # in base_unit
+    base_unit = Column(String)  # "g", "ml", "each", or the unit itself when unknown
     category = Column(String)
     expiry_date = Column(Date)
     storage_location = Column(String)
@@ -17,7 +23,21 @@ class InventoryItem(Base):
     # Relationship to DishIngredient
     dish_ingredients = relationship("DishIngredient", back_populates="ingredient")
 
+    @validates("quantity", "unit")
+    def _parse_quantity(self, key, value):
+        # ORM writes; bulk upserts pass quantity_fields() themselves
+        quantity = value if key == "quantity" else self.quantity
+        unit = value if key == "unit" else self.unit
+        for field, parsed in quantity_fields(quantity, unit).items():
+            setattr(self, field, parsed)
+        return value
+
     __table_args__ = (
+        # Also serves every per-user inventory read through its leading user_id
         UniqueConstraint('user_id', 'ingredient_name', name='uq_user_ingredient_name'),
+        # Case-insensitive name lookups: lower(ingredient_name) = ? / IN (...)
+        Index('ix_inventory_user_lower_name', 'user_id', func.lower(ingredient_name)),
+        # Low-stock filters
+        Index('ix_inventory_user_quantity_value', 'user_id', 'quantity_value'),
     )
 
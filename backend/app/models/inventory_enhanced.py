@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Date, Float, DateTime, Boolean, Text, Enum
+from sqlalchemy import Column, ForeignKey, Integer, String, Date, Float, DateTime, Boolean, Text, Enum, Index
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 import enum
@@ -86,6 +86,11 @@ class StockMovement(Base):
     
     inventory_item = relationship("InventoryItemEnhanced", back_populates="stock_movements")
 
+    __table_args__ = (
+        # An item's movement history, newest first
+        Index('ix_stock_movements_item_timestamp', 'inventory_item_id', 'timestamp'),
+    )
+
 class PurchaseOrder(Base):
     """Integration with RouteCast and supplier management"""
     __tablename__ = "purchase_orders"
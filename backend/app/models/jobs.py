@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from app.db.database import Base
+from datetime import datetime
+
+# Job statuses
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# Job kinds
+JOB_OPTIMIZE = "optimize"  # forecasts, ingredient demand, stock alerts and reorder recommendations
+
+class OptimizationJob(Base):
+    """Queued per-tenant background work, run by the job worker pool (scripts/run_job_worker.py)"""
+    __tablename__ = "optimization_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, nullable=False, index=True)
+    kind = Column(String, nullable=False, default=JOB_OPTIMIZE)
+    status = Column(String, nullable=False, default=JOB_PENDING)
+    reason = Column(String)  # what queued it: "api", "sales_upload", "schedule", ...
+
+    # "<kind>:<user_id>" while pending, NULL afterwards; unique, so a tenant has
+    # at most one pending job of each kind
+    dedupe_key = Column(String, unique=True)
+
+    attempts = Column(Integer, nullable=False, default=0)
+    worker = Column(String)
+    result = Column(Text)  # JSON summary of a finished job
+    error = Column(Text)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+    __table_args__ = (
+        # Workers claim the oldest pending job
+        Index('ix_optimization_jobs_status_created', 'status', 'created_at'),
+    )
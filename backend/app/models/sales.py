@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, String
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, String, Index, UniqueConstraint
 from app.db.database import Base
 from sqlalchemy.orm import relationship
+from datetime import datetime
 
 class Sale(Base):
     __tablename__ = "sales"
@@ -13,3 +14,25 @@ class Sale(Base):
     price_per_unit = Column(Float, nullable=False)  
 
     dish = relationship("Dish", back_populates="sales")
+
+    __table_args__ = (
+        # Serves per-user listings and keyset pagination ordered by timestamp
+        Index('ix_sales_user_timestamp', 'user_id', 'timestamp'),
+    )
+
+class DishSalesCount(Base):
+    """Materialized per-user, per-dish sale count used for popularity scoring"""
+    __tablename__ = "dish_sales_counts"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(String, nullable=False)
+    dish_id = Column(Integer, ForeignKey("dishes.id"), nullable=False)
+    sales_count = Column(Integer, nullable=False, default=0)
+    version = Column(Integer, nullable=False, default=1)  # bumped on every sales write for the dish; keys stored forecasts
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # per-tenant change marker for the job scheduler
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'dish_id', name='uq_user_dish_sales_count'),
+        # Latest sales write per tenant without touching sales history
+        Index('ix_dish_sales_counts_user_updated', 'user_id', 'updated_at'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, String, Date, Float, DateTime, Boolean
+from sqlalchemy import Column, ForeignKey, Integer, String, Date, Float, DateTime, Boolean, UniqueConstraint
 from sqlalchemy.orm import relationship
 from app.db.database import Base
 from datetime import datetime
@@ -9,7 +9,7 @@ class SalesAnalytics(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(String, nullable=False, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"))
+    sale_id = Column(Integer, ForeignKey("sales.id"), unique=True, index=True)
     dish_id = Column(Integer, ForeignKey("dishes.id"))
     
     # Time-based analysis
@@ -85,5 +85,10 @@ class DemandForecast(Base):
     forecast_period = Column(String, nullable=False)  # '7_days', '30_days', etc.
     predicted_data = Column(String)  # JSON string of predictions
     accuracy_score = Column(Float)  # Historical accuracy (0-1)
+    data_version = Column(Integer)  # DishSalesCount.version the forecast was computed from
     created_at = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
+    
+    __table_args__ = (
+        UniqueConstraint('user_id', 'item_name', 'forecast_period', 'data_version', name='uq_demand_forecast_key'),
+    )
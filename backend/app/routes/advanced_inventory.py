@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from app.db.database import get_analytics_db, get_db
 from app.utils.auth import get_current_user
 from app.models.user import User
 from app.services.demand_prediction import DemandPredictionService
+from app.services.forecasting import MAX_DAYS_AHEAD
 from app.services.voice_inventory import VoiceInventoryService, VoiceCommandProcessor
 from app.services.routecast_integration import RouteCastIntegrationService
 from app.models.inventory_enhanced import InventoryItemEnhanced, DishPrediction, StockMovement
@@ -16,13 +17,6 @@ import logging
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # Voice Inventory Management Routes
 @router.post("/voice-commands/start-recording")
 async def start_voice_recording(
@@ -75,7 +69,7 @@ async def process_voice_command(
 # AI Prediction and Analytics Routes
 @router.get("/optimization-recommendations")
 async def get_optimization_recommendations(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get AI-powered inventory optimization recommendations"""
@@ -101,8 +95,8 @@ async def get_optimization_recommendations(
 @router.get("/demand-predictions/{ingredient_name}")
 async def get_demand_predictions(
     ingredient_name: str,
-    days_ahead: int = 7,
-    db: Session = Depends(get_db),
+    days_ahead: int = Query(7, ge=1, le=MAX_DAYS_AHEAD),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get AI-powered demand predictions for specific ingredient"""
@@ -110,9 +104,11 @@ async def get_demand_predictions(
         # Initialize demand service
         demand_service = DemandPredictionService()
         
+        # Sales and stored forecasts are recorded under the user's email
         predictions = await demand_service.predict_demand(
-            db, current_user.id, ingredient_name, days_ahead
+            db, current_user.email, ingredient_name, days_ahead
         )
+        db.commit()  # forecasts stored by predict_demand
         
         return {
             "success": True,
@@ -310,7 +306,7 @@ async def confirm_delivery(
 @router.get("/analytics/waste-prediction")
 async def get_waste_predictions(
     days_ahead: int = 7,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get AI-powered waste predictions"""
@@ -332,7 +328,7 @@ async def get_waste_predictions(
 
 @router.get("/analytics/cost-optimization")
 async def get_cost_optimization(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get AI-powered cost optimization suggestions"""
@@ -408,20 +404,16 @@ import os
 import logging
 
 logger = logging.getLogger(__name__)
+# The routes above were registered on the first router; keep a name for it
+# before it is replaced, since main.py only mounts the one below
+enhanced_router = router
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 # AI/ML Prediction Endpoints
 
 @router.get("/predictions/demand")
 async def get_demand_predictions(
-    db: Session = Depends(get_db), 
+    db: Session = Depends(get_analytics_db), 
     user: User = Depends(get_current_user)
 ):
     """Get AI-powered demand predictions for dishes"""
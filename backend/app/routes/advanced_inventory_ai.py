@@ -1,12 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, UploadFile, File, Query
 from sqlalchemy.orm import Session
 from typing import List, Dict, Any, Optional
 from datetime import datetime, timedelta
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import asyncio
 import os
 
-from app.db.database import get_db
+from app.db.database import get_analytics_db, get_db
+from app.services.forecasting import MAX_DAYS_AHEAD
 
 
 class ProduceOrderRequest(BaseModel):
@@ -21,22 +22,34 @@ class ProduceOrderRequest(BaseModel):
     max_price_per_unit: Optional[float] = None
     special_requirements: Optional[str] = None
     organic_preferred: Optional[bool] = False
+
+
+class DemandForecastBatchRequest(BaseModel):
+    """Request model for batch demand forecasts; no items means every dish with sales"""
+    items: Optional[List[str]] = None
+    days_ahead: int = Field(7, ge=1, le=MAX_DAYS_AHEAD)
 from app.utils.auth_enhanced import get_current_user
 from app.models.user import User
 from app.models.inventory import InventoryItem
 from app.models.sales import Sale
 from app.services.demand_prediction import DemandPredictionService
+from app.services.ingredient_demand import ingredient_demand, refresh_inventory_forecasts
+from app.services.job_queue import enqueue_job, get_job, job_payload
 from app.services.voice_inventory import VoiceInventoryService, SPEECH_RECOGNITION_AVAILABLE
 from app.services.routecast_integration import RouteCastIntegrationService
 
 router = APIRouter(prefix="/api/advanced-inventory", tags=["Advanced Inventory"])
 
+# /alerts stock levels, in each item's own unit; these would be dynamic based on AI predictions
+LOW_STOCK_THRESHOLD = 10
+CRITICAL_STOCK_THRESHOLD = 5
+
 # Note: All services require initialization with parameters and will be instantiated 
 # in the route functions where database connections and API keys are available
 
 @router.get("/analytics")
 async def get_inventory_analytics(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get comprehensive inventory analytics powered by AI"""
@@ -109,13 +122,14 @@ async def get_inventory_analytics(
 @router.get("/demand-forecast/{item_name}")
 async def get_demand_forecast(
     item_name: str,
-    days_ahead: int = 7,
-    db: Session = Depends(get_db),
+    days_ahead: int = Query(7, ge=1, le=MAX_DAYS_AHEAD),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get AI-powered demand forecast for specific item"""
     try:
-        user_id = current_user.firebase_uid
+        # Sales and stored forecasts are recorded under the user's email
+        user_id = current_user.email
         
         # Initialize demand service
         demand_service = DemandPredictionService()
@@ -123,6 +137,7 @@ async def get_demand_forecast(
         forecast = await demand_service.predict_demand(
             db, user_id, item_name, days_ahead
         )
+        db.commit()  # forecasts stored by predict_demand
         
         return {
             "success": True,
@@ -134,6 +149,60 @@ async def get_demand_forecast(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Demand forecast failed: {str(e)}")
 
+@router.post("/demand-forecasts")
+async def get_demand_forecasts(
+    request: DemandForecastBatchRequest,
+    db: Session = Depends(get_analytics_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Forecast many items in one call, with per-item latency and data-volume metrics"""
+    try:
+        # Sales are recorded under the user's email
+        user_id = current_user.email
+        
+        demand_service = DemandPredictionService()
+        
+        batch = await demand_service.predict_demand_batch(
+            db, user_id, request.items, request.days_ahead
+        )
+        db.commit()  # forecasts stored by predict_demand_batch
+        
+        return {
+            "success": True,
+            **batch,
+            "forecast_period": f"{request.days_ahead} days"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Demand forecast failed: {str(e)}")
+
+@router.post("/ingredient-demand/refresh")
+async def refresh_ingredient_demand(
+    days_back: int = 30,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Project next week's usage per ingredient from dish forecasts and store it on the enhanced inventory"""
+    try:
+        # Sales and recipes are recorded under the user's email
+        user_id = current_user.email
+        
+        demand = ingredient_demand(db, user_id, days_ahead=7, days_back=days_back)
+        updated = refresh_inventory_forecasts(db, user_id, demand)
+        db.commit()
+        
+        return {
+            "success": True,
+            "items_updated": updated,
+            # Ingredients with incomparable recipe units have no figures
+            "ingredients": demand.round(3).astype(object).where(demand.notna(), None).to_dict(orient="index"),
+            "forecast_period": "7 days"
+        }
+        
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=500, detail=f"Ingredient demand refresh failed: {str(e)}")
+
 @router.get("/voice-status")
 async def get_voice_status(
     db: Session = Depends(get_db),
@@ -395,7 +464,7 @@ async def create_auto_order(
 
 @router.get("/optimization-report")
 async def get_optimization_report(
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_analytics_db),
     current_user: User = Depends(get_current_user)
 ):
     """Get comprehensive inventory optimization report"""
@@ -459,29 +528,34 @@ async def get_inventory_alerts(
 ):
     """Get inventory alerts based on AI analysis"""
     try:
-        user_id = current_user.firebase_uid
-        
-        # Get current inventory
-        inventory_items = db.query(InventoryItem).filter(InventoryItem.user_id == user_id).all()
+        # Inventory is keyed by email
+        user_id = current_user.email
+        
+        # Low stock is filtered on the numeric quantity in SQL (ix_inventory_user_quantity_value)
+        low_stock = (
+            db.query(InventoryItem.id, InventoryItem.ingredient_name, InventoryItem.quantity_value, InventoryItem.unit)
+            .filter(InventoryItem.user_id == user_id, InventoryItem.quantity_value < LOW_STOCK_THRESHOLD)
+            .order_by(InventoryItem.quantity_value)
+            .all()
+        )
         
         # Generate AI-powered alerts
-        alerts = []
-        for item in inventory_items:
-            # Low stock alert
-            if item.current_stock < 10:  # This would be dynamic based on AI predictions
-                alerts.append({
-                    "id": f"low_stock_{item.id}",
-                    "type": "low_stock",
-                    "priority": "high" if item.current_stock < 5 else "medium",
-                    "item_name": item.ingredient_name,
-                    "message": f"Low stock alert: {item.ingredient_name} has only {item.current_stock} {item.unit} remaining",
-                    "suggested_action": f"Reorder {item.ingredient_name} immediately",
-                    "created_at": datetime.now().isoformat(),
-                    "resolved": False
-                })
+        alerts = [
+            {
+                "id": f"low_stock_{item_id}",
+                "type": "low_stock",
+                "priority": "high" if quantity < CRITICAL_STOCK_THRESHOLD else "medium",
+                "item_name": name,
+                "message": f"Low stock alert: {name} has only {quantity:g} {unit} remaining",
+                "suggested_action": f"Reorder {name} immediately",
+                "created_at": datetime.now().isoformat(),
+                "resolved": False
+            }
+            for item_id, name, quantity, unit in low_stock
+        ]
         
         # Add demo alerts if no inventory data exists
-        if not alerts and not inventory_items:
+        if not alerts and not db.query(db.query(InventoryItem.id).filter(InventoryItem.user_id == user_id).exists()).scalar():
             alerts = [
                 {
                     "id": "demo_alert_1",
@@ -587,48 +661,40 @@ async def get_produce_request_status(
 
 @router.post("/optimize")
 async def optimize_inventory(
-    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    """Run comprehensive inventory optimization using AI"""
+    """Queue comprehensive inventory optimization; poll /jobs/{job_id} for its status"""
     try:
-        user_id = current_user.firebase_uid
+        # Sales and recipes are recorded under the user's email
+        user_id = current_user.email
         
-        # Start optimization in background
-        background_tasks.add_task(
-            run_optimization_process,
-            db, user_id
-        )
+        # Runs in the job worker pool (scripts/run_job_worker.py), never in this process
+        job, created = enqueue_job(db, user_id, reason="api")
+        db.commit()
         
         return {
             "success": True,
-            "message": "Inventory optimization process started",
-            "status": "processing"
+            "message": "Inventory optimization queued" if created else "Inventory optimization already queued",
+            "status": job.status,
+            "job_id": job.id
         }
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Optimization failed: {str(e)}")
 
-async def run_optimization_process(db: Session, user_id: str):
-    """Background task for running comprehensive optimization"""
-    try:
-        # Initialize demand service
-        demand_service = DemandPredictionService()
-        
-        # Run all optimization tasks
-        await demand_service.analyze_sales_patterns(db, user_id)
-        recommendations = await demand_service.get_inventory_recommendations(db, user_id)
-        
-        # Process any automatic orders if enabled
-        if recommendations.get("reorder_recommendations"):
-            # Get RouteCast API key and initialize service
-            api_key = os.getenv("ROUTECAST_API_KEY")
-            if api_key:
-                routecast_service = RouteCastIntegrationService(db, api_key)
-                await routecast_service.process_auto_orders(db, user_id, recommendations)
-        
-        print(f"Optimization completed for user {user_id}")
-        
-    except Exception as e:
-        print(f"Optimization failed for user {user_id}: {e}")
+@router.get("/jobs/{job_id}")
+async def get_job_status(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    """Poll a background job's status and result"""
+    job = get_job(db, job_id, current_user.email)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "success": True,
+        **job_payload(job)
+    }
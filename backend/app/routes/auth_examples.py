@@ -21,6 +21,7 @@ from app.utils.auth_enhanced import (
 )
 from app.models.user import User
 from app.db.database import get_db
+from app.utils.auth_cache import invalidate_user
 from app.schemas.user import UserOut, UserUpdate
 
 router = APIRouter(prefix="/auth", tags=["Authentication Examples"])
@@ -49,15 +50,21 @@ async def update_user_profile(
 ):
     """Update user profile - requires write permissions"""
     
+    # The authenticated user may be a cached copy; update the row in this session
+    user = db.query(User).filter(User.id == current_user.id).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
     # Update user fields
     for field, value in user_update.dict(exclude_unset=True).items():
-        setattr(current_user, field, value)
+        setattr(user, field, value)
     
-    current_user.updated_at = datetime.now()
+    user.updated_at = datetime.now()
     db.commit()
-    db.refresh(current_user)
+    db.refresh(user)
+    invalidate_user(user.firebase_uid)
     
-    return {"message": "Profile updated successfully", "user": current_user}
+    return {"message": "Profile updated successfully", "user": user}
 
 # ==================== MANAGER LEVEL ROUTES ====================
 
@@ -95,6 +102,8 @@ async def update_user_role(
     user.role = new_role.value
     user.updated_at = datetime.now()
     db.commit()
+    # Cached tokens and user snapshots would keep the old role until they expire
+    invalidate_user(user.firebase_uid)
     
     return {"message": f"User role updated to {new_role.value}"}
 
@@ -118,8 +127,10 @@ async def delete_user(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
+    firebase_uid = user.firebase_uid
     db.delete(user)
     db.commit()
+    invalidate_user(firebase_uid)
     
     return {"message": "User deleted successfully"}
 
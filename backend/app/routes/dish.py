@@ -1,26 +1,39 @@
 from collections import defaultdict
-import csv
-from datetime import datetime
-from io import StringIO
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, Header
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, Header, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, get_async_db, get_db
 from app.models.dish import Dish, DishIngredient
-from app.models.inventory import InventoryItem
-from app.schemas.dish import DishIn, DishOut, DishServiceIn, DishBatchServiceIn
+from app.schemas.dish import DishIn, DishIngredientIn, DishOut, DishServiceIn, DishBatchServiceIn
 from app.models.user import User
 from app.utils.auth import get_current_user
 from app.utils.auth_enhanced import verify_api_key
-from typing import List, Optional
-
+from app.utils.csv_stream import CSVStream
+from app.services.recipe_resolution import (
+    RecipeLine, build_dish_payload, existing_dish_names, insert_dishes,
+    insert_recipe_lines, list_dish_payloads, resolve_ingredient_ids, resolve_ingredient_names
+)
+from app.services.sales_counts import forget_dish
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
 router = APIRouter(tags=["Dishes"])
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Rows per streamed batch in /upload-dishes
+UPLOAD_BATCH_SIZE = 1000
+
+def recipe_lines(ingredients: List[DishIngredientIn], names_by_id: Dict[int, str], dish_name: Optional[str] = None) -> List[RecipeLine]:
+    """Attach resolved ingredient names to request lines, rejecting the first unknown id."""
+    lines = []
+    for ing in ingredients:
+        if ing.ingredient_id not in names_by_id:
+            detail = f"Ingredient with id {ing.ingredient_id} not found"
+            if dish_name is not None:
+                detail += f" for dish '{dish_name}'"
+            raise HTTPException(status_code=400, detail=detail)
+        lines.append((ing.ingredient_id, names_by_id[ing.ingredient_id], ing.quantity, ing.unit))
+    return lines
 
 @router.post("/dishes", response_model=DishOut)
 def create_dish(
@@ -35,34 +48,12 @@ def create_dish(
     if existing:
         raise HTTPException(status_code=400, detail="Dish already exists")
 
-    dish = Dish(
-        name=dish_in.name,
-        description=dish_in.description,
-        user_id=user.email  # 👈 assign ownership
-    )
-
-    for ing in dish_in.ingredients:
-        inventory_item = db.query(InventoryItem).filter(
-            InventoryItem.id == ing.ingredient_id,
-            InventoryItem.user_id == user.email  # 👈 validate user owns the ingredient
-        ).first()
-        if not inventory_item:
-            raise HTTPException(status_code=400, detail=f"Ingredient with id {ing.ingredient_id} not found")
-
-        dish.ingredients.append(DishIngredient(
-            ingredient_id=ing.ingredient_id,
-            quantity=ing.quantity,
-            unit=ing.unit,
-            user_id=user.email,
-        ))
-
-    db.add(dish)
-    db.commit()
-    db.refresh(dish)
-
-    for ing in dish.ingredients:
-        ing.ingredient_name = ing.ingredient.ingredient_name if ing.ingredient else None
+    # 👈 validate user owns every ingredient, resolved in one query
+    names_by_id = resolve_ingredient_ids(db, (ing.ingredient_id for ing in dish_in.ingredients), user.email)
+    lines = recipe_lines(dish_in.ingredients, names_by_id)
 
+    [dish] = insert_dishes(db, user.email, [(dish_in.name, dish_in.description, lines)])  # 👈 assign ownership
+    db.commit()
     return dish
 
 # ==================== SERVICE-TO-SERVICE ENDPOINTS ====================
@@ -92,39 +83,12 @@ def create_dish_service(
             detail=f"Dish '{dish_request.name}' already exists for user {target_user_email}"
         )
 
-    # Create the dish
-    dish = Dish(
-        name=dish_request.name,
-        description=dish_request.description,
-        user_id=target_user_email
-    )
-
-    # Add ingredients (validate they exist but don't enforce user ownership for service calls)
-    for ing in dish_request.ingredients:
-        inventory_item = db.query(InventoryItem).filter(
-            InventoryItem.id == ing.ingredient_id
-        ).first()
-        if not inventory_item:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Ingredient with id {ing.ingredient_id} not found"
-            )
-
-        dish.ingredients.append(DishIngredient(
-            ingredient_id=ing.ingredient_id,
-            quantity=ing.quantity,
-            unit=ing.unit,
-            user_id=target_user_email,
-        ))
+    # Validate ingredients exist (but don't enforce user ownership for service calls)
+    names_by_id = resolve_ingredient_ids(db, (ing.ingredient_id for ing in dish_request.ingredients))
+    lines = recipe_lines(dish_request.ingredients, names_by_id)
 
-    db.add(dish)
+    [dish] = insert_dishes(db, target_user_email, [(dish_request.name, dish_request.description, lines)])
     db.commit()
-    db.refresh(dish)
-
-    # Add ingredient names for response
-    for ing in dish.ingredients:
-        ing.ingredient_name = ing.ingredient.ingredient_name if ing.ingredient else None
-
     return dish
 
 @router.post("/service/dishes/batch", response_model=List[DishOut], tags=["Service-to-Service"])
@@ -138,54 +102,25 @@ def create_dishes_batch_service(
     Creates multiple dishes in a single transaction
     """
     target_user_email = batch_request.user_email or "system@menurithm.com"
-    created_dishes = []
     
     try:
+        # Check which dishes already exist, and resolve every ingredient, in one query each
+        existing = existing_dish_names(db, target_user_email, (dish_in.name for dish_in in batch_request.dishes))
+        names_by_id = resolve_ingredient_ids(
+            db, (ing.ingredient_id for dish_in in batch_request.dishes for ing in dish_in.ingredients)
+        )
+
+        recipes = []
         for dish_in in batch_request.dishes:
-            # Check if dish already exists
-            existing = db.query(Dish).filter(
-                Dish.name == dish_in.name,
-                Dish.user_id == target_user_email
-            ).first()
-            if existing:
+            if dish_in.name in existing:
                 continue  # Skip existing dishes instead of failing
-                
-            # Create dish
-            dish = Dish(
-                name=dish_in.name,
-                description=dish_in.description,
-                user_id=target_user_email
-            )
-            
-            # Add ingredients
-            for ing in dish_in.ingredients:
-                inventory_item = db.query(InventoryItem).filter(
-                    InventoryItem.id == ing.ingredient_id
-                ).first()
-                if not inventory_item:
-                    raise HTTPException(
-                        status_code=400, 
-                        detail=f"Ingredient with id {ing.ingredient_id} not found for dish '{dish_in.name}'"
-                    )
-                    
-                dish.ingredients.append(DishIngredient(
-                    ingredient_id=ing.ingredient_id,
-                    quantity=ing.quantity,
-                    unit=ing.unit,
-                    user_id=target_user_email,
-                ))
-            
-            db.add(dish)
-            created_dishes.append(dish)
+            existing.add(dish_in.name)
+
+            lines = recipe_lines(dish_in.ingredients, names_by_id, dish_in.name)
+            recipes.append((dish_in.name, dish_in.description, lines))
         
+        created_dishes = insert_dishes(db, target_user_email, recipes)
         db.commit()
-        
-        # Refresh all dishes and add ingredient names
-        for dish in created_dishes:
-            db.refresh(dish)
-            for ing in dish.ingredients:
-                ing.ingredient_name = ing.ingredient.ingredient_name if ing.ingredient else None
-                
         return created_dishes
         
     except Exception as e:
@@ -195,16 +130,21 @@ def create_dishes_batch_service(
 # ==================== REGULAR USER ENDPOINTS ====================
 
 @router.get("/dishes", response_model=List[DishOut])
-def get_dishes(
-    db: Session = Depends(get_db),
+async def get_dishes(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    after_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
-    dishes = db.query(Dish).filter(Dish.user_id == user.email).all()
-
-    for dish in dishes:
-        for ing in dish.ingredients:
-            ing.ingredient_name = ing.ingredient.ingredient_name if ing.ingredient else None
-
+    """
+    List the user's dishes with their ingredients.
+    Without limit every dish is returned; with limit, pages are keyed by dish id and
+    the cursor for the next page (pass it back as after_id) is sent in X-Next-Cursor.
+    """
+    dishes, next_cursor = await db.run_sync(list_dish_payloads, user.email, limit, after_id)
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = str(next_cursor)
     return dishes
 
 @router.delete("/dishes/{dish_id}", status_code=204)
@@ -217,6 +157,7 @@ def delete_dish(
     if not dish:
         raise HTTPException(status_code=404, detail="Dish not found")
 
+    forget_dish(db, user.email, dish.id)
     db.delete(dish)
     db.commit()
     return
@@ -232,37 +173,19 @@ def update_dish(
     if not dish:
         raise HTTPException(status_code=404, detail="Dish not found")
 
+    names_by_id = resolve_ingredient_ids(db, (ing.ingredient_id for ing in dish_data.ingredients), user.email)
+    lines = recipe_lines(dish_data.ingredients, names_by_id)
+
     dish.name = dish_data.name
     dish.description = dish_data.description
-    dish.ingredients.clear()
-
-    for ing in dish_data.ingredients:
-        inventory_item = db.query(InventoryItem).filter(
-            InventoryItem.id == ing.ingredient_id,
-            InventoryItem.user_id == user.email
-        ).first()
-        if not inventory_item:
-            raise HTTPException(status_code=400, detail=f"Ingredient with id {ing.ingredient_id} not found")
-
-        dish.ingredients.append(DishIngredient(
-            ingredient_id=ing.ingredient_id,
-            quantity=ing.quantity,
-            unit=ing.unit,
-        ))
+    db.query(DishIngredient).filter(DishIngredient.dish_id == dish.id).delete(synchronize_session=False)
+    insert_recipe_lines(db, user.email, {dish.id: lines})
 
     db.commit()
-    db.refresh(dish)
-
-    for ing in dish.ingredients:
-        ing.ingredient_name = ing.ingredient.ingredient_name if ing.ingredient else None
-
-    return dish
+    return build_dish_payload(dish.id, dish_data.name, dish_data.description, lines)
 
 @router.post("/upload-dishes")
 async def upload_dishes(file: UploadFile = File(...), user: User = Depends(get_current_user)):
-    contents = await file.read()
-    decoded = contents.decode("utf-8")
-    csv_reader = csv.DictReader(StringIO(decoded))
     db = SessionLocal()
 
     added_dishes = []
@@ -270,79 +193,89 @@ async def upload_dishes(file: UploadFile = File(...), user: User = Depends(get_c
     errors = []
 
     try:
-        # Group rows by dish
-        dishes = defaultdict(list)
-        for row in csv_reader:
-            dish_name = row["dish_name"].strip()
-            dishes[dish_name].append(row)
-
-        print(f"Processing {len(dishes)} dishes for user {user.email}")
-
-        for dish_name, rows in dishes.items():
-            try:
-                description = rows[0].get("description", "").strip() or None
-
-                # Check if dish already exists
-                existing_dish = db.query(Dish).filter(
-                    Dish.name.ilike(dish_name),
-                    Dish.user_id == user.email
-                ).first()
-                if existing_dish:
-                    skipped_dishes.append(f"Dish '{dish_name}' already exists")
-                    continue
+        # Dishes are resolved and written batch by batch in one transaction; across
+        # batches only the dishes seen so far are kept, as lowercased name ->
+        # (name as written, dish id once inserted, added_dishes entry or None when skipped)
+        seen = {}
+        skipped_names = set()
+        async for batch in CSVStream(file).batches(UPLOAD_BATCH_SIZE):
+            dishes = defaultdict(list)
+            for _, row in batch:
+                dish_name = row["dish_name"].strip()
+                dishes[dish_name].append(row)
+
+            # Resolve this batch's new dishes and its ingredient names, one query each
+            existing = existing_dish_names(
+                db, user.email, (name for name in dishes if name.lower() not in seen), case_insensitive=True
+            )
+            ingredients = resolve_ingredient_names(
+                db,
+                (row["ingredient_name"].strip() for rows in dishes.values() for row in rows if row.get("ingredient_name")),
+                user.email
+            )
 
-                new_dish = Dish(
-                    name=dish_name,
-                    description=description,
-                    user_id=user.email,
-                )
-                db.add(new_dish)
-                db.flush()  # Get new_dish.id
-
-                dish_ingredients = []
-                for row in rows:
-                    ingredient_name = row["ingredient_name"].strip()
-
-                    inventory_item = db.query(InventoryItem).filter(
-                        InventoryItem.ingredient_name.ilike(ingredient_name),
-                        InventoryItem.user_id == user.email
-                    ).first()
-
-                    if not inventory_item:
-                        errors.append(f"Ingredient '{ingredient_name}' not found in inventory for dish '{dish_name}'")
+            recipes = []
+            more_lines = defaultdict(list)
+            for dish_name, rows in dishes.items():
+                try:
+                    description = rows[0].get("description", "").strip() or None
+
+                    # Check if dish already exists (case-insensitive, including earlier dishes in this file);
+                    # rows continuing a dish from an earlier batch add to that dish
+                    key = dish_name.lower()
+                    earlier_name, dish_id, entry = seen.get(key, (None, None, None))
+                    if earlier_name is None and key in existing:
+                        seen[key] = (dish_name, None, None)
+                    if key in seen and (earlier_name != dish_name or entry is None):
+                        if dish_name not in skipped_names:
+                            skipped_names.add(dish_name)
+                            skipped_dishes.append(f"Dish '{dish_name}' already exists")
                         continue
-                   
-                    dish_ingredient = DishIngredient(
-                        dish_id=new_dish.id,
-                        ingredient_id=inventory_item.id,
-                        quantity=float(row["quantity"]),
-                        unit=row["unit"].strip(),
-                        user_id=user.email,
-                    )
-                    db.add(dish_ingredient)
-                    dish_ingredients.append(dish_ingredient)
-
-                if dish_ingredients:
-                    added_dishes.append({
-                        "name": dish_name,
-                        "ingredients_count": len(dish_ingredients)
-                    })
-                    print(f"Added dish: {dish_name} with {len(dish_ingredients)} ingredients")
-                else:
-                    errors.append(f"No valid ingredients found for dish '{dish_name}', skipping")
-                    db.delete(new_dish)
-
-            except Exception as e:
-                errors.append(f"Error processing dish '{dish_name}': {str(e)}")
-                continue
+
+                    lines = []
+                    for row in rows:
+                        ingredient_name = row["ingredient_name"].strip()
+
+                        inventory_item = ingredients.get(ingredient_name.lower())
+                        if not inventory_item:
+                            errors.append(f"Ingredient '{ingredient_name}' not found in inventory for dish '{dish_name}'")
+                            continue
+
+                        ingredient_id, stored_name = inventory_item
+                        lines.append((ingredient_id, stored_name, float(row["quantity"]), row["unit"].strip()))
+
+                    if entry is not None:
+                        more_lines[dish_id].extend(lines)
+                        entry["ingredients_count"] += len(lines)
+                    elif lines:
+                        recipes.append((dish_name, description, lines))
+                        added_dishes.append({
+                            "name": dish_name,
+                            "ingredients_count": len(lines)
+                        })
+                        seen[key] = (dish_name, None, added_dishes[-1])
+                        logger.info(f"Added dish: {dish_name} with {len(lines)} ingredients")
+                    else:
+                        errors.append(f"No valid ingredients found for dish '{dish_name}', skipping")
+
+                except Exception as e:
+                    errors.append(f"Error processing dish '{dish_name}': {str(e)}")
+                    continue
+
+            # Written even when errors were found, so later batches can extend these
+            # dishes; the rollback below discards everything
+            for payload in insert_dishes(db, user.email, recipes):
+                key = payload["name"].lower()
+                seen[key] = (payload["name"], payload["id"], seen[key][2])
+            insert_recipe_lines(db, user.email, more_lines)
 
         if errors:
-            print(f"Errors encountered: {errors}")
+            logger.error(f"Dish upload for user {user.email} rejected with {len(errors)} errors: {errors}")
             db.rollback()
             raise HTTPException(status_code=400, detail={"errors": errors, "added_dishes": added_dishes, "skipped_dishes": skipped_dishes})
         
         db.commit()
-        print(f"Successfully added {len(added_dishes)} dishes")
+        logger.info(f"Dish upload completed for user {user.email}: {len(added_dishes)} added, {len(skipped_dishes)} skipped")
         return {
             "status": "success",
             "added_dishes": added_dishes,
@@ -354,7 +287,7 @@ async def upload_dishes(file: UploadFile = File(...), user: User = Depends(get_c
         raise
     except Exception as e:
         db.rollback()
-        print(f"Fatal error: {str(e)}")
+        logger.error(f"Unexpected error during dish upload: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
     finally:
         db.close()
\ No newline at end of file
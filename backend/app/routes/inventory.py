@@ -1,33 +1,38 @@
 from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, get_async_db, get_db
+from app.db.upsert import UPSERT_BATCH_SIZE, upsert_rows
 from app.models.inventory import InventoryItem
 from datetime import datetime
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 from app.schemas.inventory import InventoryItemOut, InventoryItemIn
 from app.utils.auth import get_current_user
 from app.models.user import User
+from app.utils.csv_stream import CSVStream
+from app.services.units import quantity_fields
 from typing import List
-import csv
-from io import StringIO
 import logging
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def upsert_inventory_rows(db: Session, rows: List[dict]):
+    """Insert new ingredients and overwrite existing ones in set-based batches."""
+    upsert_rows(
+        db,
+        InventoryItem,
+        rows,
+        conflict_columns=("user_id", "ingredient_name"),
+        update_columns=(
+            "quantity", "unit", "quantity_value", "base_quantity", "base_unit",
+            "category", "expiry_date", "storage_location"
+        )
+    )
 
 @router.post("/upload-inventory")
 async def upload_inventory(file: UploadFile = File(...), user: User = Depends(get_current_user)):
-    contents = await file.read()
-    decoded = contents.decode('utf-8')
-    csv_reader = csv.DictReader(StringIO(decoded))
     db = SessionLocal()
 
     logger.info(f"Processing inventory upload for user {user.email}")
@@ -35,42 +40,49 @@ async def upload_inventory(file: UploadFile = File(...), user: User = Depends(ge
     errors = []
 
     try:
-        for row_num, row in enumerate(csv_reader, 1):
-            try:
-                name = row['ingredient_name'].strip().lower()
-
-                existing = db.query(InventoryItem).filter(
-                    InventoryItem.ingredient_name.ilike(name),
-                    InventoryItem.user_id == user.email
-                ).first()
-
-                if existing:
+        # One query for the user's whole inventory, keyed case-insensitively
+        # (replaces a per-row ilike lookup that couldn't use uq_user_ingredient_name)
+        stored_names = {
+            stored.lower(): stored
+            for (stored,) in db.query(InventoryItem.ingredient_name).filter(InventoryItem.user_id == user.email)
+        }
+        pending = {}
+
+        async for batch in CSVStream(file).batches():
+            for row_num, row in batch:
+                try:
+                    name = row['ingredient_name'].strip().lower()
+                    values = {
+                        "quantity": row['quantity'],
+                        "unit": row['unit'],
+                        "category": row['category'],
+                        "expiry_date": datetime.strptime(row['expiry_date'], '%Y-%m-%d').date(),
+                        "storage_location": row['storage_location'],
+                        **quantity_fields(row['quantity'], row['unit'])
+                    }
+                except (ValueError, KeyError) as e:
+                    error_msg = f"Row {row_num}: Invalid data - {str(e)}"
+                    errors.append(error_msg)
+                    logger.warning(error_msg)
+                    continue
+
+                if name in stored_names:
                     # Update existing record instead of adding duplicate
-                    existing.quantity = row['quantity']
-                    existing.unit = row['unit']
-                    existing.category = row['category']
-                    existing.expiry_date = datetime.strptime(row['expiry_date'], '%Y-%m-%d').date()
-                    existing.storage_location = row['storage_location']
                     processed_items.append(f"Updated: {name}")
                 else:
-                    item = InventoryItem(
-                        user_id=user.email,
-                        ingredient_name=name,
-                        quantity=row['quantity'],
-                        unit=row['unit'],
-                        category=row['category'],
-                        expiry_date=datetime.strptime(row['expiry_date'], '%Y-%m-%d').date(),
-                        storage_location=row['storage_location']
-                    )
-                    db.add(item)
+                    stored_names[name] = name
                     processed_items.append(f"Added: {name}")
-                    
-            except (ValueError, KeyError) as e:
-                error_msg = f"Row {row_num}: Invalid data - {str(e)}"
-                errors.append(error_msg)
-                logger.warning(error_msg)
-                continue
 
+                # Keyed by the stored name so updates hit the unique constraint; a name
+                # repeated within the file keeps its last row
+                stored = stored_names[name]
+                pending[stored] = {"user_id": user.email, "ingredient_name": stored, **values}
+
+            if len(pending) >= UPSERT_BATCH_SIZE:
+                upsert_inventory_rows(db, list(pending.values()))
+                pending.clear()
+
+        upsert_inventory_rows(db, list(pending.values()))
         db.commit()
         
         result = {
@@ -98,13 +110,14 @@ async def upload_inventory(file: UploadFile = File(...), user: User = Depends(ge
         db.close()
 
 @router.get("/inventory", response_model=List[InventoryItemOut])
-def get_inventory(db: Session = Depends(get_db), user: User = Depends(get_current_user)):
-    return db.query(InventoryItem).filter(InventoryItem.user_id == user.email).all()
+async def get_inventory(db: AsyncSession = Depends(get_async_db), user: User = Depends(get_current_user)):
+    result = await db.scalars(select(InventoryItem).where(InventoryItem.user_id == user.email))
+    return result.all()
 
 @router.delete("/inventory/{ingredient_name}", status_code=204)
 def delete_ingredient(ingredient_name: str, db: Session = Depends(get_db), user: User = Depends(get_current_user)):
     item = db.query(InventoryItem).filter(
-        InventoryItem.ingredient_name.ilike(ingredient_name.strip().lower()),
+        func.lower(InventoryItem.ingredient_name) == ingredient_name.strip().lower(),
         InventoryItem.user_id == user.email
     ).first()
 
@@ -138,7 +151,7 @@ def add_inventory_item(item_in: InventoryItemIn, db: Session = Depends(get_db),
     name = item_in.ingredient_name.strip().lower()
 
     existing = db.query(InventoryItem).filter(
-        InventoryItem.ingredient_name.ilike(name),
+        func.lower(InventoryItem.ingredient_name) == name,
         InventoryItem.user_id == user.email
     ).first()
 
@@ -168,7 +181,7 @@ def update_inventory_item(
     user: User = Depends(get_current_user)
 ):
     item = db.query(InventoryItem).filter(
-        InventoryItem.ingredient_name.ilike(ingredient_name.strip().lower()),
+        func.lower(InventoryItem.ingredient_name) == ingredient_name.strip().lower(),
         InventoryItem.user_id == user.email
     ).first()
 
@@ -1,22 +1,15 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
-from app.services.menu_engine import generate_menu_smart
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.database import get_async_analytics_db
+from app.services.menu_engine import generate_menu_vectorized
 from app.utils.auth import get_current_user
 from app.models.user import User
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/generate-menu-smart")
-def get_generated_menu_smart(
-    db: Session = Depends(get_db),
+async def get_generated_menu_smart(
+    db: AsyncSession = Depends(get_async_analytics_db),
     user: User = Depends(get_current_user)  # ✅ Inject current user
 ):
-    return {"dishes": generate_menu_smart(db, user.email)}  # ✅ Pass user ID to service
+    return {"dishes": await db.run_sync(generate_menu_vectorized, user.email)}  # ✅ Pass user ID to service
@@ -1,26 +1,28 @@
+import json
 import logging
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
-from io import StringIO
-import csv
-from datetime import datetime
+from datetime import date
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, get_async_db, get_db
 from app.models.sales import Sale
 from app.models.dish import Dish
 from app.schemas.sales import SalesRecordOut, SalesRecordIn
-from typing import List
-from sqlalchemy.orm import joinedload
+from app.services.job_queue import enqueue_job
+from app.services.sales_counts import record_sales, remove_sales
+from app.services.sales_features import forget_sale_features, record_sale_features
+from app.services.sales_ingest import SalesIngestor
+from app.services.sales_query import fetch_sales_page, iter_sales, sales_query
+from typing import List, Optional
 from app.utils.auth import get_current_user
 from app.models.user import User
+from app.utils.csv_stream import CSVStream
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# CSV rows validated per dish-lookup round trip during uploads
+UPLOAD_BATCH_SIZE = 1000
 
 @router.post("/upload-sales")
 async def upload_sales(
@@ -28,91 +30,21 @@ async def upload_sales(
     db: Session = Depends(get_db),
     user: User = Depends(get_current_user)
 ):
-    contents = await file.read()
-    decoded = contents.decode('utf-8')
-    csv_reader = csv.DictReader(StringIO(decoded))
-
     logging.info(f"Processing sales upload for user {user.email}")
     print(f"🔄 Processing sales upload for user: {user.email}")
     
-    # Track results
-    added_sales = []
-    skipped_sales = []
-    errors = []
-    row_count = 0
+    ingestor = SalesIngestor(db, user.email)
 
     try:
-        valid_sales = []  # Collect valid sales before committing
-        
-        for row_num, row in enumerate(csv_reader, 1):
-            row_count += 1
-            try:
-                dish_name = row["dish_name"].strip()
-                
-                dish = db.query(Dish).filter(
-                    Dish.name == dish_name,
-                    Dish.user_id == user.email
-                ).first()
-                
-                if not dish:
-                    skipped_msg = f"Row {row_num}: Dish '{dish_name}' not found"
-                    skipped_sales.append(skipped_msg)
-                    logging.warning(skipped_msg)
-                    continue
-
-                # Validate date format
-                try:
-                    timestamp = datetime.strptime(row["date"], "%Y-%m-%d")
-                except ValueError as e:
-                    error_msg = f"Row {row_num}: Invalid date format '{row['date']}'"
-                    errors.append(error_msg)
-                    continue
-
-                # Validate numeric fields
-                try:
-                    quantity_sold = int(row["quantity_sold"])
-                    price_per_unit = float(row["price_per_unit"])
-                except ValueError as e:
-                    error_msg = f"Row {row_num}: Invalid numeric data - {str(e)}"
-                    errors.append(error_msg)
-                    continue
+        # Stream the upload in bounded batches: one dish lookup + chunked INSERTs per batch
+        async for batch in CSVStream(file).batches(UPLOAD_BATCH_SIZE):
+            ingestor.add_rows(batch)
+        ingestor.finish()
 
-                # Collect valid sale data
-                valid_sales.append({
-                    "row_num": row_num,
-                    "dish": dish,
-                    "dish_name": dish_name,
-                    "timestamp": timestamp,
-                    "quantity_sold": quantity_sold,
-                    "price_per_unit": price_per_unit
-                })
-                
-            except Exception as e:
-                error_msg = f"Row {row_num}: Unexpected error - {str(e)}"
-                errors.append(error_msg)
-                logging.error(error_msg)
-        
-        # Only commit valid sales in a single transaction
-        for sale_data in valid_sales:
-            sale = Sale(
-                dish_id=sale_data["dish"].id,
-                user_id=user.email,
-                timestamp=sale_data["timestamp"],
-                quantity_sold=sale_data["quantity_sold"],
-                price_per_unit=sale_data["price_per_unit"]
-            )
-            db.add(sale)
-            db.flush()  # Get the sale ID
-            
-            added_sales.append({
-                "row": sale_data["row_num"],
-                "id": sale.id,
-                "dish_name": sale_data["dish_name"],
-                "dish_id": sale.dish_id,
-                "date": sale.timestamp.strftime("%Y-%m-%d"),
-                "quantity_sold": sale.quantity_sold,
-                "price_per_unit": sale.price_per_unit
-            })
+        added_sales = ingestor.added_sales
+        skipped_sales = ingestor.skipped_sales
+        errors = ingestor.errors
+        row_count = ingestor.row_count
         
         # Commit all valid sales at once
         if errors:
@@ -125,6 +57,11 @@ async def upload_sales(
                 "skipped_sales": skipped_sales
             })
         
+        # Refresh forecasts and stock recommendations in the background (deduplicated per tenant);
+        # queued in the same transaction as the sales
+        if added_sales:
+            enqueue_job(db, user.email, reason="sales_upload")
+        
         db.commit()
         
         # Prepare detailed response
@@ -156,30 +93,73 @@ async def upload_sales(
         print(f"❌ Sales upload failed: {error_msg}")
         raise HTTPException(status_code=500, detail={
             "message": error_msg,
-            "errors": errors,
-            "details": {"errors": errors}
+            "errors": ingestor.errors,
+            "details": {"errors": ingestor.errors}
         })
 
 @router.get("/sales", response_model=List[SalesRecordOut])
-def get_sales(
-    db: Session = Depends(get_db),
+async def get_sales(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    dish_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_async_db),
     user: User = Depends(get_current_user)
 ):
+    """
+    List the user's sales ordered by (timestamp, id), optionally filtered by an
+    inclusive date range and dish. Without limit every matching sale is returned;
+    with limit, the cursor for the next page is sent in X-Next-Cursor.
+    """
     print(f"📥 Fetching sales for user: {user.email}")
     
-    # Filter out sales with NULL dish_id to prevent validation errors
-    sales = db.query(Sale).filter(
-        Sale.user_id == user.email,
-        Sale.dish_id.isnot(None)
-    ).options(joinedload(Sale.dish)).all()
-    
-    print(f"📊 Found {len(sales)} sales for user {user.email}")
+    def load_page(session: Session):
+        # Sales with NULL dish_id are dropped by the dish join to prevent validation errors
+        query = sales_query(session, user.email, start_date=start_date, end_date=end_date, dish_id=dish_id)
+        return fetch_sales_page(query, limit=limit, cursor=cursor)
+
+    try:
+        sales, next_cursor = await db.run_sync(load_page)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    # Additional safety check - filter out any sales with NULL dish relationships
-    valid_sales = [sale for sale in sales if sale.dish is not None]
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
     
-    print(f"✅ Returning {len(valid_sales)} valid sales")
-    return valid_sales
+    print(f"✅ Returning {len(sales)} sales")
+    return sales
+
+@router.get("/sales/export")
+def export_sales(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    dish_id: Optional[int] = None,
+    user: User = Depends(get_current_user)
+):
+    """
+    Stream the user's sales as newline-delimited JSON for full exports.
+    Rows are fetched in chunks while the response is written, so memory stays flat.
+    """
+    logging.info(f"Exporting sales for user {user.email}")
+
+    def generate():
+        # Own session: the response outlives request-scoped dependencies
+        db = SessionLocal()
+        try:
+            query = sales_query(db, user.email, start_date=start_date, end_date=end_date, dish_id=dish_id)
+            for sale in iter_sales(query):
+                sale["timestamp"] = sale["timestamp"].isoformat()
+                yield json.dumps(sale) + "\n"
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        generate(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=sales.ndjson"}
+    )
 
 @router.post("/sales", status_code=201)
 def add_sale(
@@ -202,6 +182,10 @@ def add_sale(
         price_per_unit=sale.price_per_unit
     )
     db.add(record)
+    db.flush()  # assigns record.id for the feature row
+    record_sales(db, user.email, [dish.id])
+    record_sale_features(db, user.email, [(record.id, dish.id, record.timestamp)])
+    enqueue_job(db, user.email, reason="sales")
     db.commit()
     db.refresh(record)
     return record
@@ -216,6 +200,9 @@ def delete_sale(
     if not sale:
         raise HTTPException(status_code=404, detail="Sale not found")
 
+    remove_sales(db, user.email, [sale.dish_id])
+    forget_sale_features(db, [sale.id])  # feature rows reference the sale
     db.delete(sale)
+    enqueue_job(db, user.email, reason="sales")
     db.commit()
     return
@@ -1,20 +1,12 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
 from app.db.database import get_db
 from app.models.user import User  # Adjust path if needed
 from pydantic import BaseModel
 from typing import List, Optional
 from app.schemas.user import UserCreate, UserResponse
 from app.utils.auth_dependency import verify_firebase_token
-
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+from app.utils.auth_cache import invalidate_user
 
 
 router = APIRouter()
@@ -66,8 +58,10 @@ def delete_user(user_id: int, db: Session = Depends(get_db)):
     user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    firebase_uid = user.firebase_uid
     db.delete(user)
     db.commit()
+    invalidate_user(firebase_uid)
     return {"message": f"User {user_id} deleted"}
 
 
@@ -0,0 +1,100 @@
+"""
+Shared process pool for CPU-bound analytics
+Async routes hand NumPy/pandas work to a process pool instead of running it on
+the event loop, so one large tenant's forecast doesn't stall every other
+request on the worker. Functions must be importable top-level callables taking
+plain arrays and scalars, which pickle cheaply.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Processes in the pool; 0 runs everything inline on the event loop
+ANALYTICS_WORKERS = int(os.getenv("ANALYTICS_WORKERS", str(max(1, (os.cpu_count() or 2) // 2))))
+
+# Work smaller than this (in array cells) runs inline; pickling would cost more than it saves
+ANALYTICS_OFFLOAD_MIN_CELLS = int(os.getenv("ANALYTICS_OFFLOAD_MIN_CELLS", "20000"))
+
+def _timed(func: Callable, args: Tuple) -> Tuple[Any, float]:
+    # Runs in the worker; the run time lets the caller separate queueing from compute
+    started = time.perf_counter()
+    return func(*args), time.perf_counter() - started
+
+class ComputePool:
+    """Lazily started ProcessPoolExecutor with queue-depth and latency counters"""
+
+    def __init__(self, max_workers: int = ANALYTICS_WORKERS, min_cells: int = ANALYTICS_OFFLOAD_MIN_CELLS):
+        self.max_workers = max_workers
+        self.min_cells = min_cells
+
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.inline = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                logger.info(f"Analytics process pool started with {self.max_workers} workers")
+            return self._executor
+
+    async def run(self, func: Callable, *args, cells: Optional[int] = None) -> Any:
+        """Run func(*args) in the pool and await its result.
+
+        cells is the size of the input; small inputs (or a pool of 0 workers)
+        run inline instead.
+        """
+        if self.max_workers <= 0 or (cells is not None and cells < self.min_cells):
+            self.inline += 1
+            return func(*args)
+
+        loop = asyncio.get_running_loop()
+        self.submitted += 1
+        started = time.perf_counter()
+        try:
+            result, run_seconds = await loop.run_in_executor(self._get_executor(), _timed, func, args)
+        except Exception:
+            self.failed += 1
+            raise
+        self.completed += 1
+        self.run_seconds += run_seconds
+        self.wait_seconds += max(0.0, time.perf_counter() - started - run_seconds)
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, throughput and average queueing/compute time"""
+        in_flight = self.submitted - self.completed - self.failed
+        finished = self.completed or 1
+        return {
+            "workers": self.max_workers,
+            "in_flight": in_flight,
+            "queued": max(0, in_flight - self.max_workers),
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "inline": self.inline,
+            "avg_wait_ms": round(self.wait_seconds * 1000 / finished, 3),
+            "avg_run_ms": round(self.run_seconds * 1000 / finished, 3)
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+# Process-wide pool shared by every analytics caller
+compute_pool = ComputePool()
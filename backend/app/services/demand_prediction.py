@@ -1,29 +1,22 @@
 from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
+import asyncio
+import time
 import pandas as pd
 import numpy as np
-from openai import OpenAI
-import os
 import json
 from app.db.database import get_db
 from app.models.sales import Sale
 from app.models.inventory import InventoryItem
+from app.models.sales_analytics import SalesPattern
+from app.services.forecast_store import get_stored_forecast, get_stored_forecasts, store_forecast, store_forecasts
+from app.services.forecasting import forecast_dishes_offloaded
+from app.services.llm_client import cached_json_completion, chat_completion
+from app.services.sales_aggregation import count_sales, rollup_sales
 from sqlalchemy.orm import Session
 
 class DemandPredictionService:
-    def __init__(self):
-        # Initialize OpenAI client lazily to avoid import-time errors
-        self._openai_client = None
-        
-    @property
-    def openai_client(self):
-        """Lazy initialization of OpenAI client"""
-        if self._openai_client is None:
-            api_key = os.getenv("OPENAI_API_KEY")
-            if not api_key or api_key.startswith("your_openai"):
-                raise ValueError("OPENAI_API_KEY environment variable is not properly configured")
-            self._openai_client = OpenAI(api_key=api_key)
-        return self._openai_client
+    """Sales analytics and demand forecasting; LLM calls go through app.services.llm_client"""
         
     async def analyze_sales_patterns(self, db: Session, user_id: str, days_back: int = 30) -> Dict[str, Any]:
         """Analyze sales patterns using AI"""
@@ -31,18 +24,11 @@ class DemandPredictionService:
         end_date = datetime.now()
         start_date = end_date - timedelta(days=days_back)
         
-        sales_data = db.query(Sale).filter(
-            Sale.user_id == user_id,
-            Sale.timestamp >= start_date,
-            Sale.timestamp <= end_date
-        ).all()
+        sales_summary = self._prepare_sales_data(db, user_id, start_date, end_date)
         
-        if not sales_data:
+        if sales_summary is None:
             return {"error": "No sales data found for analysis"}
         
-        # Prepare data for AI analysis
-        sales_summary = self._prepare_sales_data(sales_data)
-        
         # Use OpenAI for pattern analysis
         analysis = await self._analyze_with_ai(sales_summary)
         
@@ -51,28 +37,11 @@ class DemandPredictionService:
         
         return analysis
     
-    def _prepare_sales_data(self, sales_data: List[Sale]) -> str:
-        """Convert sales data to format suitable for AI analysis"""
-        df = pd.DataFrame([{
-            'date': sale.timestamp.strftime('%Y-%m-%d'),
-            'day_of_week': sale.timestamp.strftime('%A'),
-            'dish_name': getattr(sale.dish, 'name', f'Dish_{sale.dish_id}') if sale.dish else f'Dish_{sale.dish_id}',
-            'quantity_sold': sale.quantity_sold,
-            'total_revenue': sale.quantity_sold * sale.price_per_unit,
-            'hour': sale.timestamp.hour if hasattr(sale.timestamp, 'hour') else 12
-        } for sale in sales_data])
-        
-        # Create summary statistics
-        summary = {
-            "total_sales": len(sales_data),
-            "total_revenue": df['total_revenue'].sum(),
-            "avg_daily_sales": df.groupby('date')['quantity_sold'].sum().mean(),
-            "top_dishes": df.groupby('dish_name')['quantity_sold'].sum().head(10).to_dict(),
-            "daily_patterns": df.groupby('day_of_week')['quantity_sold'].sum().to_dict(),
-            "hourly_patterns": df.groupby('hour')['quantity_sold'].sum().to_dict() if 'hour' in df.columns else {},
-            "weekly_trends": df.groupby(df['date'].apply(lambda x: datetime.strptime(x, '%Y-%m-%d').isocalendar()[1]))['quantity_sold'].sum().to_dict()
-        }
-        
+    def _prepare_sales_data(self, db: Session, user_id: str, start_date: datetime, end_date: datetime) -> Optional[str]:
+        """Summarize sales in range for AI analysis (aggregated in SQL); None when there are none"""
+        summary = rollup_sales(db, user_id, start_date, end_date)
+        if not summary:
+            return None
         return json.dumps(summary, indent=2)
     
     async def _analyze_with_ai(self, sales_data: str) -> Dict[str, Any]:
@@ -95,13 +64,7 @@ class DemandPredictionService:
         """
         
         try:
-            # Check if OpenAI is available before making the request
-            if not hasattr(self, '_openai_client') or self._openai_client is None:
-                # Try to initialize to check if API key is valid
-                _ = self.openai_client
-                
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
+            return await cached_json_completion(
                 messages=[
                     {"role": "system", "content": "You are an expert restaurant analytics AI that provides detailed sales pattern analysis and inventory recommendations."},
                     {"role": "user", "content": prompt}
@@ -110,15 +73,8 @@ class DemandPredictionService:
                 max_tokens=2000
             )
             
-            analysis_text = response.choices[0].message.content
-            # Clean up response to ensure valid JSON
-            if analysis_text.startswith("```json"):
-                analysis_text = analysis_text.replace("```json", "").replace("```", "")
-            
-            return json.loads(analysis_text)
-            
-        except ValueError as e:
-            # OpenAI API key not configured - provide enhanced fallback
+        except (ValueError, asyncio.TimeoutError) as e:
+            # OpenAI API key not configured, unusable reply or deadline passed - provide enhanced fallback
             return {
                 "identified_patterns": ["Demo Mode: Basic patterns detected"],
                 "demand_trends": ["Demo Mode: Configure OpenAI API for enhanced insights"],
@@ -156,123 +112,132 @@ class DemandPredictionService:
     async def _store_patterns(self, db: Session, user_id: str, analysis: Dict[str, Any]):
         """Store identified patterns in database"""
         try:
-            # TODO: Implement pattern storage with proper models
-            # Store sales pattern
-            # pattern = SalesPattern(
-            #     user_id=user_id,
-            #     pattern_type="ai_analysis",
-            #     pattern_data=analysis,
-            #     confidence_score=0.85,
-            #     identified_at=datetime.now()
-            # )
-            # db.add(pattern)
+            # Keep one active AI analysis per user; older ones are retired
+            db.query(SalesPattern).filter(
+                SalesPattern.user_id == user_id,
+                SalesPattern.pattern_type == "ai_analysis",
+                SalesPattern.is_active.is_(True)
+            ).update({SalesPattern.is_active: False}, synchronize_session=False)
             
-            # Store demand forecast
-            # forecast = DemandForecast(
-            #     user_id=user_id,
-            #     forecast_period="30_days",
-            #     predicted_data=analysis.get("predicted_growth", {}),
-            #     accuracy_score=0.80,
-            #     created_at=datetime.now()
-            # )
-            # db.add(forecast)
-            
-            # db.commit()
+            db.add(SalesPattern(
+                user_id=user_id,
+                pattern_type="ai_analysis",
+                pattern_data=json.dumps(analysis, default=str),
+                confidence_score=0.5 if analysis.get("demo_mode") else 0.85,
+                identified_at=datetime.utcnow(),
+                is_active=True
+            ))
+            db.commit()
             print(f"Analytics generated for user {user_id}")
         except Exception as e:
             db.rollback()
             print(f"Error storing patterns: {e}")
     
-    async def predict_demand(self, db: Session, user_id: str, item_name: str, days_ahead: int = 7) -> Dict[str, Any]:
-        """Predict demand for specific item using AI"""
-        # Get historical data for the item
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)  # Last 30 days
-        
-        # Get all sales for user and filter by dish name after loading
-        all_sales = db.query(Sale).filter(
-            Sale.user_id == user_id,
-            Sale.timestamp >= start_date
-        ).all()
-        
-        # Filter by dish name 
-        item_sales = [sale for sale in all_sales 
-                     if sale.dish and getattr(sale.dish, 'name', '') == item_name]
-        
-        if not item_sales:
-            return {"error": f"No sales data found for {item_name}"}
+    async def predict_demand(self, db: Session, user_id: str, item_name: str, days_ahead: int = 7,
+                             include_narrative: bool = False) -> Dict[str, Any]:
+        """Predict demand for specific item with the local forecasting engine
+        
+        The forecast itself is deterministic and computed locally (in the analytics
+        process pool); with include_narrative the LLM only adds a written
+        explanation on top. A newly computed forecast is stored in the caller's
+        transaction, which the caller commits.
+        """
+        # Served from the forecast store until new sales arrive for the dish
+        prediction, version = get_stored_forecast(db, user_id, item_name, days_ahead)
         
-        # Prepare item-specific data
-        item_data = pd.DataFrame([{
-            'date': sale.timestamp.strftime('%Y-%m-%d'),
-            'quantity_sold': sale.quantity_sold,
-            'revenue': sale.quantity_sold * sale.price_per_unit
-        } for sale in item_sales])
+        if prediction is None:
+            predictions, _ = await forecast_dishes_offloaded(db, user_id, days_ahead=days_ahead, days_back=30, dish_names=[item_name])
+            prediction = predictions.get(item_name)
+            
+            if prediction is None:
+                return {"error": f"No sales data found for {item_name}"}
+            
+            if version is not None:
+                store_forecast(db, user_id, item_name, days_ahead, version, prediction)
         
-        daily_sales = item_data.groupby('date')['quantity_sold'].sum()
+        if include_narrative:
+            narrative = await self._narrate_prediction(item_name, days_ahead, prediction)
+            if narrative:
+                prediction["narrative"] = narrative
         
+        print(f"Demand prediction generated for {item_name}")
+        return prediction
+    
+    async def predict_demand_batch(self, db: Session, user_id: str, item_names: Optional[List[str]] = None,
+                             days_ahead: int = 7) -> Dict[str, Any]:
+        """Forecast many dishes (all dishes with sales when item_names is None) in one pass
+        
+        Stored forecasts are looked up in one query; the rest share one history
+        load and one vectorized forecast, and are stored in the caller's
+        transaction, which the caller commits.
+        Returns the forecasts, the items without sales data and per-item metrics.
+        """
+        started = time.perf_counter()
+        stored = get_stored_forecasts(db, user_id, item_names, days_ahead)
+        requested = list(dict.fromkeys(item_names)) if item_names is not None else list(stored)
+        lookup_ms = (time.perf_counter() - started) * 1000
+        
+        forecasts: Dict[str, Dict[str, Any]] = {}
+        item_metrics: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for name in requested:
+            prediction, _ = stored.get(name, (None, None))
+            if prediction is None:
+                pending.append(name)
+            else:
+                forecasts[name] = prediction
+                item_metrics[name] = {"source": "store", "latency_ms": round(lookup_ms / len(requested), 3)}
+        
+        if pending:
+            computed, computed_metrics = await forecast_dishes_offloaded(
+                db, user_id, days_ahead=days_ahead, days_back=30, dish_names=pending
+            )
+            store_forecasts(db, user_id, days_ahead, {
+                name: (stored[name][1], prediction)
+                for name, prediction in computed.items() if name in stored
+            })
+            forecasts.update(computed)
+            for name, metrics in computed_metrics.items():
+                item_metrics[name] = {"source": "computed", **metrics}
+        
+        return {
+            "forecasts": forecasts,
+            "missing": [name for name in requested if name not in forecasts],
+            "metrics": {
+                "items_requested": len(requested),
+                "items_from_store": len(requested) - len(pending),
+                "items_computed": len(forecasts) - (len(requested) - len(pending)),
+                "sale_rows_loaded": sum(metrics.get("sale_rows", 0) for metrics in item_metrics.values()),
+                "total_ms": round((time.perf_counter() - started) * 1000, 3),
+                "items": item_metrics
+            }
+        }
+    
+    async def _narrate_prediction(self, item_name: str, days_ahead: int, prediction: Dict[str, Any]) -> Optional[str]:
+        """Ask the LLM to explain a computed forecast; returns None when unavailable"""
         prompt = f"""
-        Predict demand for restaurant item "{item_name}" for the next {days_ahead} days.
+        Explain this {days_ahead}-day demand forecast for restaurant item "{item_name}"
+        to a restaurant manager in 2-3 sentences. Do not change the numbers.
         
-        Historical daily sales (last 30 days):
-        {daily_sales.to_dict()}
+        {json.dumps(prediction, indent=2)}
         
         Current date: {datetime.now().strftime('%Y-%m-%d')}
         Day of week: {datetime.now().strftime('%A')}
-        
-        Provide JSON response with:
-        1. daily_predictions: Array of predicted quantities for next {days_ahead} days
-        2. total_predicted: Sum of all predictions
-        3. confidence_level: Confidence percentage (0-100)
-        4. factors_considered: Key factors influencing prediction
-        5. recommended_stock: Suggested inventory level
-        6. reorder_point: When to reorder (days ahead)
-        
-        Consider seasonal patterns, day-of-week effects, and trends.
         """
         
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
+            narrative = await chat_completion(
                 messages=[
-                    {"role": "system", "content": "You are an expert demand forecasting AI for restaurants. Provide accurate, actionable predictions."},
+                    {"role": "system", "content": "You are an expert demand forecasting AI for restaurants. Explain forecasts clearly and briefly."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.2,
-                max_tokens=1000
+                max_tokens=300
             )
-            
-            prediction_text = response.choices[0].message.content
-            if prediction_text.startswith("```json"):
-                prediction_text = prediction_text.replace("```json", "").replace("```", "")
-            
-            prediction = json.loads(prediction_text)
-            
-            # Store prediction in database
-            # forecast = DemandForecast(
-            #     user_id=user_id,
-            #     item_name=item_name,
-            #     forecast_period=f"{days_ahead}_days",
-            #     predicted_data=prediction,
-            #     accuracy_score=prediction.get("confidence_level", 75) / 100,
-            #     created_at=datetime.now()
-            # )
-            # db.add(forecast)
-            # db.commit()
-            
-            print(f"Demand prediction generated for {item_name}")
-            return prediction
-            
+            return narrative.strip()
         except Exception as e:
-            return {
-                "error": f"Prediction failed: {str(e)}",
-                "daily_predictions": [int(daily_sales.mean())] * days_ahead,
-                "total_predicted": int(daily_sales.mean() * days_ahead),
-                "confidence_level": 50,
-                "factors_considered": ["Historical average"],
-                "recommended_stock": int(daily_sales.mean() * 3),
-                "reorder_point": 2
-            }
+            print(f"Forecast narrative unavailable: {e}")
+            return None
     
     async def get_inventory_recommendations(self, db: Session, user_id: str) -> Dict[str, Any]:
         """Get AI-powered inventory recommendations"""
@@ -282,25 +247,24 @@ class DemandPredictionService:
         if not inventory_items:
             return {"error": "No inventory data found"}
         
-        # Get recent sales data
-        recent_sales = db.query(Sale).filter(
-            Sale.user_id == user_id,
-            Sale.timestamp >= datetime.now() - timedelta(days=14)
-        ).all()
+        # Get recent sales volume
+        recent_sales_volume = count_sales(db, user_id, datetime.now() - timedelta(days=14))
         
         # Prepare data for AI
         inventory_summary = {
             "current_inventory": [
                 {
                     "name": item.ingredient_name,
-                    "current_stock": item.current_stock,
+                    # Unparseable quantities go through as entered
+                    "current_stock": item.quantity_value if item.quantity_value is not None else item.quantity,
                     "unit": item.unit,
                     "cost_per_unit": getattr(item, 'cost_per_unit', 0),
                     "supplier": getattr(item, 'supplier_info', 'Unknown')
                 } for item in inventory_items
             ],
-            "recent_sales_volume": len(recent_sales),
-            "analysis_date": datetime.now().isoformat()
+            "recent_sales_volume": recent_sales_volume,
+            # Date only, so the prompt (and its cache key) is stable within a day
+            "analysis_date": datetime.now().date().isoformat()
         }
         
         prompt = f"""
@@ -321,13 +285,7 @@ class DemandPredictionService:
         """
         
         try:
-            # Check if OpenAI is available before making the request
-            if not hasattr(self, '_openai_client') or self._openai_client is None:
-                # Try to initialize to check if API key is valid
-                _ = self.openai_client
-                
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4",
+            return await cached_json_completion(
                 messages=[
                     {"role": "system", "content": "You are an expert restaurant inventory optimization AI. Provide specific, actionable recommendations."},
                     {"role": "user", "content": prompt}
@@ -336,14 +294,8 @@ class DemandPredictionService:
                 max_tokens=2000
             )
             
-            recommendations_text = response.choices[0].message.content
-            if recommendations_text.startswith("```json"):
-                recommendations_text = recommendations_text.replace("```json", "").replace("```", "")
-            
-            return json.loads(recommendations_text)
-            
-        except ValueError as e:
-            # OpenAI API key not configured - provide enhanced fallback
+        except (ValueError, asyncio.TimeoutError) as e:
+            # OpenAI API key not configured, unusable reply or deadline passed - provide enhanced fallback
             return {
                 "ai_available": False,
                 "demo_mode": True,
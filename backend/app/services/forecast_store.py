@@ -0,0 +1,101 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+import json
+from sqlalchemy import and_, insert
+from sqlalchemy.orm import Session
+from app.models.dish import Dish
+from app.models.sales import DishSalesCount
+from app.models.sales_analytics import DemandForecast
+import logging
+
+logger = logging.getLogger(__name__)
+
+def forecast_period(days_ahead: int) -> str:
+    return f"{days_ahead}_days"
+
+def get_stored_forecast(db: Session, user_id: str, item_name: str, days_ahead: int) -> Tuple[Optional[Dict[str, Any]], Optional[int]]:
+    """Look up a forecast computed today from the dish's current sales version.
+
+    Returns (prediction or None, current data version or None when the dish has
+    no recorded sales). Forecasts are keyed by (user, item, horizon, data
+    version), so any sales write for the dish makes the stored one unreachable;
+    the date check retires it when the history window moves. One indexed query.
+    """
+    return get_stored_forecasts(db, user_id, [item_name], days_ahead).get(item_name, (None, None))
+
+def get_stored_forecasts(
+    db: Session, user_id: str, item_names: Optional[Iterable[str]], days_ahead: int
+) -> Dict[str, Tuple[Optional[Dict[str, Any]], int]]:
+    """get_stored_forecast for many dishes (or, with item_names None, every dish with sales) in one query.
+
+    Returns {item_name: (prediction or None, current data version)}; dishes
+    without recorded sales are absent.
+    """
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    query = db.query(Dish.name, DishSalesCount.version, DemandForecast.predicted_data).join(
+        Dish, Dish.id == DishSalesCount.dish_id
+    ).outerjoin(
+        DemandForecast, and_(
+            DemandForecast.user_id == user_id,
+            DemandForecast.item_name == Dish.name,
+            DemandForecast.forecast_period == forecast_period(days_ahead),
+            DemandForecast.data_version == DishSalesCount.version,
+            DemandForecast.is_active.is_(True),
+            DemandForecast.created_at >= today
+        )
+    ).filter(
+        DishSalesCount.user_id == user_id,
+        Dish.user_id == user_id
+    )
+    if item_names is not None:
+        query = query.filter(Dish.name.in_(list(item_names)))
+
+    return {
+        name: (json.loads(predicted_data) if predicted_data is not None else None, version)
+        for name, version, predicted_data in query.all()
+    }
+
+def store_forecast(db: Session, user_id: str, item_name: str, days_ahead: int, version: int, prediction: Dict[str, Any]):
+    """Persist a forecast for its data version, replacing older ones for the same horizon."""
+    store_forecasts(db, user_id, days_ahead, {item_name: (version, prediction)})
+
+def store_forecasts(db: Session, user_id: str, days_ahead: int, forecasts: Dict[str, Tuple[int, Dict[str, Any]]]):
+    """Persist {item_name: (version, prediction)}, replacing older ones for the same horizon.
+
+    Runs in a savepoint of the caller's transaction and does not commit; a
+    failed write is rolled back on its own and only logged.
+    """
+    if not forecasts:
+        return
+    period = forecast_period(days_ahead)
+    now = datetime.now()
+    try:
+        with db.begin_nested():
+            db.query(DemandForecast).filter(
+                DemandForecast.user_id == user_id,
+                DemandForecast.item_name.in_(list(forecasts)),
+                DemandForecast.forecast_period == period
+            ).delete(synchronize_session=False)
+            db.execute(insert(DemandForecast), [
+                {
+                    "user_id": user_id,
+                    "item_name": item_name,
+                    "forecast_period": period,
+                    "predicted_data": json.dumps(prediction),
+                    "accuracy_score": prediction.get("confidence_level", 0) / 100,
+                    "data_version": version,
+                    "created_at": now,
+                    "is_active": True
+                }
+                for item_name, (version, prediction) in forecasts.items()
+            ])
+    except Exception as e:
+        # A concurrent request may have stored the same key first; the forecasts are still returned
+        logger.warning(f"Could not store forecasts for {len(forecasts)} items: {e}")
+
+def invalidate_forecasts(db: Session, user_id: Optional[str] = None):
+    """Drop stored forecasts for one user (or everyone); runs in the caller's transaction."""
+    query = db.query(DemandForecast)
+    if user_id is not None:
+        query = query.filter(DemandForecast.user_id == user_id)
+    query.delete(synchronize_session=False)
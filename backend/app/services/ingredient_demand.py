@@ -0,0 +1,171 @@
+"""
+Ingredient demand via recipe explosion
+Dish-level figures (historical sales, forecast demand, recommended stock) are
+turned into per-ingredient figures with one sparse matrix product against the
+user's recipes: usage = R @ dish_values, where R[i, d] is the quantity of
+ingredient i in one serving of dish d.
+Recipe quantities are converted to base units (app.services.units) before the
+product, and to each inventory item's own unit when written back.
+"""
+
+from datetime import date, timedelta
+from typing import List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from sqlalchemy import bindparam, case, func, literal, null, update
+from sqlalchemy.orm import Session
+from app.models.dish import Dish, DishIngredient
+from app.models.inventory import InventoryItem
+from app.models.inventory_enhanced import InventoryItemEnhanced, StockAlertLevel
+from app.services.forecasting import forecast_dishes_with_metrics
+from app.services.units import to_base, unit_factor
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEMAND_COLUMNS = ["average_weekly_usage", "demand_forecast", "optimal_stock_level"]
+
+def load_recipe_lines(db: Session, user_id: str) -> pd.DataFrame:
+    """Fetch (dish_name, ingredient, quantity, unit) for every recipe line of the user's dishes in one query.
+
+    Ingredients are keyed by lowercase name so they line up with either inventory table.
+    """
+    rows = db.query(
+        Dish.name, func.lower(InventoryItem.ingredient_name), DishIngredient.quantity, DishIngredient.unit
+    ).join(
+        DishIngredient, DishIngredient.dish_id == Dish.id
+    ).join(
+        InventoryItem, InventoryItem.id == DishIngredient.ingredient_id
+    ).filter(
+        Dish.user_id == user_id
+    ).all()
+    return pd.DataFrame(rows, columns=["dish_name", "ingredient", "quantity", "unit"])
+
+def recipe_matrix(lines: pd.DataFrame) -> Tuple[List[str], List[str], sparse.csr_matrix, List[Optional[str]]]:
+    """Build the sparse ingredient x dish quantity matrix from recipe lines, in base units.
+
+    Returns (dish names, ingredient names, matrix, base unit per ingredient);
+    repeated lines for the same pair are summed. An ingredient whose lines use
+    units with different bases (grams and pieces) gets None for its base unit.
+    """
+    dish_codes, dishes = pd.factorize(lines["dish_name"])
+    ingredient_codes, ingredients = pd.factorize(lines["ingredient"])
+    quantities, base_units = to_base(lines["quantity"].to_numpy(dtype=float), lines["unit"])
+    matrix = sparse.csr_matrix(
+        (quantities, (ingredient_codes, dish_codes)),
+        shape=(len(ingredients), len(dishes))
+    )
+    per_ingredient = pd.Series(base_units).groupby(ingredient_codes)
+    units = per_ingredient.first().where(per_ingredient.nunique() == 1, None)
+    return list(dishes), list(ingredients), matrix, units.tolist()
+
+def ingredient_demand(
+    db: Session,
+    user_id: str,
+    days_ahead: int = 7,
+    days_back: int = 30,
+    today: Optional[date] = None
+) -> pd.DataFrame:
+    """Project consumption for every ingredient the user's recipes use.
+
+    Indexed by lowercase ingredient name, with DEMAND_COLUMNS in the ingredient's
+    base_unit (also a column):
+    - average_weekly_usage: consumption implied by sales over the last days_back days, per week
+    - demand_forecast: consumption implied by the next days_ahead days of forecast dish demand
+    - optimal_stock_level: consumption implied by each dish's recommended stock (forecast plus safety stock)
+    Ingredients whose recipe units can't be added up have no base_unit and NaN figures.
+    """
+    lines = load_recipe_lines(db, user_id)
+    if lines.empty:
+        return pd.DataFrame(columns=DEMAND_COLUMNS, dtype=float).assign(base_unit=pd.Series(dtype=object))
+
+    dishes, ingredients, matrix, base_units = recipe_matrix(lines)
+    predictions, metrics = forecast_dishes_with_metrics(
+        db, user_id, days_ahead=days_ahead, days_back=days_back, dish_names=dishes, today=today
+    )
+
+    # One row per dish, one column per figure; dishes without recent sales stay zero
+    dish_values = np.zeros((len(dishes), len(DEMAND_COLUMNS)))
+    for row, name in enumerate(dishes):
+        if name in predictions:
+            dish_values[row] = (
+                metrics[name]["units_sold"] * 7 / days_back,
+                sum(predictions[name]["daily_predictions"]),
+                predictions[name]["recommended_stock"],
+            )
+
+    demand = pd.DataFrame(matrix @ dish_values, index=ingredients, columns=DEMAND_COLUMNS)
+    demand["base_unit"] = base_units
+    demand.loc[demand["base_unit"].isna(), DEMAND_COLUMNS] = np.nan
+    return demand
+
+def refresh_inventory_forecasts(db: Session, user_id: str, demand: Optional[pd.DataFrame] = None) -> int:
+    """Write ingredient demand onto the user's InventoryItemEnhanced rows in one bulk update.
+
+    demand defaults to ingredient_demand with a one-week horizon. Figures are
+    converted to each item's own unit; items no recipe uses get zero usage, and
+    items whose unit isn't comparable with the recipes' get NULL, so stock alerts
+    never compare mismatched units. Runs inside the caller's transaction; returns
+    the number of rows updated.
+    """
+    if demand is None:
+        demand = ingredient_demand(db, user_id, days_ahead=7)
+    items = db.query(
+        InventoryItemEnhanced.id, func.lower(InventoryItemEnhanced.ingredient_name), InventoryItemEnhanced.unit
+    ).filter(
+        InventoryItemEnhanced.user_id == user_id
+    ).all()
+    if not items:
+        return 0
+
+    ids, names, units = zip(*items)
+    matched = demand.reindex(list(names))
+    used = matched.index.isin(demand.index)
+    item_base_units, factors = zip(*(unit_factor(unit) for unit in units))
+    comparable = matched["base_unit"].to_numpy(dtype=object) == np.array(item_base_units, dtype=object)
+    values = matched[DEMAND_COLUMNS].to_numpy(dtype=float) / np.array(factors)[:, None]
+    values[~used] = 0.0
+    values[used & ~comparable] = np.nan
+    rows = [
+        {"item_id": item_id, "weekly_usage": usage, "forecast": forecast, "optimal": optimal}
+        for item_id, (usage, forecast, optimal) in zip(
+            ids, np.where(np.isnan(values), None, values.round(3)).tolist()
+        )
+    ]
+
+    table = InventoryItemEnhanced.__table__
+    db.execute(
+        update(table)
+        .where(table.c.id == bindparam("item_id"))
+        .values(
+            average_weekly_usage=bindparam("weekly_usage"),
+            demand_forecast=bindparam("forecast"),
+            optimal_stock_level=bindparam("optimal")
+        ),
+        rows
+    )
+    logger.info(f"Refreshed demand for {len(rows)} inventory items")
+    return len(rows)
+
+def refresh_stock_alerts(db: Session, user_id: str, expiring_within_days: int = 2) -> int:
+    """Recompute alert_level for the user's InventoryItemEnhanced rows in one UPDATE.
+
+    Uses the projected demand written by refresh_inventory_forecasts, already in
+    each item's unit (NULL when not comparable, which skips the demand checks):
+    out of stock, then critical (won't cover next week's demand), then expiring
+    soon, then low (below the optimal stock level); otherwise no alert. Runs
+    inside the caller's transaction; returns the number of rows updated.
+    """
+    level_type = InventoryItemEnhanced.alert_level.type
+    expiring_by = date.today() + timedelta(days=expiring_within_days)
+    alert = case(
+        (InventoryItemEnhanced.quantity <= 0, literal(StockAlertLevel.OUT_OF_STOCK, level_type)),
+        (InventoryItemEnhanced.quantity < InventoryItemEnhanced.demand_forecast, literal(StockAlertLevel.CRITICAL, level_type)),
+        (InventoryItemEnhanced.expiry_date <= expiring_by, literal(StockAlertLevel.EXPIRING_SOON, level_type)),
+        (InventoryItemEnhanced.quantity < InventoryItemEnhanced.optimal_stock_level, literal(StockAlertLevel.LOW, level_type)),
+        else_=null()
+    )
+    return db.query(InventoryItemEnhanced).filter(
+        InventoryItemEnhanced.user_id == user_id
+    ).update({InventoryItemEnhanced.alert_level: alert}, synchronize_session=False)
@@ -0,0 +1,189 @@
+"""
+Persistent per-tenant job queue
+Jobs live in the optimization_jobs table, so they survive restarts and can be
+polled by id. Enqueueing is deduplicated (one pending job per tenant and kind),
+and a tenant never has two jobs running at once. A job whose worker is lost
+goes back to the queue until it has been claimed JOB_MAX_ATTEMPTS times.
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import json
+import os
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.models.jobs import OptimizationJob, JOB_PENDING, JOB_RUNNING, JOB_DONE, JOB_FAILED, JOB_OPTIMIZE
+from app.models.sales import DishSalesCount
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Claims a job gets before a lost worker fails it for good
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+def dedupe_key(user_id: str, kind: str) -> str:
+    return f"{kind}:{user_id}"
+
+def enqueue_job(db: Session, user_id: str, kind: str = JOB_OPTIMIZE, reason: Optional[str] = None) -> Tuple[OptimizationJob, bool]:
+    """Queue a job for a tenant unless one is already pending.
+
+    Returns (job, created); when a pending job exists it is returned as is.
+    Runs in the caller's transaction (the job is flushed, not committed), so a
+    job queued with a data change is committed, or rolled back, with it.
+    """
+    key = dedupe_key(user_id, kind)
+    pending = db.query(OptimizationJob).filter(OptimizationJob.dedupe_key == key).first()
+    if pending is not None:
+        return pending, False
+
+    job = OptimizationJob(user_id=user_id, kind=kind, status=JOB_PENDING, reason=reason, dedupe_key=key)
+    try:
+        # A savepoint, so losing the race below leaves the caller's work intact
+        with db.begin_nested():
+            db.add(job)
+    except IntegrityError:
+        # Another request queued the same job first
+        return db.query(OptimizationJob).filter(OptimizationJob.dedupe_key == key).one(), False
+    return job, True
+
+def claim_next_job(db: Session, worker: str) -> Optional[OptimizationJob]:
+    """Mark the oldest pending job whose tenant has nothing running as running, and return it.
+
+    The claim is a conditional UPDATE on status, so two dispatchers can never
+    claim the same job; the loser gets None and simply polls again.
+    """
+    running_tenants = db.query(OptimizationJob.user_id).filter(OptimizationJob.status == JOB_RUNNING)
+    candidate = db.query(OptimizationJob.id).filter(
+        OptimizationJob.status == JOB_PENDING,
+        ~OptimizationJob.user_id.in_(running_tenants)
+    ).order_by(OptimizationJob.created_at, OptimizationJob.id).first()
+    if candidate is None:
+        return None
+
+    claimed = db.query(OptimizationJob).filter(
+        OptimizationJob.id == candidate.id,
+        OptimizationJob.status == JOB_PENDING
+    ).update({
+        OptimizationJob.status: JOB_RUNNING,
+        OptimizationJob.dedupe_key: None,
+        OptimizationJob.worker: worker,
+        OptimizationJob.started_at: datetime.utcnow(),
+        OptimizationJob.attempts: OptimizationJob.attempts + 1
+    }, synchronize_session=False)
+    db.commit()
+    if not claimed:
+        return None
+    return db.get(OptimizationJob, candidate.id)
+
+def complete_job(db: Session, job_id: int, result: Dict[str, Any]):
+    db.query(OptimizationJob).filter(OptimizationJob.id == job_id).update({
+        OptimizationJob.status: JOB_DONE,
+        OptimizationJob.result: json.dumps(result, default=str),
+        OptimizationJob.error: None,
+        OptimizationJob.finished_at: datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+
+def fail_job(db: Session, job_id: int, error: str):
+    db.query(OptimizationJob).filter(OptimizationJob.id == job_id).update({
+        OptimizationJob.status: JOB_FAILED,
+        OptimizationJob.error: error,
+        OptimizationJob.finished_at: datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+
+def get_job(db: Session, job_id: int, user_id: str) -> Optional[OptimizationJob]:
+    """A tenant's job by id; None for unknown ids and other tenants' jobs."""
+    return db.query(OptimizationJob).filter(
+        OptimizationJob.id == job_id,
+        OptimizationJob.user_id == user_id
+    ).first()
+
+def job_payload(job: OptimizationJob) -> Dict[str, Any]:
+    """Status view returned by the polling endpoint."""
+    return {
+        "job_id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "reason": job.reason,
+        "attempts": job.attempts,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error
+    }
+
+def release_jobs(db: Session, job_ids: Iterable[int], error: str, max_attempts: int = JOB_MAX_ATTEMPTS) -> List[str]:
+    """Put running jobs whose worker was lost back in the queue.
+
+    A job that has already been claimed max_attempts times, or whose tenant has
+    a pending job of the same kind already, is failed instead. Returns the
+    tenants whose jobs were re-queued.
+    """
+    jobs = db.query(OptimizationJob).filter(
+        OptimizationJob.id.in_(list(job_ids)),
+        OptimizationJob.status == JOB_RUNNING
+    ).all()
+    requeued = []
+    for job in jobs:
+        if job.attempts < max_attempts:
+            job.status, job.dedupe_key, job.worker, job.started_at = JOB_PENDING, dedupe_key(job.user_id, job.kind), None, None
+            job.error = error
+            try:
+                db.commit()
+                requeued.append(job.user_id)
+                continue
+            except IntegrityError:
+                # Already queued again by an upload or the API; that job covers this one
+                db.rollback()
+                job = db.get(OptimizationJob, job.id)
+        job.status, job.error, job.finished_at = JOB_FAILED, f"{error} (attempt {job.attempts} of {max_attempts})", datetime.utcnow()
+        db.commit()
+    if jobs:
+        logger.warning(f"Released {len(jobs)} lost jobs, {len(requeued)} re-queued")
+    return sorted(set(requeued))
+
+def fail_stale_jobs(db: Session, older_than: timedelta, max_attempts: int = JOB_MAX_ATTEMPTS) -> List[str]:
+    """Release running jobs whose worker has been silent too long (e.g. it was killed).
+
+    Returns the tenants whose jobs were re-queued; see release_jobs.
+    """
+    cutoff = datetime.utcnow() - older_than
+    stale = db.query(OptimizationJob.id).filter(
+        OptimizationJob.status == JOB_RUNNING,
+        OptimizationJob.started_at < cutoff
+    ).all()
+    if not stale:
+        return []
+    return release_jobs(db, [job_id for job_id, in stale], "Worker stopped before the job finished", max_attempts)
+
+def enqueue_due_jobs(db: Session, interval: timedelta, kind: str = JOB_OPTIMIZE) -> int:
+    """Queue a job for every tenant whose data changed since its last finished job
+    started, or whose last job started more than interval ago.
+
+    Data changes are read from DishSalesCount.updated_at, touched on every sales
+    write, so the lookup covers one row per dish rather than the sales history.
+    Both lookups are grouped queries returning one row per tenant. Commits the
+    new jobs and returns how many were created.
+    """
+    changed = dict(db.query(DishSalesCount.user_id, func.max(DishSalesCount.updated_at)).group_by(DishSalesCount.user_id).all())
+    last_runs = dict(db.query(OptimizationJob.user_id, func.max(OptimizationJob.started_at)).filter(
+        OptimizationJob.kind == kind,
+        OptimizationJob.status.in_([JOB_DONE, JOB_FAILED])
+    ).group_by(OptimizationJob.user_id).all())
+
+    cutoff = datetime.utcnow() - interval
+    created = 0
+    for user_id, last_change in changed.items():
+        last_run = last_runs.get(user_id)
+        if last_run is None or (last_change is not None and last_change > last_run) or last_run < cutoff:
+            _, was_created = enqueue_job(db, user_id, kind, reason="schedule")
+            created += was_created
+    db.commit()
+    return created
+
+def queue_depth(db: Session) -> Dict[str, int]:
+    """Job counts by status."""
+    return dict(db.query(OptimizationJob.status, func.count(OptimizationJob.id)).group_by(OptimizationJob.status).all())
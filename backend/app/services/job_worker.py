@@ -0,0 +1,157 @@
+"""
+Job worker pool
+A dispatcher claims jobs from the persistent queue (app.services.job_queue) and
+runs each in a separate process, at most max_workers at a time. Every job opens
+its own database session, so nothing depends on a request's session and no
+optimization runs on the API's event loop.
+Started with scripts/run_job_worker.py.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from typing import Any, Dict
+import asyncio
+import os
+import socket
+import time
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal, engine
+from app.models.jobs import JOB_OPTIMIZE
+from app.services.demand_prediction import DemandPredictionService
+from app.services.ingredient_demand import ingredient_demand, refresh_inventory_forecasts, refresh_stock_alerts
+from app.services.job_queue import claim_next_job, complete_job, enqueue_due_jobs, fail_job, fail_stale_jobs, release_jobs
+from app.services.routecast_integration import RouteCastIntegrationService
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Processes running jobs at once
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+
+# Seconds between queue polls, and between scheduled refreshes of every tenant
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+JOB_SCHEDULE_INTERVAL = float(os.getenv("JOB_SCHEDULE_INTERVAL", str(6 * 60 * 60)))
+
+# A running job older than this is assumed lost with its worker
+JOB_STALE_AFTER = timedelta(minutes=int(os.getenv("JOB_STALE_MINUTES", "30")))
+
+async def run_optimization(db: Session, user_id: str) -> Dict[str, Any]:
+    """Recompute a tenant's forecasts, ingredient demand, stock alerts and reorder recommendations"""
+    demand_service = DemandPredictionService()
+
+    forecasts = await demand_service.predict_demand_batch(db, user_id)
+
+    demand = ingredient_demand(db, user_id, days_ahead=7)
+    items_updated = refresh_inventory_forecasts(db, user_id, demand)
+    alerts_updated = refresh_stock_alerts(db, user_id)
+    db.commit()
+
+    await demand_service.analyze_sales_patterns(db, user_id)
+    recommendations = await demand_service.get_inventory_recommendations(db, user_id)
+
+    # Process any automatic orders if enabled
+    orders_placed = False
+    if recommendations.get("reorder_recommendations"):
+        api_key = os.getenv("ROUTECAST_API_KEY")
+        if api_key:
+            routecast_service = RouteCastIntegrationService(db, api_key)
+            await routecast_service.process_auto_orders(db, user_id, recommendations)
+            orders_placed = True
+
+    return {
+        "dishes_forecast": len(forecasts["forecasts"]),
+        "ingredients_projected": len(demand),
+        "inventory_items_updated": items_updated,
+        "alerts_updated": alerts_updated,
+        "ai_recommendations": recommendations.get("ai_available", True),
+        "auto_orders_processed": orders_placed
+    }
+
+JOB_HANDLERS = {
+    JOB_OPTIMIZE: run_optimization,
+}
+
+def execute_job(job_id: int, kind: str, user_id: str):
+    """Process-pool entry point: run one claimed job and record its outcome"""
+    db = SessionLocal()
+    try:
+        result = asyncio.run(JOB_HANDLERS[kind](db, user_id))
+        complete_job(db, job_id, result)
+        logger.info(f"Job {job_id} ({kind}) finished for {user_id}")
+    except Exception as e:
+        db.rollback()
+        fail_job(db, job_id, f"{type(e).__name__}: {e}")
+        logger.error(f"Job {job_id} ({kind}) failed for {user_id}: {e}")
+    finally:
+        db.close()
+
+def _init_process():
+    # Connections inherited from the parent must not be shared with it
+    engine.dispose(close=False)
+
+class JobWorkerPool:
+    """Claims queued jobs and runs them in a process pool with bounded concurrency"""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, poll_interval: float = JOB_POLL_INTERVAL,
+                 schedule_interval: float = JOB_SCHEDULE_INTERVAL):
+        self.max_workers = max_workers
+        self.poll_interval = poll_interval
+        self.schedule_interval = schedule_interval
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._in_flight: Dict[int, Future] = {}
+        self._next_schedule = 0.0
+
+    def run_forever(self):
+        logger.info(f"Job worker {self.worker_id} started with {self.max_workers} processes")
+        while True:
+            # A process that dies abruptly (OOM kill, segfault) breaks the whole pool; start a new one
+            try:
+                with ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_process) as pool:
+                    while True:
+                        self.tick(pool)
+                        time.sleep(self.poll_interval)
+            except BrokenProcessPool:
+                logger.error(f"Job worker pool broke with {len(self._in_flight)} jobs in flight; restarting it")
+                self._release(list(self._in_flight))
+                self._in_flight = {}
+                time.sleep(self.poll_interval)
+
+    def _release(self, job_ids):
+        if not job_ids:
+            return
+        db = SessionLocal()
+        try:
+            release_jobs(db, job_ids, "Worker process died before the job finished")
+        finally:
+            db.close()
+
+    def tick(self, pool: ProcessPoolExecutor):
+        """One dispatcher pass: reap finished jobs, queue due work, fill free slots"""
+        # execute_job records its own outcome, so a future that raised lost its process
+        lost = [job_id for job_id, future in self._in_flight.items() if future.done() and future.exception() is not None]
+        self._in_flight = {job_id: future for job_id, future in self._in_flight.items() if not future.done()}
+        self._release(lost)
+
+        db = SessionLocal()
+        try:
+            if time.monotonic() >= self._next_schedule:
+                fail_stale_jobs(db, JOB_STALE_AFTER)
+                created = enqueue_due_jobs(db, timedelta(seconds=self.schedule_interval))
+                if created:
+                    logger.info(f"Scheduled {created} jobs")
+                # Data-change checks run every few polls rather than only on the full interval
+                self._next_schedule = time.monotonic() + min(self.schedule_interval, 60)
+
+            while len(self._in_flight) < self.max_workers:
+                job = claim_next_job(db, self.worker_id)
+                if job is None:
+                    break
+                try:
+                    self._in_flight[job.id] = pool.submit(execute_job, job.id, job.kind, job.user_id)
+                except BrokenProcessPool:
+                    # Claimed but never started
+                    self._release([job.id])
+                    raise
+        finally:
+            db.close()
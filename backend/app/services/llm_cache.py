@@ -0,0 +1,160 @@
+"""
+Content-addressed cache for LLM responses
+Replies are keyed by the SHA-256 of the full request (model, messages and
+sampling parameters), held in an in-memory LRU with a TTL and written through
+to a SQLite file so they survive restarts. The file is opened on first use, not
+at import.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Seconds a reply stays valid, entries kept in memory and on disk
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(6 * 60 * 60)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+LLM_CACHE_MAX_DISK_ENTRIES = int(os.getenv("LLM_CACHE_MAX_DISK_ENTRIES", "10000"))
+
+# SQLite file backing the cache, relative to the working directory unless
+# absolute; empty disables the disk tier
+LLM_CACHE_SQLITE_PATH = os.getenv("LLM_CACHE_SQLITE_PATH", "llm_cache.sqlite3")
+
+def cache_key(request: Dict[str, Any]) -> str:
+    """SHA-256 of a canonical JSON encoding of the request."""
+    payload = json.dumps(request, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """Two-tier TTL + LRU cache: an OrderedDict in front of an optional SQLite table.
+
+    Safe to share across threads; every operation is a dict access or a single
+    indexed SQLite statement.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = LLM_CACHE_SQLITE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_disk_entries: int = LLM_CACHE_MAX_DISK_ENTRIES
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._opened = not path
+
+    def _connection(self) -> Optional[sqlite3.Connection]:
+        """The SQLite connection, opened on first call; None when the disk tier is off.
+
+        Called with the lock held.
+        """
+        if not self._opened:
+            self._opened = True
+            try:
+                self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache ("
+                    " key TEXT PRIMARY KEY, value TEXT NOT NULL,"
+                    " expires_at REAL NOT NULL, last_used REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS ix_llm_cache_last_used ON llm_cache (last_used)")
+            except sqlite3.Error as e:
+                logger.warning(f"LLM cache running memory-only, cannot open {self.path}: {e}")
+                self._db = None
+        return self._db
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached reply for key, or None when absent or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+            db = self._connection()
+            if db is not None:
+                row = db.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?", (key, now)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    db.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (now, key))
+                    self._remember(key, value, expires_at)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: str, ttl: Optional[float] = None):
+        """Store a reply in memory and on disk, evicting least recently used entries."""
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._remember(key, value, expires_at)
+            db = self._connection()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, value, expires_at, now)
+                )
+                db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (now,))
+                db.execute(
+                    "DELETE FROM llm_cache WHERE key IN ("
+                    " SELECT key FROM llm_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+
+    def _remember(self, key: str, value: str, expires_at: float):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every entry from both tiers."""
+        with self._lock:
+            self._entries.clear()
+            db = self._connection()
+            if db is not None:
+                db.execute("DELETE FROM llm_cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "memory_entries": len(self._entries),
+            # A configured file that has not been opened yet counts as enabled
+            "disk_enabled": self._db is not None or not self._opened
+        }
+
+# Process-wide cache shared by every LLM caller
+llm_cache = LLMResponseCache()
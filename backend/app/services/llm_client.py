@@ -0,0 +1,148 @@
+"""
+Shared async LLM client
+One AsyncOpenAI client per process (per event loop), with a process-wide concurrency cap,
+per-attempt timeouts, retries with jittered exponential backoff and an overall
+deadline, so slow completions never block the event loop or pile up.
+"""
+
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import random
+from openai import AsyncOpenAI, APIConnectionError, APITimeoutError, InternalServerError, RateLimitError
+from app.services.llm_cache import cache_key, llm_cache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = os.getenv("LLM_MODEL", "gpt-4")
+
+# Completions in flight at once across the whole process
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+
+# Seconds allowed per attempt, and for the whole call including retries and queueing
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("LLM_ATTEMPT_TIMEOUT", "15"))
+LLM_DEADLINE = float(os.getenv("LLM_DEADLINE", "25"))
+
+# Retries after the first attempt, and the base backoff in seconds
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "2"))
+LLM_BACKOFF_BASE = 0.5
+
+# Errors worth another attempt; anything else (bad request, auth) fails fast
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, InternalServerError, RateLimitError)
+
+# Both are bound to the event loop they were first used on; a process that calls
+# asyncio.run per job (the job worker) gets fresh ones for each new loop
+_client: Optional[AsyncOpenAI] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+def _check_loop():
+    global _client, _semaphore, _loop
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return
+    if loop is not _loop:
+        # The old client's connections belong to a loop that is gone; drop them unclosed
+        _client, _semaphore, _loop = None, None, loop
+
+def get_client() -> AsyncOpenAI:
+    """Return the shared client; raises ValueError when no API key is configured."""
+    global _client
+    _check_loop()
+    if _client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key or api_key.startswith("your_openai"):
+            raise ValueError("OPENAI_API_KEY environment variable is not properly configured")
+        # Retries are handled here so they share the semaphore and the deadline
+        _client = AsyncOpenAI(api_key=api_key, timeout=LLM_ATTEMPT_TIMEOUT, max_retries=0)
+    return _client
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    _check_loop()
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+    return _semaphore
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, LLM_BACKOFF_BASE * (2 ** attempt))
+
+async def _complete_with_retries(request: Dict[str, Any]) -> str:
+    client = get_client()
+    semaphore = _get_semaphore()
+
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        try:
+            # Held only while a request is in flight, and released on cancellation
+            async with semaphore:
+                response = await client.chat.completions.create(**request)
+            return response.choices[0].message.content
+        except RETRYABLE_ERRORS as e:
+            if attempt == LLM_MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            logger.warning(f"LLM call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+async def chat_completion(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.3,
+    max_tokens: int = 1000,
+    deadline: Optional[float] = None
+) -> str:
+    """Run a chat completion and return the reply text.
+
+    Raises ValueError when the API key is missing and asyncio.TimeoutError when
+    the deadline (LLM_DEADLINE by default) passes; the in-flight request is
+    cancelled in that case.
+    """
+    request = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    return await asyncio.wait_for(_complete_with_retries(request), timeout=deadline or LLM_DEADLINE)
+
+async def cached_json_completion(
+    messages: List[Dict[str, str]],
+    model: str = DEFAULT_MODEL,
+    temperature: float = 0.3,
+    max_tokens: int = 1000,
+    deadline: Optional[float] = None,
+    ttl: Optional[float] = None
+) -> Any:
+    """chat_completion parsed as JSON, served from the response cache when possible.
+
+    The cache key is the hash of the full request, so identical prompts (e.g. the
+    same dashboard over unchanged data) skip the completion entirely. Only replies
+    that parse are cached.
+    """
+    request = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+    key = cache_key(request)
+
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return json.loads(cached)
+
+    reply = await chat_completion(messages, model=model, temperature=temperature, max_tokens=max_tokens, deadline=deadline)
+    parsed = parse_json_reply(reply)
+    llm_cache.set(key, json.dumps(parsed), ttl=ttl)
+    return parsed
+
+def parse_json_reply(text: str) -> Any:
+    """Parse a JSON reply, tolerating a ```json fenced block."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.replace("```json", "").replace("```", "")
+    return json.loads(text)
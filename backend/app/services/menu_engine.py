@@ -1,20 +1,26 @@
 from sqlalchemy.orm import Session
-from app.models.dish import Dish
+from app.models.dish import Dish, DishIngredient
 from app.models.inventory import InventoryItem
-from app.models.sales import Sale
+from app.models.sales import DishSalesCount
+from app.services.units import to_base
 from collections import defaultdict
 from sqlalchemy import func
+import numpy as np
+import pandas as pd
 import logging
 import math
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def calculate_popularity_scores(db: Session):
+def calculate_popularity_scores(db: Session, user_id: str):
     score_map = defaultdict(float)
     
-    # Fetch sales count per dish
-    sales_counts = db.query(Sale.dish_id, func.count(Sale.id)).group_by(Sale.dish_id).all()
+    # Read the user's materialized sales count per dish (kept current by the sales routes)
+    sales_counts = db.query(DishSalesCount.dish_id, DishSalesCount.sales_count).filter(
+        DishSalesCount.user_id == user_id,
+        DishSalesCount.sales_count > 0
+    ).all()
     
     if not sales_counts:
         return score_map
@@ -31,7 +37,7 @@ def generate_menu_smart(db: Session, user_id: str):
     menu = []
     inventory = {i.ingredient_name.lower(): i for i in db.query(InventoryItem).filter(InventoryItem.user_id == user_id).all()}
     dishes = db.query(Dish).all()
-    popularity = calculate_popularity_scores(db)
+    popularity = calculate_popularity_scores(db, user_id)
 
     logger.info("Starting smart menu generation...")
     for dish in dishes:
@@ -45,7 +51,7 @@ def generate_menu_smart(db: Session, user_id: str):
                 can_make = False
                 break
             try:
-                available = float(stock.quantity)
+                available = float(stock.quantity_value)
                 required = ing.quantity
                 servings = available / required
                 servings_possible = min(servings_possible, servings)
@@ -63,3 +69,104 @@ def generate_menu_smart(db: Session, user_id: str):
     menu.sort(key=lambda x: x["popularity_score"], reverse=True)
     logger.info(f"✅ Menu generated with {len(menu)} dishes")
     return menu
+
+
+def load_recipe_matrix(db: Session, user_id: str):
+    """Load every recipe line for the user's dishes in a single query.
+
+    Returns a DataFrame with one row per (dish, ingredient) line, ordered by dish id.
+    """
+    rows = (
+        db.query(
+            Dish.id,
+            Dish.name,
+            Dish.description,
+            func.lower(InventoryItem.ingredient_name),
+            DishIngredient.quantity,
+            DishIngredient.unit,
+        )
+        .join(DishIngredient, DishIngredient.dish_id == Dish.id)
+        .outerjoin(InventoryItem, InventoryItem.id == DishIngredient.ingredient_id)
+        .filter(Dish.user_id == user_id)
+        .order_by(Dish.id)
+        .all()
+    )
+    return pd.DataFrame(rows, columns=["dish_id", "name", "description", "ingredient", "required", "unit"])
+
+def load_stock_vector(db: Session, user_id: str) -> pd.DataFrame:
+    """Load the user's stock levels in a single query, keyed by lowercase ingredient name.
+
+    Quantities are the numeric columns parsed on write: quantity (in the item's unit),
+    base_quantity and base_unit. Unparseable quantities are NULL, so any dish that needs
+    them is treated as unmakeable.
+    """
+    rows = (
+        db.query(
+            func.lower(InventoryItem.ingredient_name),
+            InventoryItem.quantity_value,
+            InventoryItem.base_quantity,
+            InventoryItem.base_unit,
+        )
+        .filter(InventoryItem.user_id == user_id)
+        .all()
+    )
+    stock = pd.DataFrame(rows, columns=["ingredient", "quantity", "base_quantity", "base_unit"]).set_index("ingredient")
+    stock[["quantity", "base_quantity"]] = stock[["quantity", "base_quantity"]].astype(float)
+    return stock[~stock.index.duplicated(keep="last")]
+
+def compute_servings(recipes: pd.DataFrame, stock: pd.DataFrame) -> pd.DataFrame:
+    """Compute servings possible for every dish in one min-over-ratio pass.
+
+    Stock and recipe quantities are compared in base units when both sides share a base
+    unit (2 kg of stock covers 400 g recipes five times); otherwise the raw numbers are
+    compared as before. A dish is feasible only if every ingredient is stocked, parseable
+    and has a non-zero required quantity; otherwise its servings come out as NaN.
+    """
+    if recipes.empty:
+        return recipes.assign(servings=np.array([], dtype=float))
+
+    lines = stock.reindex(recipes["ingredient"])
+    required = recipes["required"].to_numpy(dtype=float)
+    required_base, required_unit = to_base(required, recipes["unit"])
+    same_base = lines["base_unit"].to_numpy(dtype=object) == required_unit
+    available = np.where(same_base, lines["base_quantity"].to_numpy(dtype=float), lines["quantity"].to_numpy(dtype=float))
+    required = np.where(same_base, required_base, required)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(required != 0, available / required, np.nan)
+
+    dish_ids = recipes["dish_id"].to_numpy()
+    starts = np.flatnonzero(np.r_[True, dish_ids[1:] != dish_ids[:-1]])
+    # np.minimum propagates NaN, so a single missing ingredient rules out the dish
+    servings = np.minimum.reduceat(ratio, starts)
+
+    dishes = recipes.iloc[starts][["dish_id", "name", "description"]].reset_index(drop=True)
+    dishes["servings"] = servings
+    return dishes
+
+def generate_menu_vectorized(db: Session, user_id: str):
+    """Drop-in replacement for generate_menu_smart that avoids per-dish lazy loads.
+
+    Issues a fixed number of queries (recipes, stock, popularity) regardless of
+    how many dishes or ingredients the user has.
+    """
+    logger.info("Starting vectorized menu generation...")
+    recipes = load_recipe_matrix(db, user_id)
+    stock = load_stock_vector(db, user_id)
+    popularity = calculate_popularity_scores(db, user_id)
+
+    dishes = compute_servings(recipes, stock)
+    servings = dishes["servings"].to_numpy(dtype=float)
+    feasible = dishes[np.isfinite(servings) & (servings >= 1)]
+
+    menu = [
+        {
+            "name": name,
+            "description": description,
+            "servings": int(servings_possible),
+            "popularity_score": round(popularity.get(dish_id, 0.0), 2)
+        }
+        for dish_id, name, description, servings_possible in feasible.itertuples(index=False)
+    ]
+    menu.sort(key=lambda x: x["popularity_score"], reverse=True)
+    logger.info(f"✅ Menu generated with {len(menu)} dishes")
+    return menu
@@ -0,0 +1,154 @@
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from app.models.dish import Dish, DishIngredient
+from app.models.inventory import InventoryItem
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A resolved recipe line: (ingredient_id, ingredient_name, quantity, unit)
+RecipeLine = Tuple[int, str, float, str]
+
+def resolve_ingredient_ids(db: Session, ingredient_ids: Iterable[int], user_id: Optional[str] = None) -> Dict[int, str]:
+    """Map inventory ids to ingredient names in one query.
+
+    With user_id set, only that user's ingredients resolve; service calls pass None.
+    """
+    ids = set(ingredient_ids)
+    if not ids:
+        return {}
+
+    query = db.query(InventoryItem.id, InventoryItem.ingredient_name).filter(InventoryItem.id.in_(ids))
+    if user_id is not None:
+        query = query.filter(InventoryItem.user_id == user_id)
+    return dict(query.all())
+
+def resolve_ingredient_names(db: Session, names: Iterable[str], user_id: str) -> Dict[str, Tuple[int, str]]:
+    """Map lowercased ingredient names to (id, stored name) for one user in one query."""
+    lowered = {name.lower() for name in names}
+    if not lowered:
+        return {}
+
+    found = db.query(InventoryItem.id, InventoryItem.ingredient_name).filter(
+        InventoryItem.user_id == user_id,
+        func.lower(InventoryItem.ingredient_name).in_(lowered)
+    ).order_by(InventoryItem.id).all()
+
+    resolved = {}
+    for item_id, stored_name in found:
+        resolved.setdefault(stored_name.lower(), (item_id, stored_name))
+    return resolved
+
+def existing_dish_names(db: Session, user_id: str, names: Iterable[str], case_insensitive: bool = False) -> Set[str]:
+    """Return which of the given dish names the user already has (lowercased when case_insensitive)."""
+    names = set(names)
+    if not names:
+        return set()
+
+    if case_insensitive:
+        lowered = {name.lower() for name in names}
+        rows = db.query(func.lower(Dish.name)).filter(
+            Dish.user_id == user_id,
+            func.lower(Dish.name).in_(lowered)
+        ).all()
+    else:
+        rows = db.query(Dish.name).filter(Dish.user_id == user_id, Dish.name.in_(names)).all()
+    return {name for (name,) in rows}
+
+def build_dish_payload(dish_id: int, name: str, description: Optional[str], lines: List[RecipeLine]) -> Dict:
+    """Shape a written dish like DishOut without reloading it."""
+    return {
+        "id": dish_id,
+        "name": name,
+        "description": description,
+        "ingredients": [
+            {"ingredient_id": ingredient_id, "ingredient_name": ingredient_name, "quantity": quantity, "unit": unit}
+            for ingredient_id, ingredient_name, quantity, unit in lines
+        ]
+    }
+
+def list_dish_payloads(
+    db: Session,
+    user_id: str,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+) -> Tuple[List[Dict], Optional[int]]:
+    """Load a user's dishes with their ingredient lines in one joined query.
+
+    Dishes are ordered by id; with limit set, one page after after_id is returned
+    together with the cursor for the next page (None on the last page). Rows are
+    read as plain tuples, so nothing is lazy-loaded while serializing.
+    """
+    page = db.query(Dish.id).filter(Dish.user_id == user_id)
+    if after_id is not None:
+        page = page.filter(Dish.id > after_id)
+    page = page.order_by(Dish.id)
+    if limit is not None:
+        page = page.limit(limit + 1)  # one extra dish tells whether another page exists
+
+    rows = db.query(
+        Dish.id, Dish.name, Dish.description,
+        DishIngredient.ingredient_id, InventoryItem.ingredient_name, DishIngredient.quantity, DishIngredient.unit
+    ).outerjoin(
+        DishIngredient, DishIngredient.dish_id == Dish.id
+    ).outerjoin(
+        InventoryItem, InventoryItem.id == DishIngredient.ingredient_id
+    ).filter(
+        Dish.id.in_(page.scalar_subquery())
+    ).order_by(Dish.id, DishIngredient.id).all()
+
+    dishes = []
+    for dish_id, name, description, ingredient_id, ingredient_name, quantity, unit in rows:
+        if not dishes or dishes[-1]["id"] != dish_id:
+            dishes.append(build_dish_payload(dish_id, name, description, []))
+        if ingredient_id is not None:
+            dishes[-1]["ingredients"].append({
+                "ingredient_id": ingredient_id,
+                "ingredient_name": ingredient_name,
+                "quantity": quantity,
+                "unit": unit
+            })
+
+    next_cursor = None
+    if limit is not None and len(dishes) > limit:
+        dishes = dishes[:limit]
+        next_cursor = dishes[-1]["id"]
+    return dishes, next_cursor
+
+def insert_recipe_lines(db: Session, user_id: str, lines_by_dish: Dict[int, List[RecipeLine]]):
+    """Write DishIngredient rows for several dishes in one bulk insert."""
+    rows = [
+        {
+            "user_id": user_id,
+            "dish_id": dish_id,
+            "ingredient_id": ingredient_id,
+            "quantity": quantity,
+            "unit": unit,
+        }
+        for dish_id, lines in lines_by_dish.items()
+        for ingredient_id, _, quantity, unit in lines
+    ]
+    if rows:
+        db.execute(insert(DishIngredient), rows)
+
+def insert_dishes(db: Session, user_id: str, recipes: List[Tuple[str, Optional[str], List[RecipeLine]]]) -> List[Dict]:
+    """Bulk insert dishes and their ingredient lines for one user.
+
+    recipes holds (name, description, lines) with names unique per user, so the
+    RETURNING rows are matched back by name. Runs inside the caller's transaction
+    and returns DishOut-shaped payloads in input order.
+    """
+    if not recipes:
+        return []
+
+    inserted = db.execute(
+        insert(Dish).returning(Dish.id, Dish.name),
+        [{"user_id": user_id, "name": name, "description": description} for name, description, _ in recipes]
+    ).all()
+    dish_ids = {name: dish_id for dish_id, name in inserted}
+
+    insert_recipe_lines(db, user_id, {dish_ids[name]: lines for name, _, lines in recipes})
+    logger.info(f"Inserted {len(recipes)} dishes in bulk for user {user_id}")
+
+    return [build_dish_payload(dish_ids[name], name, description, lines) for name, description, lines in recipes]
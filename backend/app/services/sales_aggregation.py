@@ -0,0 +1,164 @@
+"""
+Sales aggregation for analytics
+Summaries are built from column arrays: date parts come from datetime64
+arithmetic and every pattern is a single weighted bincount, so the same code
+summarizes one row per sale (summarize_sales, a million sales in well under a
+second) or rows already grouped in SQL (rollup_sales, where only one row per
+day and hour leaves the database). Weekday and hour come from the SalesAnalytics
+features written at ingest (app.services.sales_features); sales without a
+feature row fall back to their timestamp.
+"""
+
+from datetime import datetime
+from typing import Any, Dict
+import numpy as np
+import pandas as pd
+from sqlalchemy import extract, func
+from sqlalchemy.orm import Session
+from app.models.dish import Dish
+from app.models.sales import Sale
+from app.models.sales_analytics import SalesAnalytics
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Dishes listed in the top_dishes summary
+TOP_DISHES = 10
+
+SALES_COLUMNS = ["timestamp", "dish_id", "quantity_sold", "price_per_unit", "day_of_week", "hour"]
+
+def count_sales(db: Session, user_id: str, since: datetime) -> int:
+    """Number of sales recorded since the given time."""
+    return db.query(func.count(Sale.id)).filter(
+        Sale.user_id == user_id,
+        Sale.timestamp >= since
+    ).scalar() or 0
+
+def load_sales_frame(db: Session, user_id: str, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+    """Fetch raw sale columns in range, with precomputed SalesAnalytics day/hour where present."""
+    rows = db.query(
+        Sale.timestamp, Sale.dish_id, Sale.quantity_sold, Sale.price_per_unit,
+        SalesAnalytics.day_of_week, SalesAnalytics.hour_of_day
+    ).outerjoin(
+        SalesAnalytics, SalesAnalytics.sale_id == Sale.id
+    ).filter(
+        Sale.user_id == user_id,
+        Sale.timestamp >= start_date,
+        Sale.timestamp <= end_date
+    ).all()
+    return pd.DataFrame.from_records(rows, columns=SALES_COLUMNS)
+
+def load_dish_names(db: Session, user_id: str) -> Dict[int, str]:
+    return dict(db.query(Dish.id, Dish.name).filter(Dish.user_id == user_id).all())
+
+def _weekdays(day_of_week: pd.Series, day_numbers: np.ndarray) -> np.ndarray:
+    """Monday=0 weekdays from the day_of_week feature (Monday=1), else from the day number."""
+    weekday = pd.to_numeric(day_of_week, errors="coerce").to_numpy(dtype=float) - 1
+    # 1970-01-01 was a Thursday, so shifting by 3 makes Monday == 0
+    derived_weekday = (day_numbers + 3) % 7
+    return np.where(np.isnan(weekday), derived_weekday, weekday).astype(np.int64)
+
+def _summarize(day_numbers: np.ndarray, weekday: np.ndarray, hour: np.ndarray, sales: np.ndarray,
+               quantity: np.ndarray, revenue: np.ndarray, top_dishes: Dict[str, int]) -> Dict[str, Any]:
+    """The analytics summary from rows weighted by their sale count, quantity and revenue."""
+    # Daily totals: one pass over the day numbers
+    unique_days, day_index = np.unique(day_numbers, return_inverse=True)
+    daily_totals = np.bincount(day_index, weights=quantity, minlength=len(unique_days))
+
+    by_weekday = np.bincount(weekday, weights=quantity, minlength=7)
+    by_hour = np.bincount(hour, weights=quantity, minlength=24)
+
+    # ISO weeks only need computing once per distinct day
+    iso_weeks = pd.DatetimeIndex(unique_days.astype("datetime64[D]")).isocalendar().week.to_numpy(dtype=np.int64)
+    weekly = pd.Series(daily_totals).groupby(iso_weeks).sum()
+
+    present_weekdays = np.flatnonzero(np.bincount(weekday, minlength=7))
+    present_hours = np.flatnonzero(np.bincount(hour, minlength=24))
+
+    return {
+        "total_sales": int(sales.sum()),
+        "total_revenue": float(revenue.sum()),
+        "avg_daily_sales": float(daily_totals.mean()) if len(daily_totals) else 0.0,
+        "top_dishes": top_dishes,
+        "daily_patterns": {DAY_NAMES[day]: int(by_weekday[day]) for day in present_weekdays},
+        "hourly_patterns": {int(h): int(by_hour[h]) for h in present_hours},
+        "weekly_trends": {int(week): int(total) for week, total in weekly.items()},
+    }
+
+def summarize_sales(frame: pd.DataFrame, dish_names: Dict[int, str]) -> Dict[str, Any]:
+    """Build the analytics summary (totals, daily/hourly/weekly patterns, top dishes).
+
+    frame holds SALES_COLUMNS; day_of_week (Monday=1) and hour may be missing
+    per row and are then derived from the timestamp.
+    """
+    timestamps = pd.to_datetime(frame["timestamp"]).to_numpy(dtype="datetime64[ns]")
+    quantity = frame["quantity_sold"].to_numpy(dtype=np.int64)
+    revenue = quantity * frame["price_per_unit"].to_numpy(dtype=float)
+
+    days = timestamps.astype("datetime64[D]")
+    day_numbers = days.astype(np.int64)
+
+    hour = pd.to_numeric(frame["hour"], errors="coerce").to_numpy(dtype=float)
+    derived_hour = (timestamps - days).astype("timedelta64[h]").astype(np.int64)
+    hour = np.where(np.isnan(hour), derived_hour, hour).astype(np.int64)
+
+    dish_ids = pd.to_numeric(frame["dish_id"], errors="coerce")
+    by_dish = pd.Series(quantity).groupby(dish_ids.fillna(-1).to_numpy(dtype=np.int64)).sum()
+    top = by_dish.nlargest(TOP_DISHES)
+
+    def dish_label(dish_id: int) -> str:
+        if dish_id == -1:
+            return "Dish_None"
+        return dish_names.get(dish_id, f"Dish_{dish_id}")
+
+    return _summarize(
+        day_numbers, _weekdays(frame["day_of_week"], day_numbers), hour,
+        np.ones(len(frame), dtype=np.int64), quantity, revenue,
+        {dish_label(int(dish_id)): int(total) for dish_id, total in top.items()}
+    )
+
+def rollup_sales(db: Session, user_id: str, start_date: datetime, end_date: datetime) -> Dict[str, Any]:
+    """Build the same summary as summarize_sales with GROUP BY queries.
+
+    Two small queries: totals per (day, day_of_week feature, hour), which
+    _summarize weights like individual sales, and the top dishes. ISO week
+    totals are derived from the per-day rows, which keeps the SQL portable
+    across PostgreSQL, MySQL and SQLite.
+    Returns an empty dict when there are no sales in range.
+    """
+    in_range = (
+        Sale.user_id == user_id,
+        Sale.timestamp >= start_date,
+        Sale.timestamp <= end_date
+    )
+
+    sale_day = func.date(Sale.timestamp)
+    sale_hour = func.coalesce(SalesAnalytics.hour_of_day, extract("hour", Sale.timestamp))
+    grouped = db.query(
+        sale_day, SalesAnalytics.day_of_week, sale_hour, func.count(Sale.id), func.sum(Sale.quantity_sold),
+        func.sum(Sale.quantity_sold * Sale.price_per_unit)
+    ).outerjoin(
+        SalesAnalytics, SalesAnalytics.sale_id == Sale.id
+    ).filter(*in_range).group_by(sale_day, SalesAnalytics.day_of_week, sale_hour).all()
+    if not grouped:
+        return {}
+
+    dish_quantity = func.sum(Sale.quantity_sold)
+    top = db.query(Sale.dish_id, Dish.name, dish_quantity).outerjoin(
+        Dish, Dish.id == Sale.dish_id
+    ).filter(*in_range).group_by(Sale.dish_id, Dish.name).order_by(
+        dish_quantity.desc(), Sale.dish_id
+    ).limit(TOP_DISHES).all()
+
+    rows = pd.DataFrame(grouped, columns=["day", "day_of_week", "hour", "sales", "quantity", "revenue"])
+    # SQLite returns date() as text, other backends as a date
+    day_numbers = pd.to_datetime(rows["day"].astype(str)).to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+    def dish_label(dish_id, name) -> str:
+        return name if name is not None else f"Dish_{dish_id}"
+
+    return _summarize(
+        day_numbers, _weekdays(rows["day_of_week"], day_numbers), rows["hour"].to_numpy(dtype=np.int64),
+        rows["sales"].to_numpy(dtype=np.int64), rows["quantity"].to_numpy(dtype=np.int64),
+        rows["revenue"].fillna(0).to_numpy(dtype=float),
+        {dish_label(dish_id, name): int(quantity) for dish_id, name, quantity in top}
+    )
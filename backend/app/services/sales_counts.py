@@ -0,0 +1,87 @@
+from collections import Counter
+from datetime import datetime
+from typing import Iterable, Optional
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+from app.db.upsert import upsert_rows
+from app.models.sales import Sale, DishSalesCount
+from app.services.forecast_store import invalidate_forecasts
+import logging
+
+logger = logging.getLogger(__name__)
+
+def record_sales(db: Session, user_id: str, dish_ids: Iterable[int]):
+    """Increment the materialized sale counts for newly added sales.
+
+    Also bumps each dish's version, which retires its stored forecasts. Runs
+    inside the caller's transaction, so a rollback discards the increments
+    together with the sales themselves.
+    """
+    counts = Counter(dish_id for dish_id in dish_ids if dish_id is not None)
+    if not counts:
+        return
+
+    # One upsert adds to existing counts in SQL, so neither concurrent increments
+    # nor two uploads creating the same (user, dish) row lose updates
+    now = datetime.utcnow()
+    upsert_rows(
+        db,
+        DishSalesCount,
+        [
+            {"user_id": user_id, "dish_id": dish_id, "sales_count": added, "version": 1, "updated_at": now}
+            for dish_id, added in counts.items()
+        ],
+        conflict_columns=("user_id", "dish_id"),
+        update_columns=("updated_at",),
+        # version is 1 in every row, so existing versions are bumped by one
+        increment_columns=("sales_count", "version")
+    )
+
+def remove_sales(db: Session, user_id: str, dish_ids: Iterable[int]):
+    """Decrement the materialized sale counts for deleted sales."""
+    counts = Counter(dish_id for dish_id in dish_ids if dish_id is not None)
+    for dish_id, removed in counts.items():
+        db.query(DishSalesCount).filter(
+            DishSalesCount.user_id == user_id,
+            DishSalesCount.dish_id == dish_id
+        ).update(
+            {
+                DishSalesCount.sales_count: case(
+                    (DishSalesCount.sales_count > removed, DishSalesCount.sales_count - removed),
+                    else_=0
+                ),
+                DishSalesCount.version: DishSalesCount.version + 1
+            },
+            synchronize_session=False
+        )
+
+def forget_dish(db: Session, user_id: str, dish_id: int):
+    """Drop the sale count row of a deleted dish."""
+    db.query(DishSalesCount).filter(
+        DishSalesCount.user_id == user_id,
+        DishSalesCount.dish_id == dish_id
+    ).delete(synchronize_session=False)
+
+def rebuild_sales_counts(db: Session, user_id: Optional[str] = None) -> int:
+    """Recompute sale counts from the sales table (one user, or everyone when user_id is None).
+
+    Used to backfill existing history; the request paths keep the table current afterwards.
+    """
+    counts_query = db.query(DishSalesCount)
+    sales_query = db.query(Sale.user_id, Sale.dish_id, func.count(Sale.id)).filter(Sale.dish_id.isnot(None))
+    if user_id is not None:
+        counts_query = counts_query.filter(DishSalesCount.user_id == user_id)
+        sales_query = sales_query.filter(Sale.user_id == user_id)
+
+    counts_query.delete(synchronize_session=False)
+    # Versions restart here, so forecasts keyed on the old ones must go
+    invalidate_forecasts(db, user_id)
+    rows = [
+        {"user_id": owner, "dish_id": dish_id, "sales_count": count, "version": 1}
+        for owner, dish_id, count in sales_query.group_by(Sale.user_id, Sale.dish_id).all()
+    ]
+    db.bulk_insert_mappings(DishSalesCount, rows)
+    db.commit()
+
+    logger.info(f"Rebuilt {len(rows)} dish sale counts")
+    return len(rows)
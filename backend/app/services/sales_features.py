@@ -0,0 +1,76 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.sales import Sale
+from app.models.sales_analytics import SalesAnalytics
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Sales processed per backfill round trip
+BACKFILL_BATCH_SIZE = 5000
+
+# (sale_id, dish_id, timestamp)
+SaleKey = Tuple[int, Optional[int], datetime]
+
+def sale_features(user_id: str, sale_id: int, dish_id: Optional[int], timestamp: datetime) -> Dict:
+    """Time features of one sale, shaped as a SalesAnalytics row."""
+    return {
+        "user_id": user_id,
+        "sale_id": sale_id,
+        "dish_id": dish_id,
+        "hour_of_day": timestamp.hour,
+        "day_of_week": timestamp.isoweekday(),  # Monday=1
+        "week_of_month": (timestamp.day - 1) // 7 + 1,
+        "month": timestamp.month,
+        "is_weekend": timestamp.weekday() >= 5,
+        "created_at": datetime.utcnow(),
+    }
+
+def record_sale_features(db: Session, user_id: str, sales: Iterable[SaleKey]):
+    """Write SalesAnalytics rows for newly inserted sales in one bulk insert.
+
+    Runs inside the caller's transaction, alongside the sales themselves.
+    Weather, order and cost fields stay empty until a source for them exists.
+    """
+    rows = [sale_features(user_id, sale_id, dish_id, timestamp) for sale_id, dish_id, timestamp in sales]
+    if rows:
+        db.execute(insert(SalesAnalytics.__table__), rows)
+
+def forget_sale_features(db: Session, sale_ids: Iterable[int]):
+    """Delete the feature rows of sales about to be deleted (they reference the sale)."""
+    sale_ids = list(sale_ids)
+    if sale_ids:
+        db.query(SalesAnalytics).filter(SalesAnalytics.sale_id.in_(sale_ids)).delete(synchronize_session=False)
+
+def backfill_sale_features(db: Session, user_id: Optional[str] = None, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Create feature rows for sales that don't have one yet (one user, or everyone).
+
+    Walks sales in id order, committing each batch, so it can be interrupted and
+    re-run safely.
+    """
+    written = 0
+    last_id = 0
+    while True:
+        query = db.query(Sale.id, Sale.user_id, Sale.dish_id, Sale.timestamp).outerjoin(
+            SalesAnalytics, SalesAnalytics.sale_id == Sale.id
+        ).filter(
+            SalesAnalytics.id.is_(None),
+            Sale.id > last_id
+        )
+        if user_id is not None:
+            query = query.filter(Sale.user_id == user_id)
+        batch = query.order_by(Sale.id).limit(batch_size).all()
+        if not batch:
+            break
+
+        rows = [sale_features(owner, sale_id, dish_id, timestamp) for sale_id, owner, dish_id, timestamp in batch]
+        db.execute(insert(SalesAnalytics.__table__), rows)
+        db.commit()
+
+        written += len(rows)
+        last_id = batch[-1][0]
+        logger.info(f"Backfilled features for {written} sales")
+
+    return written
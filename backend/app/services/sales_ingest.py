@@ -0,0 +1,150 @@
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.models.dish import Dish
+from app.models.sales import Sale
+from app.services.sales_counts import record_sales
+from app.services.sales_features import record_sale_features
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Rows sent per multi-row INSERT; large enough to amortize round trips,
+# small enough to keep statement size and memory bounded
+INSERT_CHUNK_SIZE = 5000
+
+class SalesIngestor:
+    """Bulk ingestion of CSV sales rows for a single user.
+
+    Rows are fed in batches through add_rows(): dish names are resolved with one
+    IN query per batch (cached across batches), rows are validated in the same
+    pass, and valid sales are written with chunked multi-row INSERT ... RETURNING.
+    Error and skip messages match the per-row upload they replace.
+    """
+
+    def __init__(self, db: Session, user_id: str, chunk_size: int = INSERT_CHUNK_SIZE):
+        self.db = db
+        self.user_id = user_id
+        self.chunk_size = chunk_size
+
+        self.row_count = 0
+        self.added_sales: List[Dict] = []
+        self.skipped_sales: List[str] = []
+        self.errors: List[str] = []
+
+        self._dish_ids: Dict[str, Optional[int]] = {}
+        self._timestamps: Dict[str, datetime] = {}
+        self._pending: List[Tuple[int, str, Dict]] = []
+        self._inserted_dish_ids: List[int] = []
+
+    def resolve_dishes(self, dish_names: Iterable[str]):
+        """Look up all not-yet-seen dish names in a single query."""
+        unseen = {name for name in dish_names if name not in self._dish_ids}
+        if not unseen:
+            return
+
+        found = self.db.query(Dish.name, Dish.id).filter(
+            Dish.user_id == self.user_id,
+            Dish.name.in_(unseen)
+        ).all()
+        self._dish_ids.update(dict.fromkeys(unseen))
+        self._dish_ids.update(dict(found))
+
+    def add_rows(self, rows: Iterable[Tuple[int, Dict[str, str]]]):
+        """Validate a batch of (row_num, row) pairs and queue the valid sales."""
+        batch = list(rows)
+        self.row_count += len(batch)
+
+        dish_names = set()
+        for _, row in batch:
+            try:
+                dish_names.add(row["dish_name"].strip())
+            except Exception:
+                pass  # reported in row order below
+        self.resolve_dishes(dish_names)
+
+        for row_num, row in batch:
+            try:
+                self._add_row(row_num, row, row["dish_name"].strip())
+            except Exception as e:
+                error_msg = f"Row {row_num}: Unexpected error - {str(e)}"
+                self.errors.append(error_msg)
+                logging.error(error_msg)
+
+        if len(self._pending) >= self.chunk_size:
+            self.flush()
+
+    def _add_row(self, row_num: int, row: Dict[str, str], dish_name: str):
+        dish_id = self._dish_ids.get(dish_name)
+        if dish_id is None:
+            skipped_msg = f"Row {row_num}: Dish '{dish_name}' not found"
+            self.skipped_sales.append(skipped_msg)
+            logging.warning(skipped_msg)
+            return
+
+        # Validate date format (POS exports repeat the same few dates, so parse each once)
+        raw_date = row["date"]
+        timestamp = self._timestamps.get(raw_date)
+        if timestamp is None:
+            try:
+                timestamp = datetime.strptime(raw_date, "%Y-%m-%d")
+            except ValueError:
+                self.errors.append(f"Row {row_num}: Invalid date format '{raw_date}'")
+                return
+            self._timestamps[raw_date] = timestamp
+
+        # Validate numeric fields
+        try:
+            quantity_sold = int(row["quantity_sold"])
+            price_per_unit = float(row["price_per_unit"])
+        except ValueError as e:
+            self.errors.append(f"Row {row_num}: Invalid numeric data - {str(e)}")
+            return
+
+        self._pending.append((row_num, dish_name, {
+            "user_id": self.user_id,
+            "dish_id": dish_id,
+            "timestamp": timestamp,
+            "quantity_sold": quantity_sold,
+            "price_per_unit": price_per_unit
+        }))
+
+    def flush(self):
+        """Write queued sales in chunks of multi-row INSERTs, collecting their ids.
+
+        Each chunk's SalesAnalytics feature rows are written right after it.
+        """
+        for start in range(0, len(self._pending), self.chunk_size):
+            chunk = self._pending[start:start + self.chunk_size]
+            # sort_by_parameter_order returns ids in the order the rows were sent.
+            # PostgreSQL keeps the batched INSERT ... SELECT form for serial ids;
+            # SQLite has no sentinel support and falls back to one row per statement
+            inserted = self.db.execute(
+                insert(Sale.__table__).returning(Sale.__table__.c.id, sort_by_parameter_order=True),
+                [values for _, _, values in chunk]
+            ).scalars().all()
+
+            for (row_num, dish_name, values), sale_id in zip(chunk, inserted):
+                self.added_sales.append({
+                    "row": row_num,
+                    "id": sale_id,
+                    "dish_name": dish_name,
+                    "dish_id": values["dish_id"],
+                    "date": values["timestamp"].date().isoformat(),
+                    "quantity_sold": values["quantity_sold"],
+                    "price_per_unit": values["price_per_unit"]
+                })
+                self._inserted_dish_ids.append(values["dish_id"])
+
+            record_sale_features(
+                self.db, self.user_id,
+                ((sale_id, values["dish_id"], values["timestamp"]) for (_, _, values), sale_id in zip(chunk, inserted))
+            )
+        self._pending.clear()
+
+    def finish(self):
+        """Flush remaining rows and update popularity counts; the caller commits or rolls back."""
+        self.flush()
+        record_sales(self.db, self.user_id, self._inserted_dish_ids)
+        logger.info(f"Ingested {len(self.added_sales)} sales in bulk for user {self.user_id}")
@@ -0,0 +1,86 @@
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+from app.models.dish import Dish
+from app.models.sales import Sale
+
+# Rows fetched per round trip while streaming an export
+EXPORT_FETCH_SIZE = 1000
+
+def encode_cursor(timestamp: datetime, sale_id: int) -> str:
+    """Cursor for the page after a sale: '<iso timestamp>|<id>'."""
+    return f"{timestamp.isoformat()}|{sale_id}"
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Parse a cursor from encode_cursor; raises ValueError when malformed."""
+    timestamp, _, sale_id = cursor.rpartition("|")
+    return datetime.fromisoformat(timestamp), int(sale_id)
+
+def sales_query(
+    db: Session,
+    user_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    dish_id: Optional[int] = None
+):
+    """Projection of a user's sales joined to their dish, ordered by (timestamp, id).
+
+    Only columns are selected, so no ORM objects enter the identity map. Sales
+    without a dish are excluded by the inner join. Date bounds are inclusive.
+    """
+    query = db.query(
+        Sale.id, Sale.timestamp, Sale.quantity_sold, Sale.price_per_unit, Dish.id, Dish.name
+    ).join(
+        Dish, Dish.id == Sale.dish_id
+    ).filter(
+        Sale.user_id == user_id
+    )
+
+    if start_date is not None:
+        query = query.filter(Sale.timestamp >= datetime.combine(start_date, datetime.min.time()))
+    if end_date is not None:
+        query = query.filter(Sale.timestamp < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    if dish_id is not None:
+        query = query.filter(Sale.dish_id == dish_id)
+
+    return query.order_by(Sale.timestamp, Sale.id)
+
+def sale_payload(row) -> Dict:
+    """Shape a projected row like SalesRecordOut."""
+    sale_id, timestamp, quantity_sold, price_per_unit, dish_id, dish_name = row
+    return {
+        "id": sale_id,
+        "timestamp": timestamp,
+        "dish": {"id": dish_id, "name": dish_name},
+        "quantity_sold": quantity_sold,
+        "price_per_unit": price_per_unit
+    }
+
+def fetch_sales_page(query, limit: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+    """Run a sales_query one keyset page at a time.
+
+    Returns the page and the cursor for the next one (None on the last page);
+    without limit the whole result is returned.
+    """
+    if cursor is not None:
+        after_timestamp, after_id = decode_cursor(cursor)
+        query = query.filter(or_(
+            Sale.timestamp > after_timestamp,
+            and_(Sale.timestamp == after_timestamp, Sale.id > after_id)
+        ))
+    if limit is not None:
+        query = query.limit(limit + 1)  # one extra row tells whether another page exists
+
+    sales = [sale_payload(row) for row in query.all()]
+
+    next_cursor = None
+    if limit is not None and len(sales) > limit:
+        sales = sales[:limit]
+        next_cursor = encode_cursor(sales[-1]["timestamp"], sales[-1]["id"])
+    return sales, next_cursor
+
+def iter_sales(query, fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[Dict]:
+    """Yield every row of a sales_query without buffering the result set."""
+    for row in query.execution_options(stream_results=True, yield_per=fetch_size):
+        yield sale_payload(row)
@@ -0,0 +1,105 @@
+"""
+Quantity parsing and unit normalization
+Inventory quantities arrive as free text ("5", "2.5 kg", "1,5", "1,500 g"). They are parsed
+once when written and stored as a number in the item's unit (quantity_value)
+and in a base unit (base_quantity / base_unit: grams, millilitres or each), so
+stock can be compared, summed and filtered in SQL or arrays without reparsing.
+"""
+
+from typing import Dict, Optional, Tuple
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+# unit spelling -> (base unit, factor to the base unit)
+UNIT_FACTORS: Dict[str, Tuple[str, float]] = {}
+
+def _register(base_unit: str, factor: float, *spellings: str):
+    for spelling in spellings:
+        UNIT_FACTORS[spelling] = (base_unit, factor)
+
+_register("g", 1.0, "g", "gr", "gram", "grams", "gramme", "grammes")
+_register("g", 1000.0, "kg", "kgs", "kilo", "kilos", "kilogram", "kilograms")
+_register("g", 0.001, "mg", "milligram", "milligrams")
+_register("g", 453.59237, "lb", "lbs", "pound", "pounds")
+_register("g", 28.349523125, "oz", "ounce", "ounces")
+_register("ml", 1.0, "ml", "milliliter", "milliliters", "millilitre", "millilitres")
+_register("ml", 10.0, "cl", "centiliter", "centiliters", "centilitre", "centilitres")
+_register("ml", 100.0, "dl", "deciliter", "deciliters", "decilitre", "decilitres")
+_register("ml", 1000.0, "l", "lt", "ltr", "liter", "liters", "litre", "litres")
+_register("ml", 4.92892159375, "tsp", "teaspoon", "teaspoons")
+_register("ml", 14.78676478125, "tbsp", "tablespoon", "tablespoons")
+_register("ml", 29.5735295625, "fl oz", "floz", "fluid ounce", "fluid ounces")
+_register("ml", 236.5882365, "cup", "cups")
+_register("ml", 3785.411784, "gal", "gallon", "gallons")
+_register("each", 1.0, "", "each", "ea", "pc", "pcs", "piece", "pieces", "unit", "units", "count", "item", "items")
+_register("each", 12.0, "dozen", "doz")
+
+# A leading number in one of three shapes, none followed by a further digit group:
+# comma thousands ("1,500", "12,345.5"), dot thousands with a decimal comma
+# ("1.500,5"), or plain digits with an optional decimal point or comma ("2.5", "2,5")
+_LEADING_NUMBER = re.compile(r"""
+    ^\s*(?P<sign>[-+]?)(?:
+        (?P<comma_groups>\d{1,3}(?:,\d{3})+)(?P<point_fraction>\.\d+)?
+      | (?P<dot_groups>\d{1,3}(?:\.\d{3})+),(?P<comma_fraction>\d+)
+      | (?P<digits>\d+)(?:[.,](?P<fraction>\d+))?
+    )(?![.,]?\d)
+""", re.VERBOSE)
+
+def _finite(value: float) -> Optional[float]:
+    return value if math.isfinite(value) else None
+
+def parse_quantity(text) -> Optional[float]:
+    """The number at the start of a quantity ("2.5", "2,5 kg", "1,500 g"), or None when there isn't one.
+
+    A comma followed by exactly three digits groups thousands ("1,500" is 1500);
+    otherwise it is a decimal comma ("1,5" is 1.5). Digit runs that fit neither
+    shape ("1,500,5") and non-finite values ("nan", "inf") are rejected.
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return _finite(float(text))
+    try:
+        return _finite(float(text))
+    except ValueError:
+        pass
+
+    match = _LEADING_NUMBER.match(text)
+    if not match:
+        return None
+    if match["comma_groups"]:
+        number = match["comma_groups"].replace(",", "") + (match["point_fraction"] or "")
+    elif match["dot_groups"]:
+        number = match["dot_groups"].replace(".", "") + "." + match["comma_fraction"]
+    else:
+        number = match["digits"] + ("." + match["fraction"] if match["fraction"] else "")
+    return float(match["sign"] + number)
+
+def unit_factor(unit: Optional[str]) -> Tuple[str, float]:
+    """(base unit, factor) for a unit; unknown units are their own base."""
+    key = " ".join((unit or "").strip().lower().split())
+    return UNIT_FACTORS.get(key, (key, 1.0))
+
+def quantity_fields(quantity, unit: Optional[str]) -> Dict[str, Optional[float]]:
+    """Numeric columns for an inventory row: quantity_value, base_quantity and base_unit."""
+    value = parse_quantity(quantity)
+    base_unit, factor = unit_factor(unit)
+    return {
+        "quantity_value": value,
+        "base_quantity": value * factor if value is not None else None,
+        "base_unit": base_unit
+    }
+
+def to_base(quantities: np.ndarray, units: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    """Vectorized unit_factor: (quantities in base units, base unit per row).
+
+    Each distinct unit is looked up once.
+    """
+    codes, distinct = pd.factorize(units.fillna(""))
+    factors = [unit_factor(unit) for unit in distinct]
+    base_units = np.array([base_unit for base_unit, _ in factors] or [""], dtype=object)
+    scale = np.array([factor for _, factor in factors] or [1.0], dtype=float)
+    return np.asarray(quantities, dtype=float) * scale[codes], base_units[codes]
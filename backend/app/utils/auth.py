@@ -2,22 +2,18 @@ import firebase_admin
 from firebase_admin import credentials, auth
 from fastapi import HTTPException, Depends, Header
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal
+from app.db.database import get_db
 from app.models.user import User
+from app.utils.auth_cache import get_cached_user, remember_user, verify_token
 import os
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 path_to_json = os.path.join(BASE_DIR,"../core/menurithm-firebase-adminsdk-fbsvc-36044de71d.json")
-cred = credentials.Certificate(path_to_json)
-firebase_admin.initialize_app(cred)
-
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# auth_enhanced may have initialized Firebase already
+if not firebase_admin._apps:
+    cred = credentials.Certificate(path_to_json)
+    firebase_admin.initialize_app(cred)
 
 def get_current_user(authorization: str = Header(...), db: Session = Depends(get_db)):
     if not authorization.startswith("Bearer "):
@@ -25,16 +21,17 @@ def get_current_user(authorization: str = Header(...), db: Session = Depends(get
     
     token = authorization.split(" ")[1]
     try:
-        decoded = auth.verify_id_token(token)
+        decoded = verify_token(token)
         firebase_uid = decoded["uid"]
         email = decoded.get("email")
     except:
         raise HTTPException(status_code=403, detail="Invalid token")
 
-    user_record = db.query(User).filter_by(firebase_uid=firebase_uid).first()
+    user_record = get_cached_user(db, firebase_uid)
     if not user_record:
         user_record = User(firebase_uid=firebase_uid, email=email)
         db.add(user_record)
         db.commit()
         db.refresh(user_record)
+        remember_user(user_record)
     return user_record
@@ -0,0 +1,148 @@
+"""
+Cache for verified Firebase ID tokens and their users
+Verifying an ID token checks its signature against Google's keys, and resolving
+the caller is a users query, on every authenticated request. Repeat callers are
+served from two in-memory LRUs instead: verified claims keyed by the SHA-256 of
+the token, kept no longer than the token's own exp, and User column snapshots
+keyed by firebase_uid.
+Each worker process has its own cache. Role and profile changes drop the uid's
+entries here; user snapshots also expire after AUTH_USER_CACHE_TTL so other
+workers pick the change up.
+"""
+
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import hashlib
+import os
+import threading
+import time
+from firebase_admin import auth as firebase_auth
+from sqlalchemy.orm import Session
+from app.models.user import User
+
+# Verified tokens held, and the longest any token is trusted without re-verifying
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_TOKEN_CACHE_MAX_TTL = float(os.getenv("AUTH_TOKEN_CACHE_MAX_TTL", str(60 * 60)))
+
+# Users held, and seconds a snapshot is served before it is read again
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "2048"))
+AUTH_USER_CACHE_TTL = float(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+
+# User columns copied into a snapshot
+USER_COLUMNS = [column.key for column in User.__table__.columns]
+
+def token_key(token: str) -> str:
+    """SHA-256 of the raw token; the token itself is never kept."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+class ExpiringLRU:
+    """OrderedDict LRU whose entries each carry an absolute expiry and a uid tag"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, value: Any, expires_at: float, tag: Optional[str] = None):
+        if self.max_entries <= 0 or expires_at <= time.time():
+            return
+        with self._lock:
+            self._entries[key] = (value, expires_at, tag)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard_tag(self, tag: str) -> int:
+        """Drop every entry tagged with tag; returns how many were dropped."""
+        with self._lock:
+            keys = [key for key, (_, _, entry_tag) in self._entries.items() if entry_tag == tag]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+# Process-wide caches shared by every auth dependency
+token_cache = ExpiringLRU(AUTH_TOKEN_CACHE_SIZE)
+user_cache = ExpiringLRU(AUTH_USER_CACHE_SIZE)
+
+def verify_token(token: str, verify: Optional[Callable[[str], Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Decoded claims for a Firebase ID token, verifying it only on a cache miss.
+
+    Verification errors propagate unchanged and are never cached. A token is
+    trusted until its exp (capped at AUTH_TOKEN_CACHE_MAX_TTL from now); tokens
+    without an exp are not cached.
+    """
+    key = token_key(token)
+    claims = token_cache.get(key)
+    if claims is not None:
+        return claims
+
+    claims = (verify or firebase_auth.verify_id_token)(token)
+    exp = claims.get("exp")
+    if exp:
+        token_cache.put(key, claims, min(float(exp), time.time() + AUTH_TOKEN_CACHE_MAX_TTL), tag=claims.get("uid"))
+    return claims
+
+def remember_user(user: User):
+    """Cache a snapshot of a freshly loaded or created user."""
+    snapshot = {column: getattr(user, column) for column in USER_COLUMNS}
+    user_cache.put(user.firebase_uid, snapshot, time.time() + AUTH_USER_CACHE_TTL, tag=user.firebase_uid)
+
+def get_cached_user(db: Session, firebase_uid: str) -> Optional[User]:
+    """The user for a uid, from the cache or a single query.
+
+    Cache hits are new detached User instances, safe to read but not attached to
+    db; a route that modifies the user must load it into its own session.
+    """
+    snapshot = user_cache.get(firebase_uid)
+    if snapshot is not None:
+        return User(**snapshot)
+
+    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+    if user is not None:
+        remember_user(user)
+    return user
+
+def invalidate_user(firebase_uid: Optional[str]) -> int:
+    """Forget a uid's user snapshot and verified tokens; call after changing the user."""
+    if not firebase_uid:
+        return 0
+    return user_cache.discard_tag(firebase_uid) + token_cache.discard_tag(firebase_uid)
+
+def auth_cache_stats() -> Dict[str, Any]:
+    """Hit rates and sizes of both caches"""
+    return {"tokens": token_cache.stats(), "users": user_cache.stats()}
@@ -1,6 +1,6 @@
 from fastapi import HTTPException, Header
-from firebase_admin import auth as firebase_auth
 import app.utils.auth 
+from app.utils.auth_cache import verify_token
 
 
 def verify_firebase_token(authorization: str = Header(...)):
@@ -8,7 +8,7 @@ def verify_firebase_token(authorization: str = Header(...)):
         raise HTTPException(status_code=403, detail="Invalid authorization header format")
     token = authorization.split(" ")[1]
     try:
-        decoded_token = firebase_auth.verify_id_token(token)
+        decoded_token = verify_token(token)
         return decoded_token  # contains 'uid', 'email', etc.
     except Exception as e:
         print("❌ Token verification error:", repr(e))
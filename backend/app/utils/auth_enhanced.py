@@ -16,8 +16,10 @@ import logging
 from enum import Enum
 from dotenv import load_dotenv
 
-from app.db.database import SessionLocal
+from app.db.database import get_db
 from app.models.user import User
+from app.utils.auth_cache import get_cached_user, remember_user, verify_token
+from app.utils.rate_limit import default_backend
 
 # Load environment variables
 load_dotenv()
@@ -54,14 +56,6 @@ class PermissionLevel(str, Enum):
 # Security scheme for OpenAPI docs
 security = HTTPBearer()
 
-def get_db():
-    """Database dependency"""
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 class AuthenticationError(HTTPException):
     """Custom authentication error"""
     def __init__(self, detail: str = "Authentication failed"):
@@ -77,27 +71,11 @@ class RateLimitError(HTTPException):
     def __init__(self, detail: str = "Rate limit exceeded"):
         super().__init__(status_code=429, detail=detail)
 
-# In-memory rate limiting (use Redis in production)
-rate_limit_storage = {}
-
 def check_rate_limit(user_id: str, limit: int = 100, window_minutes: int = 60):
-    """Simple rate limiting implementation"""
-    now = datetime.now()
-    window_start = now - timedelta(minutes=window_minutes)
-    
-    if user_id not in rate_limit_storage:
-        rate_limit_storage[user_id] = []
-    
-    # Clean old requests
-    rate_limit_storage[user_id] = [
-        req_time for req_time in rate_limit_storage[user_id] 
-        if req_time > window_start
-    ]
-    
-    if len(rate_limit_storage[user_id]) >= limit:
+    """Per-user rate limit; state is shared with the middleware's backend (app.utils.rate_limit)"""
+    result = default_backend().hit(f"user:{user_id}", limit, window_minutes * 60)
+    if not result.allowed:
         raise RateLimitError(f"Rate limit exceeded: {limit} requests per {window_minutes} minutes")
-    
-    rate_limit_storage[user_id].append(now)
 
 async def verify_firebase_token(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -106,8 +84,8 @@ async def verify_firebase_token(
     Verify Firebase ID token and return decoded token
     """
     try:
-        # Verify the token
-        decoded_token = auth.verify_id_token(credentials.credentials)
+        # Verify the token (cached until it expires)
+        decoded_token = verify_token(credentials.credentials)
         return decoded_token
     except auth.ExpiredIdTokenError:
         raise AuthenticationError("Token has expired")
@@ -138,7 +116,7 @@ async def get_current_user(
         check_rate_limit(firebase_uid)
     
     # Get or create user
-    user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+    user = get_cached_user(db, firebase_uid)
     
     if not user:
         # Auto-create user on first login
@@ -151,6 +129,7 @@ async def get_current_user(
         db.add(user)
         db.commit()
         db.refresh(user)
+        remember_user(user)
         logger.info(f"Created new user: {email}")
     
     return user
@@ -264,9 +243,9 @@ async def flexible_auth(
         # Firebase token authentication
         token = authorization.split(" ")[1]
         try:
-            decoded_token = auth.verify_id_token(token)
+            decoded_token = verify_token(token)
             firebase_uid = decoded_token["uid"]
-            user = db.query(User).filter(User.firebase_uid == firebase_uid).first()
+            user = get_cached_user(db, firebase_uid)
             return {"auth_type": "firebase", "user": user, "token_data": decoded_token}
         except Exception as e:
             raise AuthenticationError("Invalid Firebase token")
@@ -0,0 +1,146 @@
+"""
+Streaming CSV reader for uploaded files
+Decodes an UploadFile incrementally and yields DictReader-style rows in bounded
+batches, so upload and validation memory does not grow with file size
+"""
+
+import codecs
+import csv
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import UploadFile
+
+# Bytes pulled from the upload per read
+READ_CHUNK_SIZE = 64 * 1024
+
+# Rows handed to the caller per batch
+DEFAULT_BATCH_SIZE = 1000
+
+Row = Tuple[int, Dict[str, Optional[str]]]
+
+def _quote_state(line: str, in_quotes: bool) -> bool:
+    """Return whether a CSV record is still inside a quoted field after `line`.
+
+    Follows the csv module's default dialect: a quote only opens a field at the
+    start of that field, and a doubled quote inside a quoted field is an escape.
+    """
+    pos = 0
+    while True:
+        quote = line.find('"', pos)
+        if quote == -1:
+            return in_quotes
+        if in_quotes:
+            if line.startswith('"', quote + 1):
+                pos = quote + 2
+                continue
+            in_quotes = False
+        elif quote == 0 or line[quote - 1] == ",":
+            in_quotes = True
+        pos = quote + 1
+
+class _RecordFeed:
+    """Iterator handed to csv.reader; holds exactly one complete record at a time."""
+
+    def __init__(self):
+        self.record = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        record, self.record = self.record, None
+        if record is None:
+            raise StopIteration
+        return record
+
+class CSVStream:
+    """Incremental CSV reader over an UploadFile.
+
+    Rows are numbered from 1 (header excluded) and shaped like csv.DictReader
+    output, so existing per-row validation keeps working unchanged.
+    """
+
+    def __init__(self, file: UploadFile, encoding: str = "utf-8", chunk_size: int = READ_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.fieldnames: Optional[List[str]] = None
+
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+        self._feed = _RecordFeed()
+        self._reader = csv.reader(self._feed)
+        self._records = self._iter_records()
+        self._row_num = 0
+
+    async def _iter_records(self) -> AsyncIterator[str]:
+        """Yield complete CSV records (quoted fields may span several lines)."""
+        pending = ""
+        record = []
+        in_quotes = False
+
+        while True:
+            chunk = await self.file.read(self.chunk_size)
+            final = not chunk
+            text = pending + self._decoder.decode(chunk, final=final)
+
+            # Split on "\n" only; csv treats other line-break characters as field data
+            lines = text.split("\n")
+            pending = lines.pop()
+            lines = [line + "\n" for line in lines]
+            if final and pending:
+                lines.append(pending)
+
+            for line in lines:
+                record.append(line)
+                in_quotes = _quote_state(line, in_quotes)
+                if not in_quotes:
+                    yield "".join(record)
+                    record = []
+
+            if final:
+                if record:
+                    yield "".join(record)
+                return
+
+    def _parse(self, record: str) -> List[str]:
+        self._feed.record = record
+        return next(self._reader)
+
+    async def read_header(self) -> List[str]:
+        """Read and return the header row (empty list for an empty file)."""
+        if self.fieldnames is None:
+            self.fieldnames = []
+            async for record in self._records:
+                fields = self._parse(record)
+                if fields:
+                    self.fieldnames = fields
+                    break
+        return self.fieldnames
+
+    async def rows(self) -> AsyncIterator[Row]:
+        """Yield (row_num, row) pairs one at a time."""
+        fieldnames = await self.read_header()
+        width = len(fieldnames)
+
+        async for record in self._records:
+            fields = self._parse(record)
+            if not fields:
+                continue  # DictReader skips blank lines
+
+            self._row_num += 1
+            row = dict(zip(fieldnames, fields))
+            if len(fields) > width:
+                row[None] = fields[width:]
+            elif len(fields) < width:
+                for key in fieldnames[len(fields):]:
+                    row[key] = None
+            yield self._row_num, row
+
+    async def batches(self, batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[List[Row]]:
+        """Yield rows in lists of at most batch_size."""
+        batch = []
+        async for row in self.rows():
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
@@ -6,12 +6,14 @@ Handles authentication, logging, and security headers
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import JSONResponse
+import math
 import time
 import logging
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.db.database import SessionLocal
 from app.models.user import User
+from app.utils.rate_limit import default_backend
 
 logger = logging.getLogger(__name__)
 
@@ -86,25 +88,30 @@ class UserActivityMiddleware(BaseHTTPMiddleware):
 
 class RateLimitMiddleware(BaseHTTPMiddleware):
     """
-    Simple rate limiting middleware
+    Per-client rate limiting middleware (GCRA, see app.utils.rate_limit)
     """
     
-    def __init__(self, app, calls: int = 100, period: int = 60):
+    def __init__(self, app, calls: int = 100, period: int = 60, backend=None):
         super().__init__(app)
         self.calls = calls
         self.period = period
-        self.clients = {}
+        self.backend = backend or default_backend()
     
     async def dispatch(self, request: Request, call_next):
         client_ip = self._get_client_ip(request)
+        result = self.backend.hit(f"ip:{client_ip}", self.calls, self.period)
         
-        if self._is_rate_limited(client_ip):
+        if not result.allowed:
             return JSONResponse(
                 status_code=429,
-                content={"detail": "Rate limit exceeded"}
+                content={"detail": "Rate limit exceeded"},
+                headers={"Retry-After": str(math.ceil(result.retry_after))}
             )
         
-        return await call_next(request)
+        response = await call_next(request)
+        response.headers["X-RateLimit-Limit"] = str(self.calls)
+        response.headers["X-RateLimit-Remaining"] = str(result.remaining)
+        return response
     
     def _get_client_ip(self, request: Request) -> str:
         """Get client IP address"""
@@ -114,20 +121,5 @@ class RateLimitMiddleware(BaseHTTPMiddleware):
         return request.client.host if request.client else "unknown"
     
     def _is_rate_limited(self, client_ip: str) -> bool:
-        """Check if client is rate limited"""
-        now = time.time()
-        
-        if client_ip not in self.clients:
-            self.clients[client_ip] = []
-        
-        # Clean old requests
-        self.clients[client_ip] = [
-            req_time for req_time in self.clients[client_ip]
-            if now - req_time < self.period
-        ]
-        
-        if len(self.clients[client_ip]) >= self.calls:
-            return True
-        
-        self.clients[client_ip].append(now)
-        return False
+        """Check if client is rate limited (counts as a request)"""
+        return not self.backend.hit(f"ip:{client_ip}", self.calls, self.period).allowed
@@ -0,0 +1,145 @@
+"""
+GCRA rate limiting for Menurithm APIs
+Each key (client IP, user id, ...) is limited to `limit` requests per `period`
+seconds, with bursts of up to `limit`. The Generic Cell Rate Algorithm keeps a
+single float per key, its theoretical arrival time (TAT), so checking a request
+is O(1) in time and memory however high the limit is. A key whose TAT has
+passed is indistinguishable from a new one and is evicted.
+Backends: "memory" (per process) and "sqlite" (a file shared by every worker
+on the host, so several uvicorn workers enforce one limit).
+"""
+
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# "memory" or "sqlite"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+
+# SQLite file shared by workers when RATE_LIMIT_BACKEND=sqlite
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "rate_limits.sqlite3")
+
+# Keys held by the memory backend before the least recently used are dropped
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+# The SQLite backend purges expired keys once every this many checks
+RATE_LIMIT_PURGE_EVERY = int(os.getenv("RATE_LIMIT_PURGE_EVERY", "1000"))
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int        # requests still allowed right now
+    retry_after: float    # seconds until the next request is allowed; 0 when allowed
+
+def gcra(tat: Optional[float], now: float, limit: int, period: float) -> Tuple[Optional[float], RateLimitResult]:
+    """One GCRA step.
+
+    Returns the key's new TAT (None when the request is refused and the stored
+    TAT stays as is) and the result.
+    """
+    interval = period / limit
+    new_tat = max(tat or now, now) + interval
+    # Up to `limit` requests may be outstanding, i.e. the TAT may run `period` ahead
+    allow_at = new_tat - period
+    if allow_at > now:
+        return None, RateLimitResult(False, 0, allow_at - now)
+    remaining = int(math.floor((now - allow_at) / interval + 1e-9))
+    return new_tat, RateLimitResult(True, remaining, 0.0)
+
+class MemoryRateLimitBackend:
+    """Per-process TATs in an OrderedDict, least recently updated first"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._tats: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, period: float, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        with self._lock:
+            new_tat, result = gcra(self._tats.get(key), now, limit, period)
+            if new_tat is not None:
+                self._tats[key] = new_tat
+                self._tats.move_to_end(key)
+            self._evict(now)
+        return result
+
+    def _evict(self, now: float):
+        # Idle keys gather at the front; dropping them costs O(1) per request amortized
+        tats = self._tats
+        while tats:
+            key, tat = next(iter(tats.items()))
+            if tat > now and len(tats) <= self.max_keys:
+                break
+            del tats[key]
+
+    def __len__(self) -> int:
+        return len(self._tats)
+
+class SQLiteRateLimitBackend:
+    """TATs in a SQLite table, updated under BEGIN IMMEDIATE so workers on one host share limits"""
+
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH, purge_every: int = RATE_LIMIT_PURGE_EVERY):
+        self.path = path
+        self.purge_every = purge_every
+        self._checks = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=5)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, tat REAL NOT NULL)")
+
+    def hit(self, key: str, limit: int, period: float, now: Optional[float] = None) -> RateLimitResult:
+        now = time.time() if now is None else now
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                row = db.execute("SELECT tat FROM rate_limits WHERE key = ?", (key,)).fetchone()
+                new_tat, result = gcra(row[0] if row else None, now, limit, period)
+                if new_tat is not None:
+                    db.execute(
+                        "INSERT INTO rate_limits (key, tat) VALUES (?, ?)"
+                        " ON CONFLICT(key) DO UPDATE SET tat = excluded.tat",
+                        (key, new_tat)
+                    )
+                self._checks += 1
+                if self._checks % self.purge_every == 0:
+                    db.execute("DELETE FROM rate_limits WHERE tat <= ?", (now,))
+                db.execute("COMMIT")
+            except Exception:
+                db.execute("ROLLBACK")
+                raise
+        return result
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM rate_limits").fetchone()[0]
+
+def create_backend(kind: str = RATE_LIMIT_BACKEND):
+    """Backend named by kind; falls back to memory when the SQLite file can't be opened."""
+    if kind == "sqlite":
+        try:
+            return SQLiteRateLimitBackend()
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limits are per process, cannot open {RATE_LIMIT_SQLITE_PATH}: {e}")
+    elif kind != "memory":
+        logger.warning(f"Unknown RATE_LIMIT_BACKEND {kind!r}, using memory")
+    return MemoryRateLimitBackend()
+
+_default_backend = None
+_default_lock = threading.Lock()
+
+def default_backend():
+    """Process-wide backend shared by the middleware and the auth dependencies"""
+    global _default_backend
+    with _default_lock:
+        if _default_backend is None:
+            _default_backend = create_backend()
+        return _default_backend
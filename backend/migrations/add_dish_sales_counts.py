@@ -0,0 +1,44 @@
+"""
+Add materialized per-user dish sales counts
+
+Revision ID: add_dish_sales_counts
+Revises: add_user_security_fields
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_dish_sales_counts'
+down_revision = 'add_user_security_fields'
+depends_on = None
+
+def upgrade():
+    """Create dish_sales_counts and backfill it from existing sales"""
+    
+    op.create_table('dish_sales_counts',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('dish_id', sa.Integer(), nullable=False),
+        sa.Column('sales_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.ForeignKeyConstraint(['dish_id'], ['dishes.id']),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('user_id', 'dish_id', name='uq_user_dish_sales_count')
+    )
+    op.create_index('ix_dish_sales_counts_id', 'dish_sales_counts', ['id'])
+    
+    # Backfill from the full sales history once; request paths keep it current afterwards
+    op.execute("""
+        INSERT INTO dish_sales_counts (user_id, dish_id, sales_count)
+        SELECT user_id, dish_id, COUNT(id)
+        FROM sales
+        WHERE dish_id IS NOT NULL
+        GROUP BY user_id, dish_id
+    """)
+
+def downgrade():
+    """Drop dish_sales_counts"""
+    
+    op.drop_index('ix_dish_sales_counts_id', 'dish_sales_counts')
+    op.drop_table('dish_sales_counts')
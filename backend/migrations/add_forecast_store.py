@@ -0,0 +1,36 @@
+"""
+Key stored demand forecasts by dish sales version
+
+Revision ID: add_forecast_store
+Revises: add_sales_user_timestamp_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_forecast_store'
+down_revision = 'add_sales_user_timestamp_index'
+depends_on = None
+
+def upgrade():
+    """Add dish sales versions and version-keyed forecasts"""
+    
+    # Bumped on every sales write for the dish
+    op.add_column('dish_sales_counts', sa.Column('version', sa.Integer(), nullable=False, server_default='1'))
+    
+    # Existing forecasts predate versioning and are never served; clear them
+    op.execute("DELETE FROM demand_forecasts")
+    op.add_column('demand_forecasts', sa.Column('data_version', sa.Integer(), nullable=True))
+    op.create_unique_constraint(
+        'uq_demand_forecast_key', 'demand_forecasts',
+        ['user_id', 'item_name', 'forecast_period', 'data_version']
+    )
+
+def downgrade():
+    """Remove forecast versioning"""
+    
+    op.drop_constraint('uq_demand_forecast_key', 'demand_forecasts', type_='unique')
+    op.drop_column('demand_forecasts', 'data_version')
+    op.drop_column('dish_sales_counts', 'version')
@@ -0,0 +1,41 @@
+"""
+Index the hot per-user, recipe and stock-movement lookups
+
+Revision ID: add_hot_path_indexes
+Revises: add_optimization_jobs
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_hot_path_indexes'
+down_revision = 'add_optimization_jobs'
+depends_on = None
+
+# sales (user_id, timestamp) is ix_sales_user_timestamp (add_sales_user_timestamp_index), and
+# per-user inventory and dish reads use the leading user_id of uq_user_ingredient_name / uq_user_dish_name
+
+def upgrade():
+    """Functional lower(name) indexes, recipe line foreign keys and stock movement history"""
+
+    # Case-insensitive ingredient and dish name lookups
+    op.create_index('ix_inventory_user_lower_name', 'inventory', ['user_id', sa.text('lower(ingredient_name)')])
+    op.create_index('ix_dishes_user_lower_name', 'dishes', ['user_id', sa.text('lower(name)')])
+
+    # Recipe loads join on dish_id; the ingredient delete guard counts by ingredient_id
+    op.create_index('ix_dish_ingredients_dish_id', 'dish_ingredients', ['dish_id'])
+    op.create_index('ix_dish_ingredients_ingredient_id', 'dish_ingredients', ['ingredient_id'])
+
+    # /inventory/stock-movements/{item_id}, newest first
+    op.create_index('ix_stock_movements_item_timestamp', 'stock_movements', ['inventory_item_id', 'timestamp'])
+
+def downgrade():
+    """Drop the hot path indexes"""
+
+    op.drop_index('ix_stock_movements_item_timestamp', 'stock_movements')
+    op.drop_index('ix_dish_ingredients_ingredient_id', 'dish_ingredients')
+    op.drop_index('ix_dish_ingredients_dish_id', 'dish_ingredients')
+    op.drop_index('ix_dishes_user_lower_name', 'dishes')
+    op.drop_index('ix_inventory_user_lower_name', 'inventory')
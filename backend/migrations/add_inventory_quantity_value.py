@@ -0,0 +1,123 @@
+"""
+Numeric inventory quantities, parsed once on write
+
+Revision ID: add_inventory_quantity_value
+Revises: add_hot_path_indexes
+Create Date: 2026-10-17
+"""
+
+import math
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_inventory_quantity_value'
+down_revision = 'add_hot_path_indexes'
+depends_on = None
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Snapshot of app.services.units at this revision, so the backfill does not
+# change when the live parser does: unit spelling -> (base unit, factor)
+UNIT_FACTORS = {}
+for base_unit, factor, spellings in [
+    ("g", 1.0, ("g", "gr", "gram", "grams", "gramme", "grammes")),
+    ("g", 1000.0, ("kg", "kgs", "kilo", "kilos", "kilogram", "kilograms")),
+    ("g", 0.001, ("mg", "milligram", "milligrams")),
+    ("g", 453.59237, ("lb", "lbs", "pound", "pounds")),
+    ("g", 28.349523125, ("oz", "ounce", "ounces")),
+    ("ml", 1.0, ("ml", "milliliter", "milliliters", "millilitre", "millilitres")),
+    ("ml", 10.0, ("cl", "centiliter", "centiliters", "centilitre", "centilitres")),
+    ("ml", 100.0, ("dl", "deciliter", "deciliters", "decilitre", "decilitres")),
+    ("ml", 1000.0, ("l", "lt", "ltr", "liter", "liters", "litre", "litres")),
+    ("ml", 4.92892159375, ("tsp", "teaspoon", "teaspoons")),
+    ("ml", 14.78676478125, ("tbsp", "tablespoon", "tablespoons")),
+    ("ml", 29.5735295625, ("fl oz", "floz", "fluid ounce", "fluid ounces")),
+    ("ml", 236.5882365, ("cup", "cups")),
+    ("ml", 3785.411784, ("gal", "gallon", "gallons")),
+    ("each", 1.0, ("", "each", "ea", "pc", "pcs", "piece", "pieces", "unit", "units", "count", "item", "items")),
+    ("each", 12.0, ("dozen", "doz")),
+]:
+    for spelling in spellings:
+        UNIT_FACTORS[spelling] = (base_unit, factor)
+
+LEADING_NUMBER = re.compile(r"""
+    ^\s*(?P<sign>[-+]?)(?:
+        (?P<comma_groups>\d{1,3}(?:,\d{3})+)(?P<point_fraction>\.\d+)?
+      | (?P<dot_groups>\d{1,3}(?:\.\d{3})+),(?P<comma_fraction>\d+)
+      | (?P<digits>\d+)(?:[.,](?P<fraction>\d+))?
+    )(?![.,]?\d)
+""", re.VERBOSE)
+
+def parse_quantity(text):
+    """Leading number of a quantity; "1,500" is 1500, "1,5" is 1.5, nan/inf are None"""
+    if text is None:
+        return None
+    try:
+        value = float(text)
+    except ValueError:
+        match = LEADING_NUMBER.match(text)
+        if not match:
+            return None
+        if match["comma_groups"]:
+            number = match["comma_groups"].replace(",", "") + (match["point_fraction"] or "")
+        elif match["dot_groups"]:
+            number = match["dot_groups"].replace(".", "") + "." + match["comma_fraction"]
+        else:
+            number = match["digits"] + ("." + match["fraction"] if match["fraction"] else "")
+        value = float(match["sign"] + number)
+    return value if math.isfinite(value) else None
+
+def quantity_fields(quantity, unit):
+    value = parse_quantity(quantity)
+    key = " ".join((unit or "").strip().lower().split())
+    base_unit, factor = UNIT_FACTORS.get(key, (key, 1.0))
+    return {
+        "quantity_value": value,
+        "base_quantity": value * factor if value is not None else None,
+        "base_unit": base_unit
+    }
+
+def upgrade():
+    """Add quantity_value / base_quantity / base_unit and backfill them from the text quantity"""
+
+    op.add_column('inventory', sa.Column('quantity_value', sa.Float(), nullable=True))
+    op.add_column('inventory', sa.Column('base_quantity', sa.Float(), nullable=True))
+    op.add_column('inventory', sa.Column('base_unit', sa.String(), nullable=True))
+    op.create_index('ix_inventory_user_quantity_value', 'inventory', ['user_id', 'quantity_value'])
+
+    conn = op.get_bind()
+    inventory = sa.table(
+        'inventory',
+        sa.column('id', sa.Integer),
+        sa.column('quantity', sa.String),
+        sa.column('unit', sa.String),
+        sa.column('quantity_value', sa.Float),
+        sa.column('base_quantity', sa.Float),
+        sa.column('base_unit', sa.String),
+    )
+    update = (
+        sa.update(inventory)
+        .where(inventory.c.id == sa.bindparam('row_id'))
+        .values(
+            quantity_value=sa.bindparam('quantity_value'),
+            base_quantity=sa.bindparam('base_quantity'),
+            base_unit=sa.bindparam('base_unit'),
+        )
+    )
+    rows = conn.execute(sa.select(inventory.c.id, inventory.c.quantity, inventory.c.unit)).all()
+    for start in range(0, len(rows), BACKFILL_BATCH_SIZE):
+        conn.execute(update, [
+            {"row_id": row_id, **quantity_fields(quantity, unit)}
+            for row_id, quantity, unit in rows[start:start + BACKFILL_BATCH_SIZE]
+        ])
+
+def downgrade():
+    """Drop the numeric quantity columns"""
+
+    op.drop_index('ix_inventory_user_quantity_value', 'inventory')
+    op.drop_column('inventory', 'base_unit')
+    op.drop_column('inventory', 'base_quantity')
+    op.drop_column('inventory', 'quantity_value')
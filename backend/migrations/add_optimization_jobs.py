@@ -0,0 +1,53 @@
+"""
+Persistent queue for background optimization jobs
+
+Revision ID: add_optimization_jobs
+Revises: add_sales_analytics_sale_index
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers
+revision = 'add_optimization_jobs'
+down_revision = 'add_sales_analytics_sale_index'
+depends_on = None
+
+def upgrade():
+    """Create the optimization_jobs table polled by scripts/run_job_worker.py, and the
+    dish_sales_counts.updated_at change marker the scheduler reads"""
+    
+    op.create_table(
+        'optimization_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('kind', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('reason', sa.String(), nullable=True),
+        # Set only while pending; unique, so a tenant has one pending job per kind
+        sa.Column('dedupe_key', sa.String(), nullable=True, unique=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('worker', sa.String(), nullable=True),
+        sa.Column('result', sa.Text(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('finished_at', sa.DateTime(), nullable=True),
+    )
+    op.create_index('ix_optimization_jobs_id', 'optimization_jobs', ['id'])
+    op.create_index('ix_optimization_jobs_user_id', 'optimization_jobs', ['user_id'])
+    op.create_index('ix_optimization_jobs_status_created', 'optimization_jobs', ['status', 'created_at'])
+    
+    # Touched on every sales write; existing rows count as changed now, so every
+    # tenant gets one scheduled refresh
+    op.add_column('dish_sales_counts', sa.Column('updated_at', sa.DateTime(), nullable=True,
+                                                 server_default=sa.func.current_timestamp()))
+    op.create_index('ix_dish_sales_counts_user_updated', 'dish_sales_counts', ['user_id', 'updated_at'])
+
+def downgrade():
+    """Drop the job queue and the change marker"""
+    
+    op.drop_index('ix_dish_sales_counts_user_updated', 'dish_sales_counts')
+    op.drop_column('dish_sales_counts', 'updated_at')
+    op.drop_table('optimization_jobs')
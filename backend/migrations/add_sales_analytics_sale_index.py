@@ -0,0 +1,26 @@
+"""
+Index SalesAnalytics feature rows by sale
+
+Revision ID: add_sales_analytics_sale_index
+Revises: add_forecast_store
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = 'add_sales_analytics_sale_index'
+down_revision = 'add_forecast_store'
+depends_on = None
+
+def upgrade():
+    """One feature row per sale, looked up by sale when reading analytics and deleting sales"""
+    
+    op.create_index('ix_sales_analytics_sale_id', 'sales_analytics', ['sale_id'], unique=True)
+    
+    # Populate existing history with: python scripts/backfill_sales_analytics.py
+
+def downgrade():
+    """Drop the sale index"""
+    
+    op.drop_index('ix_sales_analytics_sale_id', 'sales_analytics')
@@ -0,0 +1,24 @@
+"""
+Add composite (user_id, timestamp) index on sales
+
+Revision ID: add_sales_user_timestamp_index
+Revises: add_dish_sales_counts
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# revision identifiers
+revision = 'add_sales_user_timestamp_index'
+down_revision = 'add_dish_sales_counts'
+depends_on = None
+
+def upgrade():
+    """Index sales by user and time for paginated listings and date-range filters"""
+    
+    op.create_index('ix_sales_user_timestamp', 'sales', ['user_id', 'timestamp'])
+
+def downgrade():
+    """Drop the sales (user_id, timestamp) index"""
+    
+    op.drop_index('ix_sales_user_timestamp', 'sales')
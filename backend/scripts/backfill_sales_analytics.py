@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Backfill SalesAnalytics feature rows for sales recorded before the ingest-time
+feature pipeline existed. Safe to re-run: only sales without a row are touched.
+
+Usage (from the backend root, with DATABASE_URL set):
+    python scripts/backfill_sales_analytics.py
+    python scripts/backfill_sales_analytics.py --user chef@restaurant.com --batch-size 10000
+"""
+
+import argparse
+import os
+import sys
+
+# Make `app` importable when run from the backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from app.db.database import Base, SessionLocal, engine
+from app.services.sales_features import BACKFILL_BATCH_SIZE, backfill_sale_features
+import app.models  # noqa: F401  (registers every table for create_all)
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill SalesAnalytics feature rows")
+    parser.add_argument("--user", help="Only backfill this user's sales (email)")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        written = backfill_sale_features(db, user_id=args.user, batch_size=args.batch_size)
+    finally:
+        db.close()
+
+    print(f"✅ Backfilled features for {written} sales")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark event-loop responsiveness with and without the analytics process pool.
+Runs several large-tenant forecasts concurrently with a stream of light
+requests on one event loop, and reports light-request latency and the time to
+finish the heavy work, first inline and then offloaded.
+
+Usage (from the backend root):
+    python scripts/benchmark_compute_pool.py
+    python scripts/benchmark_compute_pool.py --heavy 8 --dishes 3000 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+# Make `app` importable and give database.py a throwaway URL before it loads
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+from app.services.compute_pool import ComputePool
+from app.services.forecasting import forecast_arrays
+
+HISTORY_DAYS = 90
+
+def tenant_args(dishes: int, seed: int):
+    """forecast_arrays inputs for one large tenant: ~20 sales per dish over the history window"""
+    rng = np.random.default_rng(seed)
+    rows = dishes * 20
+    return (
+        rng.integers(0, dishes, rows), rng.integers(0, HISTORY_DAYS, rows), rng.integers(1, 6, rows).astype(float),
+        dishes, HISTORY_DAYS, 7, 0
+    )
+
+async def light_requests(stop: asyncio.Event, interval: float, latencies: list):
+    """A request every interval seconds; latency is how late the loop got to it"""
+    while not stop.is_set():
+        scheduled = time.perf_counter()
+        await asyncio.sleep(interval)
+        latencies.append((time.perf_counter() - scheduled - interval) * 1000)
+
+async def scenario(pool: ComputePool, heavy: int, dishes: int, offload: bool):
+    stop = asyncio.Event()
+    latencies = []
+    pinger = asyncio.create_task(light_requests(stop, 0.005, latencies))
+
+    async def heavy_request(seed: int):
+        args = tenant_args(dishes, seed)
+        if offload:
+            return await pool.run(forecast_arrays, *args, cells=dishes * HISTORY_DAYS)
+        # What an async route does without offloading: compute on the loop
+        await asyncio.sleep(0)
+        return forecast_arrays(*args)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(heavy_request(seed) for seed in range(heavy)))
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await pinger
+    return elapsed, np.array(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics offloading")
+    parser.add_argument("--heavy", type=int, default=4, help="Concurrent large-tenant forecasts")
+    parser.add_argument("--dishes", type=int, default=2000, help="Dishes per tenant")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+
+    pool = ComputePool(max_workers=args.workers, min_cells=0)
+    # Start the workers before timing
+    asyncio.run(pool.run(forecast_arrays, *tenant_args(10, 0), cells=1))
+
+    print(f"{args.heavy} concurrent forecasts of {args.dishes} dishes x {HISTORY_DAYS} days, {args.workers} workers")
+    print(f"{'mode':>8} | {'heavy s':>8} | {'light p50 ms':>12} {'p95 ms':>8} {'max ms':>8}")
+    print("-" * 56)
+    for offload in (False, True):
+        elapsed, latencies = asyncio.run(scenario(pool, args.heavy, args.dishes, offload))
+        mode = "offload" if offload else "inline"
+        print(f"{mode:>8} | {elapsed:>8.2f} | {np.percentile(latencies, 50):>12.1f} "
+              f"{np.percentile(latencies, 95):>8.1f} {latencies.max():>8.1f}")
+
+    print(f"pool stats: {pool.stats()}")
+    pool.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Benchmark the smart menu engines against a synthetic tenant.
+Compares query count and latency of generate_menu_smart (ORM lazy loads)
+and generate_menu_vectorized (bulk queries + NumPy) as dish count grows.
+
+Usage (from the backend root):
+    python scripts/benchmark_menu_engine.py
+    python scripts/benchmark_menu_engine.py --dishes 50 100 400 --ingredients 900
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date
+
+# Make `app` importable and give database.py a throwaway URL before it loads
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import logging
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.models import Dish, DishIngredient, InventoryItem, Sale
+from app.services.menu_engine import generate_menu_smart, generate_menu_vectorized
+from app.services.sales_counts import rebuild_sales_counts
+from app.services.units import quantity_fields
+
+USER_EMAIL = "bench@menurithm.com"
+
+def seed(session, dish_count: int, ingredient_count: int, lines_per_dish: int = 8):
+    """Populate an empty database with one tenant's inventory, recipes and sales."""
+    rng = random.Random(42)
+
+    session.bulk_insert_mappings(InventoryItem, [
+        {
+            "id": i + 1,
+            "user_id": USER_EMAIL,
+            "ingredient_name": f"ingredient_{i}",
+            "quantity": quantity,
+            "unit": "g",
+            **quantity_fields(quantity, "g"),
+            "category": "bench",
+            "expiry_date": date(2030, 1, 1),
+            "storage_location": "pantry",
+        }
+        for i, quantity in ((i, str(rng.randint(0, 500))) for i in range(ingredient_count))
+    ])
+    session.bulk_insert_mappings(Dish, [
+        {"id": d + 1, "user_id": USER_EMAIL, "name": f"dish_{d}", "description": None}
+        for d in range(dish_count)
+    ])
+    session.bulk_insert_mappings(DishIngredient, [
+        {
+            "user_id": USER_EMAIL,
+            "dish_id": d + 1,
+            "ingredient_id": ingredient_id,
+            "quantity": rng.uniform(1, 20),
+            "unit": "g",
+        }
+        for d in range(dish_count)
+        for ingredient_id in rng.sample(range(1, ingredient_count + 1), min(lines_per_dish, ingredient_count))
+    ])
+    session.bulk_insert_mappings(Sale, [
+        {
+            "user_id": USER_EMAIL,
+            "dish_id": rng.randint(1, dish_count),
+            "timestamp": date(2025, 1, 1),
+            "quantity_sold": 1,
+            "price_per_unit": 10.0,
+        }
+        for _ in range(dish_count * 5)
+    ])
+    session.commit()
+    rebuild_sales_counts(session, USER_EMAIL)
+
+def measure(engine, session_factory, func, repeat: int):
+    """Return (queries per call, best wall time in ms, result) for one engine."""
+    statements = []
+
+    def count(*args, **kwargs):
+        statements.append(1)
+
+    event.listen(engine, "before_cursor_execute", count)
+    try:
+        best = float("inf")
+        result = None
+        for _ in range(repeat):
+            statements.clear()
+            session = session_factory()
+            try:
+                start = time.perf_counter()
+                result = func(session, USER_EMAIL)
+                best = min(best, time.perf_counter() - start)
+            finally:
+                session.close()
+        return len(statements), best * 1000, result
+    finally:
+        event.remove(engine, "before_cursor_execute", count)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark smart menu generation")
+    parser.add_argument("--dishes", type=int, nargs="+", default=[25, 50, 100, 200, 400])
+    parser.add_argument("--ingredients", type=int, default=900)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.getLogger("app.services").setLevel(logging.ERROR)
+
+    print(f"{'dishes':>7} | {'smart queries':>13} {'smart ms':>9} | {'vector queries':>14} {'vector ms':>9} | {'speedup':>7}")
+    print("-" * 74)
+    for dish_count in args.dishes:
+        engine = create_engine("sqlite://")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+        session = session_factory()
+        seed(session, dish_count, args.ingredients)
+        session.close()
+
+        smart_q, smart_ms, smart_menu = measure(engine, session_factory, generate_menu_smart, args.repeat)
+        vec_q, vec_ms, vec_menu = measure(engine, session_factory, generate_menu_vectorized, args.repeat)
+
+        if smart_menu != vec_menu:
+            print(f"⚠️ Menus differ for {dish_count} dishes")
+
+        print(f"{dish_count:>7} | {smart_q:>13} {smart_ms:>9.1f} | {vec_q:>14} {vec_ms:>9.1f} | {smart_ms / vec_ms:>6.1f}x")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the rate limiter backends against the old timestamp-list limiter.
+Sends requests from a pool of clients at a high per-client limit and reports
+time per check and the state left behind per client.
+
+Usage (from the backend root):
+    python scripts/benchmark_rate_limit.py
+    python scripts/benchmark_rate_limit.py --clients 5000 --requests 500000 --limit 1000
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+# Make `app` importable and give database.py a throwaway URL before it loads
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from app.utils.rate_limit import MemoryRateLimitBackend, SQLiteRateLimitBackend
+
+PERIOD = 60
+
+class TimestampListLimiter:
+    """The previous middleware limiter: a list of request times per client, rebuilt on every check"""
+
+    def __init__(self):
+        self.clients = {}
+
+    def hit(self, key: str, limit: int, period: float, now: float) -> bool:
+        times = [t for t in self.clients.get(key, []) if now - t < period]
+        self.clients[key] = times
+        if len(times) >= limit:
+            return False
+        times.append(now)
+        return True
+
+    def state_size(self) -> int:
+        return sum(len(times) for times in self.clients.values())
+
+def run(name: str, hit, keys, limit: int, state_size):
+    started = time.perf_counter()
+    now = time.time()
+    for i, key in enumerate(keys):
+        # Requests spread evenly over one period
+        hit(key, limit, PERIOD, now + i * PERIOD / len(keys))
+    elapsed = time.perf_counter() - started
+    print(f"{name:>14} | {elapsed * 1e6 / len(keys):>10.2f} | {len(keys) / elapsed:>12,.0f} | {state_size():>14,}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rate limiter backends")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=200000)
+    parser.add_argument("--limit", type=int, default=1000, help="Requests per client per period")
+    parser.add_argument("--sqlite-requests", type=int, default=20000, help="Requests sent to the SQLite backend")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    keys = [f"ip:10.0.{i // 256}.{i % 256}" for i in (rng.randrange(args.clients) for _ in range(args.requests))]
+
+    print(f"{args.requests:,} requests from {args.clients:,} clients, limit {args.limit}/{PERIOD}s")
+    print(f"{'limiter':>14} | {'us/check':>10} | {'checks/s':>12} | {'stored values':>14}")
+    print("-" * 62)
+
+    legacy = TimestampListLimiter()
+    run("timestamp list", legacy.hit, keys, args.limit, legacy.state_size)
+
+    memory = MemoryRateLimitBackend()
+    run("gcra memory", memory.hit, keys, args.limit, memory.__len__)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite = SQLiteRateLimitBackend(os.path.join(tmp, "rate_limits.sqlite3"))
+        run("gcra sqlite", sqlite.hit, keys[:args.sqlite_requests], args.limit, sqlite.__len__)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sales analytics summary.
+Two measurements, each against the previous path (load every sale in range,
+then a per-row pandas summary with strftime dates and ISO weeks re-parsed with
+strptime):
+- summarize_sales on in-memory sale columns shaped like load_sales_frame
+  output, against the 1M-sales-under-a-second target
+- rollup_sales, which groups in SQL on the SalesAnalytics features, on SQLite
+Half of the synthetic sales carry feature rows, as after a partial backfill.
+
+Usage (from the backend root):
+    python scripts/benchmark_sales_aggregation.py
+    python scripts/benchmark_sales_aggregation.py --frame-sales 1000000 --sales 100000 --skip-legacy
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+# Make `app` importable and give database.py a throwaway URL before it loads
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from app.db.database import Base
+from app.models import Dish, Sale, SalesAnalytics
+from app.services.sales_aggregation import DAY_NAMES, SALES_COLUMNS, rollup_sales, summarize_sales
+from app.services.sales_features import sale_features
+
+USER_EMAIL = "bench@menurithm.com"
+DISHES = 200
+START = datetime(2025, 1, 1)
+END = datetime(2025, 4, 1)
+
+# summarize_sales target for 1M sales
+TARGET_SECONDS = 1.0
+
+def synthetic_frame(sales: int, seed: int = 42) -> pd.DataFrame:
+    """In-memory sales over 90 days shaped like load_sales_frame output."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp(START) + pd.to_timedelta(rng.integers(0, 90 * 86400, sales), unit="s")
+    has_features = rng.random(sales) < 0.5
+    return pd.DataFrame({
+        "timestamp": timestamps,
+        "dish_id": rng.integers(1, DISHES + 1, sales),
+        "quantity_sold": rng.integers(1, 6, sales),
+        "price_per_unit": rng.uniform(5, 30, sales).round(2),
+        "day_of_week": np.where(has_features, timestamps.dayofweek + 1, np.nan),
+        "hour": np.where(has_features, timestamps.hour, np.nan),
+    })[SALES_COLUMNS]
+
+def legacy_frame_summary(frame: pd.DataFrame, dish_names) -> dict:
+    """The previous per-row summary over the same columns."""
+    timestamps = pd.to_datetime(frame["timestamp"])
+    df = pd.DataFrame({
+        "date": timestamps.dt.strftime("%Y-%m-%d"),
+        "dish_name": frame["dish_id"].map(dish_names),
+        "quantity_sold": frame["quantity_sold"],
+        "total_revenue": frame["quantity_sold"] * frame["price_per_unit"],
+    })
+    return {
+        "total_sales": len(frame),
+        "total_revenue": df["total_revenue"].sum(),
+        "top_dishes": df.groupby("dish_name")["quantity_sold"].sum().nlargest(10).to_dict(),
+        "weekly_trends": df.groupby(df["date"].apply(
+            lambda x: datetime.strptime(x, "%Y-%m-%d").isocalendar()[1]
+        ))["quantity_sold"].sum().to_dict(),
+    }
+
+def seed(session, sales: int, seed: int = 42):
+    """Sales spread over 90 days; half of them get SalesAnalytics feature rows."""
+    rng = np.random.default_rng(seed)
+    timestamps = pd.Timestamp(START) + pd.to_timedelta(rng.integers(0, 90 * 86400, sales), unit="s")
+    dish_ids = rng.integers(1, DISHES + 1, sales)
+    session.execute(insert(Dish), [{"id": d, "user_id": USER_EMAIL, "name": f"dish_{d}"} for d in range(1, DISHES + 1)])
+    session.execute(insert(Sale), [
+        {"id": i + 1, "user_id": USER_EMAIL, "timestamp": ts, "dish_id": int(dish), "quantity_sold": int(qty), "price_per_unit": float(price)}
+        for i, (ts, dish, qty, price) in enumerate(zip(
+            timestamps.to_pydatetime(), dish_ids, rng.integers(1, 6, sales), rng.uniform(5, 30, sales).round(2)
+        ))
+    ])
+    has_features = np.flatnonzero(rng.random(sales) < 0.5)
+    session.execute(insert(SalesAnalytics), [
+        sale_features(USER_EMAIL, int(i) + 1, int(dish_ids[i]), timestamps[i].to_pydatetime()) for i in has_features
+    ])
+    session.commit()
+
+def legacy_summary(session) -> dict:
+    """The summary as DemandPredictionService._prepare_sales_data used to build it."""
+    rows = session.query(Sale.timestamp, Dish.name, Sale.quantity_sold, Sale.price_per_unit).outerjoin(
+        Dish, Dish.id == Sale.dish_id
+    ).filter(Sale.user_id == USER_EMAIL, Sale.timestamp >= START, Sale.timestamp <= END).all()
+    df = pd.DataFrame([
+        {
+            "date": timestamp.strftime("%Y-%m-%d"),
+            "day_of_week": DAY_NAMES[timestamp.weekday()],
+            "dish_name": name,
+            "quantity_sold": quantity,
+            "total_revenue": quantity * price,
+            "hour": timestamp.hour,
+        }
+        for timestamp, name, quantity, price in rows
+    ])
+    return {
+        "total_sales": len(df),
+        "total_revenue": df["total_revenue"].sum(),
+        "avg_daily_sales": df.groupby("date")["quantity_sold"].sum().mean(),
+        "top_dishes": df.groupby("dish_name")["quantity_sold"].sum().nlargest(10).to_dict(),
+        "daily_patterns": df.groupby("day_of_week")["quantity_sold"].sum().to_dict(),
+        "hourly_patterns": df.groupby("hour")["quantity_sold"].sum().to_dict(),
+        "weekly_trends": df.groupby(df["date"].apply(
+            lambda x: datetime.strptime(x, "%Y-%m-%d").isocalendar()[1]
+        ))["quantity_sold"].sum().to_dict(),
+    }
+
+def best_time(func, repeat: int):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sales analytics summary")
+    parser.add_argument("--frame-sales", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--sales", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+
+    dish_names = {d: f"dish_{d}" for d in range(1, DISHES + 1)}
+    print("summarize_sales, in memory")
+    print(f"{'sales':>9} | {'legacy s':>9} | {'vector s':>9} | {'speedup':>7}")
+    print("-" * 45)
+    for sales in args.frame_sales:
+        frame = synthetic_frame(sales)
+        vector_s, summary = best_time(lambda: summarize_sales(frame, dish_names), args.repeat)
+        if args.skip_legacy:
+            print(f"{sales:>9} | {'-':>9} | {vector_s:>9.3f} | {'-':>7}")
+        else:
+            legacy_s, legacy = best_time(lambda: legacy_frame_summary(frame, dish_names), 1)
+            if legacy["total_sales"] != summary["total_sales"] or legacy["weekly_trends"] != summary["weekly_trends"]:
+                print(f"⚠️ Summaries differ for {sales} sales")
+            print(f"{sales:>9} | {legacy_s:>9.3f} | {vector_s:>9.3f} | {legacy_s / vector_s:>6.1f}x")
+        if sales >= 1_000_000 and vector_s > TARGET_SECONDS * sales / 1_000_000:
+            print(f"⚠️ {vector_s:.3f}s, over the {TARGET_SECONDS:.0f}s per 1M sales target")
+
+    print()
+    print("rollup_sales, SQLite")
+    print(f"{'sales':>9} | {'legacy s':>9} | {'rollup s':>9} | {'speedup':>7}")
+    print("-" * 45)
+    for sales in args.sales:
+        with tempfile.TemporaryDirectory() as directory:
+            engine = create_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+            Base.metadata.create_all(engine)
+            session = sessionmaker(bind=engine)()
+            seed(session, sales)
+
+            rollup_s, summary = best_time(lambda: rollup_sales(session, USER_EMAIL, START, END), args.repeat)
+            if args.skip_legacy:
+                print(f"{sales:>9} | {'-':>9} | {rollup_s:>9.3f} | {'-':>7}")
+            else:
+                legacy_s, legacy = best_time(lambda: legacy_summary(session), 1)
+                if legacy["total_sales"] != summary["total_sales"] or legacy["daily_patterns"] != summary["daily_patterns"]:
+                    print(f"⚠️ Summaries differ for {sales} sales")
+                print(f"{sales:>9} | {legacy_s:>9.3f} | {rollup_s:>9.3f} | {legacy_s / rollup_s:>6.1f}x")
+
+            session.close()
+            engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the /upload-sales bulk ingestion path end to end.
+Generates a synthetic POS export, posts it through the real route and reports
+rows/s and the number of SQL statements issued.
+
+Usage (from the backend root):
+    python scripts/benchmark_sales_upload.py
+    python scripts/benchmark_sales_upload.py --rows 50000 --database-url postgresql://localhost/menurithm_bench
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USER_EMAIL = "bench@menurithm.com"
+
+# Sustained ingest target for uploads of 10k rows and more
+TARGET_ROWS_PER_SECOND = 10_000
+
+def build_csv(row_count: int, dish_count: int) -> bytes:
+    """Build a sales CSV with a handful of unknown dishes mixed in."""
+    rng = random.Random(7)
+    start = date(2025, 1, 1)
+    lines = ["dish_name,date,quantity_sold,price_per_unit"]
+    for _ in range(row_count):
+        dish = f"dish_{rng.randint(0, dish_count)}"  # dish_{dish_count} does not exist
+        day = start + timedelta(days=rng.randint(0, 364))
+        lines.append(f"{dish},{day.isoformat()},{rng.randint(1, 5)},{rng.uniform(5, 30):.2f}")
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark bulk sales upload")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dishes", type=int, default=400)
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.TemporaryDirectory()
+    os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp_dir.name}/bench.db"
+
+    import logging
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from sqlalchemy import event
+    from app.db.database import Base, engine, SessionLocal
+    from app.models import Dish, Sale, SalesAnalytics, DishSalesCount, User
+    from app.routes import sales
+    from app.utils.auth import get_current_user
+
+    logging.disable(logging.WARNING)
+    sales.print = lambda *a, **k: None  # keep the route's progress prints out of the table
+
+    Base.metadata.create_all(bind=engine)
+    app = FastAPI()
+    app.include_router(sales.router)
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, firebase_uid="bench", email=USER_EMAIL)
+    client = TestClient(app)
+
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *a, **k: statements.append(1))
+
+    print(f"{'rows':>7} | {'statements':>10} | {'seconds':>8} | {'rows/s':>9}")
+    print("-" * 45)
+    for row_count in args.rows:
+        db = SessionLocal()
+        # Feature rows reference sales by id, and SQLite reuses the ids of deleted rows
+        db.query(SalesAnalytics).filter(SalesAnalytics.user_id == USER_EMAIL).delete()
+        db.query(DishSalesCount).filter(DishSalesCount.user_id == USER_EMAIL).delete()
+        db.query(Sale).filter(Sale.user_id == USER_EMAIL).delete()
+        db.query(Dish).filter(Dish.user_id == USER_EMAIL).delete()
+        db.bulk_insert_mappings(Dish, [
+            {"user_id": USER_EMAIL, "name": f"dish_{d}"} for d in range(args.dishes)
+        ])
+        db.commit()
+        db.close()
+
+        payload = build_csv(row_count, args.dishes)
+        statements.clear()
+        start = time.perf_counter()
+        response = client.post("/upload-sales", files={"file": ("sales.csv", payload, "text/csv")})
+        elapsed = time.perf_counter() - start
+
+        if response.status_code != 200:
+            print(f"❌ Upload failed: {response.status_code} {response.text[:200]}")
+            return
+        added = response.json()["summary"]["sales_added"]
+        print(f"{row_count:>7} | {len(statements):>10} | {elapsed:>8.2f} | {row_count / elapsed:>9.0f}  ({added} added)")
+        if row_count >= 10_000 and row_count / elapsed < TARGET_ROWS_PER_SECOND:
+            print(f"⚠️ {row_count / elapsed:.0f} rows/s, under the {TARGET_ROWS_PER_SECOND} rows/s target")
+
+    engine.dispose()
+    tmp_dir.cleanup()
+
+if __name__ == "__main__":
+    main()
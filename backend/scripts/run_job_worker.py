@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Run the background job worker: claims queued optimization jobs and runs them in
+a process pool, and queues scheduled refreshes for tenants whose data changed.
+Run it as its own service next to the API.
+
+Usage (from the backend root, with DATABASE_URL set):
+    python scripts/run_job_worker.py
+    python scripts/run_job_worker.py --workers 4 --schedule-interval 3600
+"""
+
+import argparse
+import os
+import sys
+
+# Make `app` importable when run from the backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import logging
+from app.db.database import Base, engine
+from app.services.job_worker import JOB_POLL_INTERVAL, JOB_SCHEDULE_INTERVAL, JOB_WORKERS, JobWorkerPool
+import app.models  # noqa: F401  (registers every table for create_all)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the background job worker")
+    parser.add_argument("--workers", type=int, default=JOB_WORKERS, help="Jobs running at once")
+    parser.add_argument("--poll-interval", type=float, default=JOB_POLL_INTERVAL, help="Seconds between queue polls")
+    parser.add_argument("--schedule-interval", type=float, default=JOB_SCHEDULE_INTERVAL,
+                        help="Seconds after which every tenant is refreshed even without new data")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+    Base.metadata.create_all(bind=engine)
+    JobWorkerPool(args.workers, args.poll_interval, args.schedule_interval).run_forever()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# app.db.database refuses to import without a DATABASE_URL; tests build their own engines
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,94 @@
+"""
+Async database layer: driver URLs, pool options and the read endpoints served through AsyncSession.
+"""
+
+import asyncio
+from datetime import date, datetime
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db import database
+from app.db.database import Base, async_database_url, engine_options, get_async_analytics_db, get_async_db
+from app.models import Dish, DishIngredient, InventoryItem, Sale
+from app.routes import inventory, menu, sales
+from app.utils.auth import get_current_user
+
+USER_EMAIL = "chef@menurithm.com"
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@db:5432/menu", "postgresql+asyncpg://u:p@db:5432/menu"),
+    ("postgresql+psycopg2://u:p@db/menu?sslmode=require", "postgresql+asyncpg://u:p@db/menu?ssl=require"),
+    ("sqlite:///./menurithm.db", "sqlite+aiosqlite:///./menurithm.db"),
+])
+def test_async_database_url(url, expected):
+    assert async_database_url(url) == expected
+
+def test_pool_options_skip_sqlite(monkeypatch):
+    monkeypatch.setattr(database, "DB_POOL_SIZE", 20)
+    assert engine_options("sqlite:///x.db") == {}
+    options = engine_options("postgresql+asyncpg://u:p@db/menu")
+    assert options["pool_size"] == 20 and options["pool_pre_ping"] is True
+
+@pytest.fixture
+def client(tmp_path):
+    path = tmp_path / "menurithm.db"
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    seed(sessionmaker(bind=engine)())
+
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    for module in (inventory, menu, sales):
+        app.include_router(module.router)
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_analytics_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(email=USER_EMAIL)
+    yield TestClient(app)
+
+    asyncio.run(async_engine.dispose())
+    engine.dispose()
+
+def seed(session):
+    flour = InventoryItem(user_id=USER_EMAIL, ingredient_name="flour", quantity="10", unit="kg",
+                          category="dry", expiry_date=date(2030, 1, 1), storage_location="pantry")
+    session.add_all([flour, InventoryItem(user_id="other@menurithm.com", ingredient_name="salt", quantity="1", unit="kg",
+                                          category="dry", expiry_date=date(2030, 1, 1), storage_location="pantry")])
+    session.flush()
+    bread = Dish(user_id=USER_EMAIL, name="bread", description="loaf")
+    bread.ingredients = [DishIngredient(user_id=USER_EMAIL, ingredient_id=flour.id, quantity=0.5, unit="kg")]
+    session.add(bread)
+    session.flush()
+    session.add_all([
+        Sale(user_id=USER_EMAIL, dish_id=bread.id, timestamp=datetime(2025, 1, day), quantity_sold=day, price_per_unit=3.0)
+        for day in (1, 2, 3)
+    ])
+    session.commit()
+    session.close()
+
+def test_inventory(client):
+    items = client.get("/inventory").json()
+    assert [item["ingredient_name"] for item in items] == ["flour"]
+
+def test_sales_pages(client):
+    first = client.get("/sales", params={"limit": 2})
+    rest = client.get("/sales", params={"limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+
+    assert [sale["quantity_sold"] for sale in first.json() + rest.json()] == [1, 2, 3]
+    assert "X-Next-Cursor" not in rest.headers
+    assert client.get("/sales", params={"cursor": "garbage"}).status_code == 400
+
+def test_generate_menu(client):
+    dishes = client.get("/generate-menu-smart").json()["dishes"]
+    assert [(dish["name"], dish["servings"]) for dish in dishes] == [("bread", 20)]
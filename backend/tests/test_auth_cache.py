@@ -0,0 +1,123 @@
+"""
+Auth cache: verified tokens bounded by exp, user snapshots, invalidation on role changes.
+"""
+
+import asyncio
+import time
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models.user import User
+from app.routes import auth_examples
+from app.utils import auth_cache, auth_enhanced
+from app.utils.auth_enhanced import UserRole
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    session.statements = statements
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    auth_cache.token_cache.clear()
+    auth_cache.user_cache.clear()
+    yield
+    auth_cache.token_cache.clear()
+    auth_cache.user_cache.clear()
+
+@pytest.fixture
+def verifier(monkeypatch):
+    calls = []
+
+    def verify_id_token(token):
+        calls.append(token)
+        uid, _, ttl = token.partition(":")
+        return {"uid": uid, "email": f"{uid}@menurithm.com", "exp": time.time() + float(ttl or 3600)}
+
+    monkeypatch.setattr(auth_cache.firebase_auth, "verify_id_token", verify_id_token)
+    return calls
+
+def authenticate(session, token):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    claims = asyncio.run(auth_enhanced.verify_firebase_token(credentials))
+    return asyncio.run(auth_enhanced.get_current_user(claims, session))
+
+def test_repeat_calls_skip_verification_and_queries(session, verifier):
+    first = authenticate(session, "alice")
+    queries = len(session.statements)
+
+    for _ in range(5):
+        user = authenticate(session, "alice")
+
+    assert verifier == ["alice"]
+    assert len(session.statements) == queries
+    assert (user.id, user.email) == (first.id, first.email)
+    stats = auth_cache.auth_cache_stats()
+    assert stats["tokens"]["hits"] == 5 and stats["users"]["hits"] == 5
+
+def test_tokens_are_not_trusted_past_exp(verifier):
+    auth_cache.verify_token("bob:0.05")
+    time.sleep(0.1)
+    auth_cache.verify_token("bob:0.05")
+    assert verifier == ["bob:0.05", "bob:0.05"]
+
+def test_failed_verification_is_not_cached(monkeypatch):
+    def reject(token):
+        raise ValueError("bad signature")
+
+    monkeypatch.setattr(auth_cache.firebase_auth, "verify_id_token", reject)
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            auth_cache.verify_token("forged")
+    assert auth_cache.token_cache.stats()["entries"] == 0
+
+def test_lru_evicts_oldest():
+    cache = auth_cache.ExpiringLRU(max_entries=2)
+    expires = time.time() + 60
+    for key in ("a", "b"):
+        cache.put(key, key, expires)
+    cache.get("a")
+    cache.put("c", "c", expires)
+    assert cache.get("b") is None and cache.get("a") == "a"
+    assert cache.stats()["evictions"] == 1
+
+def test_role_change_invalidates_cached_user(session, verifier):
+    session.add(User(firebase_uid="boss", email="boss@menurithm.com", full_name="Boss", role=UserRole.ADMIN.value))
+    session.commit()
+    staff = authenticate(session, "carol")
+    assert staff.role == UserRole.USER.value
+    boss = authenticate(session, "boss")
+
+    asyncio.run(auth_examples.update_user_role(staff.id, UserRole.MANAGER, current_user=boss, db=session))
+
+    assert authenticate(session, "carol").role == UserRole.MANAGER.value
+    assert verifier.count("carol") == 2
+
+@pytest.mark.parametrize("role, status", [(UserRole.USER, 403), (UserRole.ADMIN, 200)])
+def test_cache_stats_are_admin_only(role, status):
+    from app.main import app
+
+    app.dependency_overrides[auth_enhanced.get_current_user] = lambda: User(email="ops@menurithm.com", role=role.value)
+    try:
+        client = TestClient(app)
+        assert "auth_cache" not in client.get("/health").json()
+        response = client.get("/admin/metrics")
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == status
+    if status == 200:
+        assert set(response.json()) == {"llm_cache", "compute_pool", "auth_cache"}
@@ -0,0 +1,49 @@
+"""
+Analytics process pool: offloaded results match inline ones, small work stays inline, counters add up.
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.compute_pool import ComputePool
+from app.services.forecasting import forecast_arrays
+
+def forecast_args(n_dishes=20, n_days=30, seed=5):
+    rng = np.random.default_rng(seed)
+    rows = 400
+    return (
+        rng.integers(0, n_dishes, rows), rng.integers(0, n_days, rows), rng.integers(1, 5, rows).astype(float),
+        n_dishes, n_days, 7, 2
+    )
+
+@pytest.fixture
+def pool():
+    pool = ComputePool(max_workers=1, min_cells=100)
+    yield pool
+    pool.shutdown()
+
+def test_offloaded_forecast_matches_inline(pool):
+    args = forecast_args()
+    payloads, units, days = asyncio.run(pool.run(forecast_arrays, *args, cells=600))
+
+    expected_payloads, expected_units, expected_days = forecast_arrays(*args)
+    assert payloads == expected_payloads
+    assert np.array_equal(units, expected_units) and np.array_equal(days, expected_days)
+
+    stats = pool.stats()
+    assert stats["submitted"] == stats["completed"] == 1
+    assert stats["in_flight"] == stats["queued"] == 0
+    assert stats["inline"] == 0
+
+def test_small_work_runs_inline(pool):
+    asyncio.run(pool.run(forecast_arrays, *forecast_args(n_dishes=2), cells=60))
+    assert pool.stats()["inline"] == 1
+    assert pool.stats()["submitted"] == 0
+
+def test_failures_are_counted(pool):
+    with pytest.raises(ZeroDivisionError):
+        asyncio.run(pool.run(divmod, 1, 0, cells=1000))
+    assert pool.stats()["failed"] == 1
+    assert pool.stats()["in_flight"] == 0
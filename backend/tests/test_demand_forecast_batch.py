@@ -0,0 +1,166 @@
+"""
+Batch demand forecasts: one history load for every dish, served from the store afterwards.
+"""
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_analytics_db
+from app.models import DemandForecast, Dish, Sale
+from app.routes import advanced_inventory, advanced_inventory_ai
+from app.services import demand_prediction
+from app.services.demand_prediction import DemandPredictionService
+from app.services.forecasting import MAX_DAYS_AHEAD, forecast_dishes
+from app.services.sales_counts import rebuild_sales_counts
+from app.utils import auth, auth_enhanced
+
+USER_EMAIL = "chef@menurithm.com"
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+    # pysqlite only emits BEGIN before DML, so the forecast store's SAVEPOINT would
+    # run outside the transaction and its RELEASE would commit; emit BEGIN instead
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
+
+@pytest.fixture
+def count_queries(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+def seed(session, dish_count):
+    rng = random.Random(3)
+    session.add_all([Dish(id=d, user_id=USER_EMAIL, name=f"dish_{d}") for d in range(1, dish_count + 1)])
+    now = datetime.now()
+    session.bulk_insert_mappings(Sale, [
+        {
+            "user_id": USER_EMAIL,
+            "dish_id": d,
+            "timestamp": now - timedelta(days=day, hours=1),
+            "quantity_sold": rng.randint(1, 6),
+            "price_per_unit": 10.0,
+        }
+        for d in range(1, dish_count + 1)
+        for day in range(0, 28, rng.choice([1, 1, 3]))
+    ])
+    session.commit()
+    rebuild_sales_counts(session, USER_EMAIL)
+
+@pytest.mark.parametrize("dish_count", [1, 10, 50])
+def test_batch_query_count_is_constant(session, count_queries, dish_count):
+    seed(session, dish_count)
+    count_queries.clear()
+
+    batch = asyncio.run(DemandPredictionService().predict_demand_batch(session, USER_EMAIL))
+
+    assert len(batch["forecasts"]) == dish_count
+    # BEGIN, stored lookup, history load, delete + insert of the new forecasts inside a savepoint
+    assert len(count_queries) == 7
+
+def test_batch_matches_single_forecasts(session):
+    seed(session, 5)
+    expected = forecast_dishes(session, USER_EMAIL, days_ahead=7)
+
+    batch = asyncio.run(DemandPredictionService().predict_demand_batch(session, USER_EMAIL, ["dish_2", "dish_4", "unknown"]))
+
+    assert batch["forecasts"] == {"dish_2": expected["dish_2"], "dish_4": expected["dish_4"]}
+    assert batch["missing"] == ["unknown"]
+    metrics = batch["metrics"]["items"]["dish_2"]
+    assert metrics["source"] == "computed"
+    assert metrics["history_days"] == 30
+    dish_sales = session.query(Sale.quantity_sold).filter(Sale.dish_id == 2).all()
+    assert metrics["sale_rows"] == len(dish_sales)
+    assert metrics["units_sold"] == sum(quantity for quantity, in dish_sales)
+    assert metrics["latency_ms"] >= 0
+
+def test_batch_served_from_store(session, count_queries):
+    seed(session, 5)
+    service = DemandPredictionService()
+    first = asyncio.run(service.predict_demand_batch(session, USER_EMAIL))
+    count_queries.clear()
+
+    second = asyncio.run(service.predict_demand_batch(session, USER_EMAIL))
+
+    assert second["forecasts"] == first["forecasts"]
+    assert second["metrics"]["items_from_store"] == 5
+    assert {m["source"] for m in second["metrics"]["items"].values()} == {"store"}
+    assert len(count_queries) == 1
+
+def test_batch_stores_in_the_callers_transaction(session):
+    seed(session, 3)
+    asyncio.run(DemandPredictionService().predict_demand_batch(session, USER_EMAIL))
+    assert session.query(DemandForecast).count() == 3
+
+    session.rollback()
+    assert session.query(DemandForecast).count() == 0
+
+@pytest.fixture
+def client(session):
+    app = FastAPI()
+    app.include_router(advanced_inventory.enhanced_router)
+    app.include_router(advanced_inventory_ai.router)
+    app.dependency_overrides[get_analytics_db] = lambda: session
+    user = SimpleNamespace(id=1, email=USER_EMAIL, firebase_uid="uid-1")
+    app.dependency_overrides[auth.get_current_user] = lambda: user
+    app.dependency_overrides[auth_enhanced.get_current_user] = lambda: user
+    return TestClient(app)
+
+SINGLE_ITEM_PATHS = ["/api/advanced-inventory/demand-forecast/dish_1", "/demand-predictions/dish_1"]
+
+@pytest.mark.parametrize("days_ahead, status", [(0, 422), (-3, 422), (MAX_DAYS_AHEAD + 1, 422), (1, 200), (MAX_DAYS_AHEAD, 200)])
+def test_days_ahead_is_bounded(session, client, days_ahead, status):
+    seed(session, 2)
+
+    response = client.post("/api/advanced-inventory/demand-forecasts", json={"days_ahead": days_ahead})
+    assert response.status_code == status, response.text
+    if status == 200:
+        assert len(response.json()["forecasts"]["dish_1"]["daily_predictions"]) == days_ahead
+
+    for path in SINGLE_ITEM_PATHS:
+        response = client.get(path, params={"days_ahead": days_ahead})
+        assert response.status_code == status, response.text
+
+@pytest.mark.parametrize("path, key", zip(SINGLE_ITEM_PATHS, ["forecast", "predictions"]))
+def test_single_item_served_from_store(session, client, monkeypatch, path, key):
+    seed(session, 2)
+    stored = client.post("/api/advanced-inventory/demand-forecasts", json={}).json()["forecasts"]["dish_1"]
+
+    async def no_recompute(*args, **kwargs):
+        raise AssertionError("forecast recomputed instead of read from the store")
+
+    monkeypatch.setattr(demand_prediction, "forecast_dishes_offloaded", no_recompute)
+    response = client.get(path)
+    assert response.status_code == 200, response.text
+    assert response.json()[key] == stored
@@ -0,0 +1,102 @@
+"""
+POST /upload-dishes: rows are resolved and written batch by batch, with dishes that
+span batches (or reappear later in the file) kept as one dish.
+"""
+
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import Dish, DishIngredient, InventoryItem
+from app.routes import dish as dish_routes
+from app.utils.auth import get_current_user
+
+USER_EMAIL = "chef@menurithm.com"
+
+CSV = (
+    "dish_name,description,ingredient_name,quantity,unit\n"
+    "Soup,hot,Flour,1,kg\n"
+    "Soup,,milk,2,l\n"
+    "Soup,,flour,3,g\n"
+    "soup,,milk,1,l\n"
+    "Bread,loaf,flour,1,kg\n"
+    "Pasta,,flour,1,kg\n"
+    "Pasta,,milk,1,l\n"
+    "Bread,,milk,1,l\n"
+)
+
+@pytest.fixture
+def session_factory(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    monkeypatch.setattr(dish_routes, "SessionLocal", factory)
+    session = factory()
+    session.add_all([
+        InventoryItem(user_id=USER_EMAIL, ingredient_name=name, quantity="5", unit=unit, category="dry",
+                      expiry_date=date(2030, 1, 1), storage_location="pantry")
+        for name, unit in [("flour", "kg"), ("milk", "l")]
+    ])
+    session.add(Dish(user_id=USER_EMAIL, name="pasta"))
+    session.commit()
+    session.close()
+    yield factory
+    engine.dispose()
+
+@pytest.fixture
+def client(session_factory):
+    app = FastAPI()
+    app.include_router(dish_routes.router)
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(email=USER_EMAIL)
+    return TestClient(app)
+
+def upload(client, csv):
+    return client.post("/upload-dishes", files={"file": ("dishes.csv", csv, "text/csv")})
+
+@pytest.mark.parametrize("batch_size", [1, 2, 1000])
+def test_dishes_span_batches(client, session_factory, monkeypatch, batch_size):
+    monkeypatch.setattr(dish_routes, "UPLOAD_BATCH_SIZE", batch_size)
+
+    response = upload(client, CSV)
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["added_dishes"] == [{"name": "Soup", "ingredients_count": 3}, {"name": "Bread", "ingredients_count": 2}]
+    assert body["skipped_dishes"] == ["Dish 'soup' already exists", "Dish 'Pasta' already exists"]
+
+    session = session_factory()
+    stored = {
+        name: (description, sorted((ingredient_id, quantity, unit) for _, ingredient_id, quantity, unit in rows))
+        for name, description, rows in (
+            (dish.name, dish.description, session.query(
+                DishIngredient.dish_id, DishIngredient.ingredient_id, DishIngredient.quantity, DishIngredient.unit
+            ).filter(DishIngredient.dish_id == dish.id).all())
+            for dish in session.query(Dish)
+        )
+    }
+    session.close()
+    assert stored == {
+        "pasta": (None, []),
+        "Soup": ("hot", [(1, 1.0, "kg"), (1, 3.0, "g"), (2, 2.0, "l")]),
+        "Bread": ("loaf", [(1, 1.0, "kg"), (2, 1.0, "l")]),
+    }
+
+@pytest.mark.parametrize("batch_size", [2, 1000])
+def test_errors_in_a_later_batch_write_nothing(client, session_factory, monkeypatch, batch_size):
+    monkeypatch.setattr(dish_routes, "UPLOAD_BATCH_SIZE", batch_size)
+
+    response = upload(client, CSV + "Bread,,saffron,1,g\n")
+
+    assert response.status_code == 400
+    assert response.json()["detail"]["errors"] == ["Ingredient 'saffron' not found in inventory for dish 'Bread'"]
+    session = session_factory()
+    assert [dish.name for dish in session.query(Dish)] == ["pasta"]
+    assert session.query(DishIngredient).count() == 0
+    session.close()
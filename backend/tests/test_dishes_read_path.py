@@ -0,0 +1,136 @@
+"""
+GET /dishes read path: one joined query regardless of dish count, plus keyset pagination.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.db.database import Base, get_async_db
+from app.models import Dish, DishIngredient, InventoryItem
+from app.routes import dish as dish_routes
+from app.utils.auth import get_current_user
+
+USER_EMAIL = "chef@menurithm.com"
+
+@pytest.fixture
+def database_path(tmp_path):
+    return tmp_path / "dishes.db"
+
+@pytest.fixture
+def engine(database_path):
+    engine = create_engine(f"sqlite:///{database_path}")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def async_engine(engine, database_path):
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{database_path}")
+    yield async_engine
+    asyncio.run(async_engine.dispose())
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+@pytest.fixture
+def client(async_engine):
+    app = FastAPI()
+    app.include_router(dish_routes.router)
+    async_session_factory = async_sessionmaker(async_engine, expire_on_commit=False)
+
+    async def override_get_async_db():
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(email=USER_EMAIL)
+    return TestClient(app)
+
+@pytest.fixture
+def count_queries(async_engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(async_engine.sync_engine, "before_cursor_execute", record)
+
+def seed(session_factory, dish_count, lines_per_dish=3, user_id=USER_EMAIL):
+    session = session_factory()
+    items = [
+        InventoryItem(user_id=user_id, ingredient_name=f"ingredient_{i}", quantity="10", unit="g")
+        for i in range(lines_per_dish)
+    ]
+    session.add_all(items)
+    session.flush()
+    for d in range(dish_count):
+        dish = Dish(user_id=user_id, name=f"dish_{d}", description=f"description {d}")
+        dish.ingredients = [
+            DishIngredient(user_id=user_id, ingredient_id=item.id, quantity=float(d + 1), unit="g")
+            for item in items
+        ]
+        session.add(dish)
+    session.commit()
+    session.close()
+
+@pytest.mark.parametrize("dish_count", [1, 20, 200])
+def test_get_dishes_is_a_single_query(client, session_factory, count_queries, dish_count):
+    seed(session_factory, dish_count)
+    count_queries.clear()
+
+    response = client.get("/dishes")
+
+    assert response.status_code == 200
+    assert len(response.json()) == dish_count
+    assert len(count_queries) == 1
+
+def test_get_dishes_payload(client, session_factory):
+    seed(session_factory, 2, lines_per_dish=2)
+    session = session_factory()
+    session.add(Dish(user_id=USER_EMAIL, name="plain", description=None))
+    session.add(Dish(user_id="someone@else.com", name="foreign", description=None))
+    session.commit()
+    session.close()
+
+    dishes = client.get("/dishes").json()
+
+    assert [dish["name"] for dish in dishes] == ["dish_0", "dish_1", "plain"]
+    assert dishes[1]["ingredients"] == [
+        {"ingredient_id": 1, "ingredient_name": "ingredient_0", "quantity": 2.0, "unit": "g"},
+        {"ingredient_id": 2, "ingredient_name": "ingredient_1", "quantity": 2.0, "unit": "g"},
+    ]
+    assert dishes[2]["ingredients"] == []
+
+def test_get_dishes_keyset_pagination(client, session_factory, count_queries):
+    seed(session_factory, 7)
+    count_queries.clear()
+
+    names = []
+    cursor = None
+    pages = 0
+    while True:
+        params = {"limit": 3}
+        if cursor is not None:
+            params["after_id"] = cursor
+        response = client.get("/dishes", params=params)
+        assert response.status_code == 200
+        names.extend(dish["name"] for dish in response.json())
+        pages += 1
+
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert names == [f"dish_{d}" for d in range(7)]
+    assert len(count_queries) == pages
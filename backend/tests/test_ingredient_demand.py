@@ -0,0 +1,136 @@
+"""
+Ingredient demand: dish figures exploded through the recipe matrix, written to enhanced inventory in bulk.
+"""
+
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import Dish, DishIngredient, InventoryItem, Sale
+from app.models.inventory_enhanced import InventoryItemEnhanced
+from app.services.forecasting import forecast_dishes
+from app.services.ingredient_demand import DEMAND_COLUMNS, ingredient_demand, refresh_inventory_forecasts, refresh_stock_alerts
+
+USER_EMAIL = "chef@menurithm.com"
+TODAY = date(2025, 6, 30)
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
+
+def seed(session):
+    session.add_all([
+        InventoryItem(id=1, user_id=USER_EMAIL, ingredient_name="Flour", quantity="5000", unit="g"),
+        InventoryItem(id=2, user_id=USER_EMAIL, ingredient_name="Tomato", quantity="40", unit="pcs"),
+        InventoryItem(id=3, user_id=USER_EMAIL, ingredient_name="Basil", quantity="10", unit="g"),
+        Dish(id=1, user_id=USER_EMAIL, name="Pizza"),
+        Dish(id=2, user_id=USER_EMAIL, name="Bread"),
+        Dish(id=3, user_id=USER_EMAIL, name="Salad"),
+    ])
+    session.flush()
+    session.add_all([
+        DishIngredient(user_id=USER_EMAIL, dish_id=1, ingredient_id=1, quantity=200, unit="g"),
+        DishIngredient(user_id=USER_EMAIL, dish_id=1, ingredient_id=2, quantity=2, unit="pcs"),
+        DishIngredient(user_id=USER_EMAIL, dish_id=2, ingredient_id=1, quantity=300, unit="g"),
+        # Salad never sells, so its ingredients get nothing from it
+        DishIngredient(user_id=USER_EMAIL, dish_id=3, ingredient_id=3, quantity=5, unit="g"),
+    ])
+    session.bulk_insert_mappings(Sale, [
+        {
+            "user_id": USER_EMAIL,
+            "dish_id": dish_id,
+            "timestamp": datetime.combine(TODAY, datetime.min.time()) - timedelta(days=day) + timedelta(hours=12),
+            "quantity_sold": quantity,
+            "price_per_unit": 10.0,
+        }
+        for day in range(30)
+        for dish_id, quantity in ((1, 3), (2, 1))
+    ])
+    session.add_all([
+        InventoryItemEnhanced(user_id=USER_EMAIL, ingredient_name="flour", quantity=5000, unit="g"),
+        InventoryItemEnhanced(user_id=USER_EMAIL, ingredient_name="Basil", quantity=10, unit="g"),
+        InventoryItemEnhanced(user_id=USER_EMAIL, ingredient_name="Salt", quantity=100, unit="g"),
+    ])
+    session.commit()
+
+def test_demand_is_recipe_times_dish_figures(session):
+    seed(session)
+    forecasts = forecast_dishes(session, USER_EMAIL, days_ahead=7, today=TODAY)
+
+    demand = ingredient_demand(session, USER_EMAIL, today=TODAY)
+
+    # 3 pizzas and 1 bread a day: 21 and 7 a week
+    assert demand.loc["flour", "average_weekly_usage"] == pytest.approx(21 * 200 + 7 * 300)
+    assert demand.loc["tomato", "average_weekly_usage"] == pytest.approx(21 * 2)
+    assert demand.loc["basil", "average_weekly_usage"] == 0
+    pizza = sum(forecasts["Pizza"]["daily_predictions"])
+    bread = sum(forecasts["Bread"]["daily_predictions"])
+    assert demand.loc["flour", "demand_forecast"] == pytest.approx(pizza * 200 + bread * 300)
+    assert demand.loc["tomato", "optimal_stock_level"] == pytest.approx(forecasts["Pizza"]["recommended_stock"] * 2)
+
+def test_refresh_updates_enhanced_inventory_in_one_statement(session, engine):
+    seed(session)
+    demand = ingredient_demand(session, USER_EMAIL, today=TODAY)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert refresh_inventory_forecasts(session, USER_EMAIL, demand) == 3
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    session.commit()
+
+    assert len([s for s in statements if s.startswith("UPDATE")]) == 1
+    items = {item.ingredient_name: item for item in session.query(InventoryItemEnhanced).all()}
+    assert items["flour"].average_weekly_usage == pytest.approx(21 * 200 + 7 * 300)
+    assert items["Basil"].average_weekly_usage == 0
+    assert items["Salt"].demand_forecast == 0
+
+def test_no_recipes(session):
+    assert ingredient_demand(session, USER_EMAIL).empty
+
+def test_demand_is_converted_to_each_items_unit(session):
+    seed(session)
+    # Flour stocked in kg, tomatoes (recipes in pcs) stocked by weight: not comparable
+    session.query(InventoryItemEnhanced).filter(InventoryItemEnhanced.ingredient_name == "flour").update(
+        {InventoryItemEnhanced.quantity: 50, InventoryItemEnhanced.unit: "kg"}
+    )
+    session.add(InventoryItemEnhanced(user_id=USER_EMAIL, ingredient_name="tomato", quantity=3, unit="kg"))
+    session.commit()
+
+    refresh_inventory_forecasts(session, USER_EMAIL, ingredient_demand(session, USER_EMAIL, today=TODAY))
+    refresh_stock_alerts(session, USER_EMAIL)
+    session.commit()
+
+    items = {item.ingredient_name: item for item in session.query(InventoryItemEnhanced).all()}
+    assert items["flour"].average_weekly_usage == pytest.approx((21 * 200 + 7 * 300) / 1000)
+    assert items["tomato"].demand_forecast is None and items["tomato"].alert_level is None
+    # 50 kg covers about 5 kg of weekly demand; compared against grams it would be critical
+    assert items["flour"].demand_forecast < 10
+    assert items["flour"].alert_level is None
+
+def test_mixed_recipe_units_have_no_figures(session):
+    seed(session)
+    session.add(DishIngredient(user_id=USER_EMAIL, dish_id=2, ingredient_id=2, quantity=50, unit="g"))
+    session.commit()
+
+    demand = ingredient_demand(session, USER_EMAIL, today=TODAY)
+    assert demand.loc["flour", "base_unit"] == "g"
+    assert demand.loc["tomato", "base_unit"] is None
+    assert demand.loc["tomato", DEMAND_COLUMNS].isna().all()
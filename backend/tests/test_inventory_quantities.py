@@ -0,0 +1,153 @@
+"""
+Numeric inventory quantities: parsed once on write, normalized to base units, and used
+by the menu engine and low-stock alerts without reparsing the text column.
+"""
+
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import Dish, DishIngredient, InventoryItem
+from app.routes import advanced_inventory_ai, inventory
+from app.services.menu_engine import generate_menu_smart, generate_menu_vectorized
+from app.services.units import parse_quantity, quantity_fields
+from app.utils import auth
+
+USER_EMAIL = "chef@menurithm.com"
+USER = SimpleNamespace(email=USER_EMAIL, firebase_uid="uid-1")
+
+@pytest.mark.parametrize("text, expected", [
+    ("5", 5.0), (" 2.5 kg", 2.5), ("1,5", 1.5), ("1,50 l", 1.5), (3, 3.0), ("-2,5", -2.5),
+    ("1,500", 1500.0), ("12,345.5 g", 12345.5), ("1,234,567", 1234567.0), ("1.500,5 kg", 1500.5),
+    ("1,5000", 1.5), ("1,500,5", None), ("2.5.1", None),
+    ("nan", None), ("inf", None), ("-Infinity kg", None), (float("nan"), None), (float("inf"), None),
+    ("plenty", None), ("", None), (None, None),
+])
+def test_parse_quantity(text, expected):
+    assert parse_quantity(text) == expected
+
+def test_quantity_fields_normalize_units():
+    assert quantity_fields("2", "KG") == {"quantity_value": 2.0, "base_quantity": 2000.0, "base_unit": "g"}
+    assert quantity_fields("1.5", "litres") == {"quantity_value": 1.5, "base_quantity": 1500.0, "base_unit": "ml"}
+    assert quantity_fields("3", "crates") == {"quantity_value": 3.0, "base_quantity": 3.0, "base_unit": "crates"}
+    assert quantity_fields("lots", "kg")["base_quantity"] is None
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+@pytest.fixture
+def session(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+def add_item(session, name, quantity, unit, user_id=USER_EMAIL):
+    item = InventoryItem(user_id=user_id, ingredient_name=name, quantity=quantity, unit=unit,
+                         category="dry", expiry_date=date(2030, 1, 1), storage_location="pantry")
+    session.add(item)
+    session.flush()
+    return item
+
+def test_orm_writes_parse_once(session):
+    item = add_item(session, "flour", "2", "kg")
+    assert (item.quantity_value, item.base_quantity, item.base_unit) == (2.0, 2000.0, "g")
+
+    item.unit = "lb"
+    item.quantity = "4"
+    session.commit()
+    session.refresh(item)
+    assert (item.quantity_value, item.base_unit) == (4.0, "g")
+    assert item.base_quantity == pytest.approx(4 * 453.59237)
+
+def test_menu_servings_across_units(session):
+    flour = add_item(session, "flour", "2", "kg")
+    milk = add_item(session, "milk", "1", "l")
+    eggs = add_item(session, "eggs", "a dozen", "each")
+    pancakes = Dish(user_id=USER_EMAIL, name="pancakes", description="stack")
+    pancakes.ingredients = [
+        DishIngredient(user_id=USER_EMAIL, ingredient_id=flour.id, quantity=250, unit="g"),
+        DishIngredient(user_id=USER_EMAIL, ingredient_id=milk.id, quantity=200, unit="ml"),
+    ]
+    bread = Dish(user_id=USER_EMAIL, name="bread", description="loaf")
+    bread.ingredients = [DishIngredient(user_id=USER_EMAIL, ingredient_id=flour.id, quantity=0.5, unit="kg")]
+    omelette = Dish(user_id=USER_EMAIL, name="omelette", description="unparseable stock")
+    omelette.ingredients = [DishIngredient(user_id=USER_EMAIL, ingredient_id=eggs.id, quantity=3, unit="each")]
+    session.add_all([pancakes, bread, omelette])
+    session.commit()
+
+    menu = generate_menu_vectorized(session, USER_EMAIL)
+    assert sorted((dish["name"], dish["servings"]) for dish in menu) == [("bread", 4), ("pancakes", 5)]
+
+def test_menu_mismatched_units_compare_raw_numbers(session):
+    # No shared base unit: same numbers as the legacy engine
+    salt = add_item(session, "salt", "10", "pinch")
+    soup = Dish(user_id=USER_EMAIL, name="soup", description="bowl")
+    soup.ingredients = [DishIngredient(user_id=USER_EMAIL, ingredient_id=salt.id, quantity=2, unit="g")]
+    session.add(soup)
+    session.commit()
+
+    assert [(dish["name"], dish["servings"]) for dish in generate_menu_vectorized(session, USER_EMAIL)] == [("soup", 5)]
+    assert [(dish["name"], dish["servings"]) for dish in generate_menu_smart(session, USER_EMAIL)] == [("soup", 5)]
+
+def test_alerts_filter_numeric_stock(session):
+    add_item(session, "flour", "2", "kg")
+    add_item(session, "milk", "7.5", "l")
+    add_item(session, "rice", "25", "kg")
+    add_item(session, "eggs", "plenty", "each")
+    add_item(session, "salt", "1", "kg", user_id="other@menurithm.com")
+    session.commit()
+
+    result = asyncio.run(advanced_inventory_ai.get_inventory_alerts(db=session, current_user=USER))
+    assert [(alert["item_name"], alert["priority"]) for alert in result["alerts"]] == [("flour", "high"), ("milk", "medium")]
+    assert result["alerts"][1]["message"] == "Low stock alert: milk has only 7.5 l remaining"
+
+    high = asyncio.run(advanced_inventory_ai.get_inventory_alerts(priority="high", db=session, current_user=USER))
+    assert [alert["item_name"] for alert in high["alerts"]] == ["flour"]
+
+def test_alerts_demo_only_without_inventory(session):
+    result = asyncio.run(advanced_inventory_ai.get_inventory_alerts(db=session, current_user=USER))
+    assert [alert["id"] for alert in result["alerts"]] == ["demo_alert_1", "demo_alert_2"]
+
+    add_item(session, "rice", "25", "kg")
+    session.commit()
+    assert asyncio.run(advanced_inventory_ai.get_inventory_alerts(db=session, current_user=USER))["alerts"] == []
+
+def test_upload_populates_numeric_columns(session_factory, session, monkeypatch):
+    add_item(session, "flour", "1", "kg")
+    session.commit()
+
+    monkeypatch.setattr(inventory, "SessionLocal", session_factory)
+    app = FastAPI()
+    app.include_router(inventory.router)
+    app.dependency_overrides[auth.get_current_user] = lambda: USER
+    csv = (
+        "ingredient_name,quantity,unit,category,expiry_date,storage_location\n"
+        "Flour,3,kg,dry,2030-01-01,pantry\n"
+        "Milk,500,ml,dairy,2030-01-01,fridge\n"
+        "Basil,a bunch,bunch,herbs,2030-01-01,fridge\n"
+    )
+    response = TestClient(app).post("/upload-inventory", files={"file": ("inventory.csv", csv, "text/csv")})
+    assert response.status_code == 200, response.text
+
+    session.expire_all()
+    rows = {
+        item.ingredient_name: (item.quantity, item.quantity_value, item.base_quantity, item.base_unit)
+        for item in session.query(InventoryItem)
+    }
+    assert rows == {
+        "flour": ("3", 3.0, 3000.0, "g"),
+        "milk": ("500", 500.0, 500.0, "ml"),
+        "basil": ("a bunch", None, None, "bunch"),
+    }
@@ -0,0 +1,255 @@
+"""
+Background job queue: deduplicated enqueue, per-tenant claims, outcomes and scheduling.
+"""
+
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base, get_db
+from app.models import Dish, OptimizationJob
+from app.models.jobs import JOB_DONE, JOB_FAILED, JOB_PENDING, JOB_RUNNING
+from app.routes import sales as sales_routes
+from app.services import job_worker
+from app.services.job_queue import (
+    claim_next_job, complete_job, enqueue_due_jobs, enqueue_job, fail_stale_jobs, get_job, job_payload, release_jobs
+)
+from app.services.sales_counts import record_sales
+from app.utils.auth import get_current_user
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+@pytest.fixture
+def transactional_session_factory(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'jobs.db'}")
+
+    # pysqlite only emits BEGIN before DML, so a SAVEPOINT would run outside the
+    # transaction and its RELEASE would commit; emit BEGIN as PostgreSQL would see it
+    @event.listens_for(engine, "connect")
+    def disable_pysqlite_begin(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+    Base.metadata.create_all(engine)
+    yield sessionmaker(bind=engine, autocommit=False, autoflush=False)
+    engine.dispose()
+
+@pytest.fixture
+def session(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+def test_enqueue_deduplicates_pending_jobs(session):
+    first, created = enqueue_job(session, "a@menurithm.com", reason="api")
+    again, created_again = enqueue_job(session, "a@menurithm.com", reason="sales_upload")
+    other, _ = enqueue_job(session, "b@menurithm.com")
+
+    assert created and not created_again
+    assert again.id == first.id
+    assert other.id != first.id
+
+    # Once claimed, the tenant can queue a follow-up run
+    claim_next_job(session, "worker-1")
+    follow_up, created = enqueue_job(session, "a@menurithm.com")
+    assert created and follow_up.id != first.id
+
+def test_enqueue_joins_the_callers_transaction(transactional_session_factory):
+    session = transactional_session_factory()
+    enqueue_job(session, "a@menurithm.com")
+    session.rollback()
+    assert session.query(OptimizationJob).count() == 0
+    session.rollback()
+
+    job, _ = enqueue_job(session, "a@menurithm.com")
+    job_id = job.id
+    session.commit()
+    session.close()
+
+    other = transactional_session_factory()
+    assert other.get(OptimizationJob, job_id).status == JOB_PENDING
+    other.close()
+
+def test_single_sale_writes_queue_a_refresh(session_factory, session):
+    session.add(Dish(id=1, user_id="a@menurithm.com", name="soup"))
+    session.commit()
+    app = FastAPI()
+    app.include_router(sales_routes.router)
+
+    def override_get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(email="a@menurithm.com")
+    client = TestClient(app)
+
+    sale = client.post("/sales", json={
+        "dish_name": "soup", "timestamp": "2025-01-01T12:00:00", "quantity_sold": 2, "price_per_unit": 4.5
+    })
+    assert sale.status_code == 201, sale.text
+    added = session.query(OptimizationJob).one()
+    assert (added.user_id, added.status, added.reason) == ("a@menurithm.com", JOB_PENDING, "sales")
+
+    claim_next_job(session, "w")
+    assert client.delete(f"/sales/{sale.json()['id']}").status_code == 204
+    session.expire_all()
+    assert [(job.status, job.reason) for job in session.query(OptimizationJob).order_by(OptimizationJob.id)] == [
+        (JOB_RUNNING, "sales"), (JOB_PENDING, "sales")
+    ]
+
+def test_claim_is_fifo_and_one_job_per_tenant(session):
+    a_optimize, _ = enqueue_job(session, "a@menurithm.com")
+    b_optimize, _ = enqueue_job(session, "b@menurithm.com")
+    a_other, _ = enqueue_job(session, "a@menurithm.com", kind="other")
+
+    assert claim_next_job(session, "w").id == a_optimize.id
+    # a's second job waits while a is running
+    assert claim_next_job(session, "w").id == b_optimize.id
+    assert claim_next_job(session, "w") is None
+
+    complete_job(session, a_optimize.id, {"ok": True})
+    claimed = claim_next_job(session, "w")
+    assert claimed.id == a_other.id
+    assert claimed.status == JOB_RUNNING and claimed.attempts == 1 and claimed.dedupe_key is None
+
+def test_status_payload(session):
+    job, _ = enqueue_job(session, "a@menurithm.com")
+    assert job_payload(get_job(session, job.id, "a@menurithm.com"))["status"] == JOB_PENDING
+    assert get_job(session, job.id, "b@menurithm.com") is None
+
+    claim_next_job(session, "w")
+    complete_job(session, job.id, {"dishes_forecast": 3})
+    session.expire_all()
+    payload = job_payload(get_job(session, job.id, "a@menurithm.com"))
+    assert payload["status"] == JOB_DONE
+    assert payload["result"] == {"dishes_forecast": 3}
+
+def make_stale(session):
+    session.query(OptimizationJob).update({OptimizationJob.started_at: datetime.utcnow() - timedelta(hours=2)})
+    session.commit()
+
+def test_stale_jobs_are_requeued_until_max_attempts(session):
+    job, _ = enqueue_job(session, "a@menurithm.com")
+    for attempt in (1, 2):
+        assert claim_next_job(session, "w").attempts == attempt
+        make_stale(session)
+        assert fail_stale_jobs(session, timedelta(minutes=30), max_attempts=2) == (["a@menurithm.com"] if attempt == 1 else [])
+
+    session.expire_all()
+    lost = session.get(OptimizationJob, job.id)
+    assert lost.status == JOB_FAILED and lost.attempts == 2 and "attempt 2 of 2" in lost.error
+    assert claim_next_job(session, "w") is None
+
+def test_release_fails_job_already_queued_again(session):
+    job, _ = enqueue_job(session, "a@menurithm.com")
+    claim_next_job(session, "w")
+    again, _ = enqueue_job(session, "a@menurithm.com", reason="sales_upload")
+
+    assert release_jobs(session, [job.id], "Worker process died") == []
+    session.expire_all()
+    assert session.get(OptimizationJob, job.id).status == JOB_FAILED
+    assert session.get(OptimizationJob, again.id).status == JOB_PENDING
+
+def test_enqueue_due_jobs_follows_data_changes(session):
+    record_sales(session, "a@menurithm.com", [1])
+    session.commit()
+    interval = timedelta(hours=6)
+
+    assert enqueue_due_jobs(session, interval) == 1
+    assert enqueue_due_jobs(session, interval) == 0  # still pending
+
+    job = claim_next_job(session, "w")
+    complete_job(session, job.id, {})
+    assert enqueue_due_jobs(session, interval) == 0  # nothing new since it started
+
+    record_sales(session, "a@menurithm.com", [1])
+    session.commit()
+    assert enqueue_due_jobs(session, interval) == 1
+
+def test_execute_job_records_outcome(session, session_factory, monkeypatch):
+    async def succeed(db, user_id):
+        return {"user": user_id}
+
+    async def explode(db, user_id):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(job_worker, "SessionLocal", session_factory)
+    monkeypatch.setitem(job_worker.JOB_HANDLERS, "succeed", succeed)
+    monkeypatch.setitem(job_worker.JOB_HANDLERS, "explode", explode)
+
+    good, _ = enqueue_job(session, "a@menurithm.com", kind="succeed")
+    bad, _ = enqueue_job(session, "b@menurithm.com", kind="explode")
+    for job in (claim_next_job(session, "w"), claim_next_job(session, "w")):
+        job_worker.execute_job(job.id, job.kind, job.user_id)
+
+    session.expire_all()
+    assert job_payload(session.get(OptimizationJob, good.id))["result"] == {"user": "a@menurithm.com"}
+    failed = session.get(OptimizationJob, bad.id)
+    assert failed.status == JOB_FAILED and "boom" in failed.error
+
+def test_llm_client_follows_the_job_loop(session, session_factory, monkeypatch):
+    # Each execute_job runs its own asyncio.run; the shared client must not outlive its loop
+    from app.services import llm_client
+
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    for name in ("_client", "_semaphore", "_loop"):
+        monkeypatch.setattr(llm_client, name, None)
+    seen = []
+
+    async def use_llm(db, user_id):
+        seen.append((llm_client.get_client(), llm_client._get_semaphore()))
+        seen.append((llm_client.get_client(), llm_client._get_semaphore()))
+        return {}
+
+    monkeypatch.setattr(job_worker, "SessionLocal", session_factory)
+    monkeypatch.setitem(job_worker.JOB_HANDLERS, "llm", use_llm)
+    for user in ("a@menurithm.com", "b@menurithm.com"):
+        enqueue_job(session, user, kind="llm")
+        job = claim_next_job(session, "w")
+        job_worker.execute_job(job.id, job.kind, job.user_id)
+
+    (client, semaphore), same_loop, (next_client, next_semaphore), _ = seen
+    assert same_loop == (client, semaphore)
+    assert next_client is not client and next_semaphore is not semaphore
+
+def test_broken_pool_releases_lost_jobs(session, session_factory, monkeypatch):
+    from concurrent.futures import Future
+    from concurrent.futures.process import BrokenProcessPool
+
+    class BrokenPool:
+        def submit(self, *args):
+            raise BrokenProcessPool("a worker process died")
+
+    monkeypatch.setattr(job_worker, "SessionLocal", session_factory)
+    running, _ = enqueue_job(session, "a@menurithm.com")
+    claim_next_job(session, "w")
+    died = Future()
+    died.set_exception(BrokenProcessPool("a worker process died"))
+    workers = job_worker.JobWorkerPool(max_workers=1)
+    workers._next_schedule = float("inf")
+    workers._in_flight = {running.id: died}
+
+    # The lost job is re-queued, claimed again, and released again when submit fails
+    with pytest.raises(BrokenProcessPool):
+        workers.tick(BrokenPool())
+    session.expire_all()
+    job = session.get(OptimizationJob, running.id)
+    assert job.status == JOB_PENDING and job.attempts == 2 and workers._in_flight == {}
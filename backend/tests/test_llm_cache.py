@@ -0,0 +1,42 @@
+"""
+LLM response cache: the SQLite tier is opened on first use, at a configurable path.
+"""
+
+import importlib
+import os
+
+from app.services import llm_cache
+from app.services.llm_cache import LLMResponseCache
+
+def test_import_opens_no_file(tmp_path, monkeypatch):
+    path = tmp_path / "cache" / "llm.sqlite3"
+    path.parent.mkdir()
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_CACHE_SQLITE_PATH", str(path))
+    # Put back the objects other modules imported once the test is done
+    for name in ("LLM_CACHE_SQLITE_PATH", "LLMResponseCache", "llm_cache"):
+        monkeypatch.setattr(llm_cache, name, getattr(llm_cache, name))
+    module = importlib.reload(llm_cache)
+
+    assert module.llm_cache.path == str(path)
+    assert os.listdir(tmp_path) == ["cache"] and not path.exists()
+    assert module.llm_cache.stats()["disk_enabled"]
+
+    module.llm_cache.set("key", "reply")
+    assert path.exists()
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "llm.sqlite3")
+    LLMResponseCache(path=path).set("key", "reply")
+
+    restarted = LLMResponseCache(path=path)
+    assert restarted.get("key") == "reply"
+    assert restarted.stats()["disk_hits"] == 1
+
+def test_memory_only_without_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    cache = LLMResponseCache(path="")
+    cache.set("key", "reply")
+    assert cache.get("key") == "reply"
+    assert not cache.stats()["disk_enabled"]
+    assert os.listdir(tmp_path) == []
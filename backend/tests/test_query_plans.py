@@ -0,0 +1,131 @@
+"""
+Query plans for the hot paths: every statement they issue must reach sales, inventory,
+dishes, dish_ingredients, stock_movements and sales_analytics through an index, never a full table scan.
+Statements are captured while running the real code, then replayed under EXPLAIN QUERY PLAN.
+"""
+
+import asyncio
+import re
+from datetime import date, datetime
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import Dish, DishIngredient, InventoryItem, InventoryItemEnhanced, Sale, StockMovement
+from app.routes.advanced_inventory import get_stock_movements
+from app.routes.inventory import delete_ingredient
+from app.services.ingredient_demand import load_recipe_lines
+from app.services.menu_engine import load_recipe_matrix, load_stock_vector
+from app.services.recipe_resolution import existing_dish_names, list_dish_payloads, resolve_ingredient_names
+from app.services.sales_aggregation import count_sales, rollup_sales
+from app.services.sales_query import fetch_sales_page, sales_query
+
+USER_EMAIL = "chef@menurithm.com"
+USER = type("User", (), {"email": USER_EMAIL, "id": 1})()
+
+HOT_TABLES = ("sales", "sales_analytics", "inventory", "dishes", "dish_ingredients", "stock_movements")
+FULL_SCAN = re.compile(rf"^SCAN ({'|'.join(HOT_TABLES)})\b")
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    flour = InventoryItem(user_id=USER_EMAIL, ingredient_name="Flour", quantity="10", unit="kg")
+    session.add(flour)
+    session.flush()
+    bread = Dish(user_id=USER_EMAIL, name="Bread")
+    bread.ingredients = [DishIngredient(user_id=USER_EMAIL, ingredient_id=flour.id, quantity=0.5, unit="kg")]
+    session.add(bread)
+    session.flush()
+    session.add(Sale(user_id=USER_EMAIL, dish_id=bread.id, timestamp=datetime(2025, 1, 1, 12), quantity_sold=2, price_per_unit=3.0))
+    item = InventoryItemEnhanced(user_id=USER_EMAIL, ingredient_name="flour", quantity=10, unit="kg")
+    session.add(item)
+    session.flush()
+    session.add(StockMovement(inventory_item_id=item.id, user_id=USER_EMAIL, movement_type="usage", quantity_change=-1,
+                              timestamp=datetime(2025, 1, 1)))
+    session.commit()
+    yield session
+    session.close()
+
+def query_plans(engine, run):
+    """Run the code, then EXPLAIN QUERY PLAN every SELECT it issued."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and not executemany:
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        run()
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert statements, "nothing was queried"
+    with engine.connect() as conn:
+        return [
+            (statement, [row[3] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)])
+            for statement, parameters in statements
+        ]
+
+def assert_indexed(engine, run):
+    for statement, plan in query_plans(engine, run):
+        scans = [detail for detail in plan if FULL_SCAN.match(detail)]
+        assert not scans, f"full scan {scans} in plan {plan} for:\n{statement}"
+
+def test_sales_listing_and_pages(engine, session):
+    def run():
+        query = sales_query(session, USER_EMAIL, start_date=date(2025, 1, 1), end_date=date(2025, 1, 31), dish_id=1)
+        fetch_sales_page(query, limit=1)
+        fetch_sales_page(sales_query(session, USER_EMAIL), limit=1, cursor="2025-01-01T12:00:00|1")
+    assert_indexed(engine, run)
+
+def test_sales_analytics(engine, session):
+    def run():
+        count_sales(session, USER_EMAIL, datetime(2024, 12, 1))
+        rollup_sales(session, USER_EMAIL, datetime(2024, 12, 1), datetime(2025, 2, 1))
+    assert_indexed(engine, run)
+
+def test_inventory_reads(engine, session):
+    def run():
+        session.execute(select(InventoryItem).where(InventoryItem.user_id == USER_EMAIL)).all()
+        resolve_ingredient_names(session, ["FLOUR", "salt"], USER_EMAIL)
+        load_stock_vector(session, USER_EMAIL)
+    assert_indexed(engine, run)
+
+def test_ingredient_delete_guard(engine, session):
+    def run():
+        with pytest.raises(HTTPException) as error:
+            delete_ingredient("flour", db=session, user=USER)
+        assert error.value.status_code == 400  # still used by Bread
+    assert_indexed(engine, run)
+
+def test_recipe_loads(engine, session):
+    def run():
+        list_dish_payloads(session, USER_EMAIL)
+        list_dish_payloads(session, USER_EMAIL, limit=10, after_id=0)
+        existing_dish_names(session, USER_EMAIL, ["bread"], case_insensitive=True)
+        load_recipe_matrix(session, USER_EMAIL)
+        load_recipe_lines(session, USER_EMAIL)
+    assert_indexed(engine, run)
+
+def test_stock_movements(engine, session):
+    def run():
+        result = asyncio.run(get_stock_movements(1, limit=50, db=session, user=USER))
+        assert len(result["movements"]) == 1
+    assert_indexed(engine, run)
+
+def test_detects_full_scans(engine, session):
+    # Unindexed filter: the guard itself must flag it
+    with pytest.raises(AssertionError, match="full scan"):
+        assert_indexed(engine, lambda: session.query(Sale).filter(Sale.quantity_sold > 1).all())
@@ -0,0 +1,90 @@
+"""
+GCRA rate limiter: burst and refill, idle eviction, shared SQLite state, middleware and auth hooks.
+"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.utils import auth_enhanced, rate_limit
+from app.utils.auth_enhanced import RateLimitError, check_rate_limit
+from app.utils.middleware import RateLimitMiddleware
+from app.utils.rate_limit import MemoryRateLimitBackend, SQLiteRateLimitBackend
+
+def test_burst_then_refill():
+    backend = MemoryRateLimitBackend()
+    results = [backend.hit("k", 3, 3, now=100.0) for _ in range(4)]
+
+    assert [r.allowed for r in results] == [True, True, True, False]
+    assert [r.remaining for r in results[:3]] == [2, 1, 0]
+    assert results[3].retry_after == pytest.approx(1.0)
+
+    # One request's worth of capacity returns per period / limit seconds
+    assert backend.hit("k", 3, 3, now=101.0).allowed
+    assert not backend.hit("k", 3, 3, now=101.0).allowed
+    assert backend.hit("k", 3, 3, now=110.0).remaining == 2
+
+def test_refused_requests_do_not_extend_the_wait():
+    backend = MemoryRateLimitBackend()
+    backend.hit("k", 1, 10, now=0.0)
+    for _ in range(100):
+        backend.hit("k", 1, 10, now=5.0)
+    assert backend.hit("k", 1, 10, now=10.0).allowed
+
+def test_idle_and_excess_keys_are_evicted():
+    backend = MemoryRateLimitBackend(max_keys=100)
+    for i in range(50):
+        backend.hit(f"scan-{i}", 10, 10, now=0.0)
+    assert len(backend) == 50
+
+    # Every scanner's state has expired by the time the next client arrives
+    backend.hit("client", 10, 10, now=5.0)
+    assert len(backend) == 1
+
+    for i in range(500):
+        backend.hit(f"burst-{i}", 10, 10, now=6.0)
+    assert len(backend) == 100
+
+def test_sqlite_backend_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "rate_limits.sqlite3")
+    worker_a, worker_b = SQLiteRateLimitBackend(path), SQLiteRateLimitBackend(path)
+
+    allowed = [backend.hit("ip:1.2.3.4", 4, 60, now=0.0).allowed for backend in (worker_a, worker_b) * 3]
+
+    assert allowed == [True, True, True, True, False, False]
+    assert len(worker_a) == 1
+
+def test_sqlite_backend_purges_expired_keys(tmp_path):
+    backend = SQLiteRateLimitBackend(str(tmp_path / "rate_limits.sqlite3"), purge_every=10)
+    for i in range(9):
+        backend.hit(f"scan-{i}", 10, 10, now=0.0)
+    backend.hit("client", 10, 10, now=5.0)
+    assert len(backend) == 1
+
+def test_middleware_returns_429_with_retry_after():
+    app = FastAPI()
+    app.add_middleware(RateLimitMiddleware, calls=2, period=60, backend=MemoryRateLimitBackend())
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    client = TestClient(app)
+    responses = [client.get("/ping") for _ in range(3)]
+
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[1].headers["X-RateLimit-Remaining"] == "0"
+    assert int(responses[2].headers["Retry-After"]) == 30
+
+def test_check_rate_limit_uses_shared_backend(monkeypatch):
+    backend = MemoryRateLimitBackend()
+    monkeypatch.setattr(auth_enhanced, "default_backend", lambda: backend)
+
+    for _ in range(3):
+        check_rate_limit("uid-1", limit=3, window_minutes=1)
+    with pytest.raises(RateLimitError):
+        check_rate_limit("uid-1", limit=3, window_minutes=1)
+    check_rate_limit("uid-2", limit=3, window_minutes=1)
+
+def test_unknown_backend_falls_back_to_memory():
+    assert isinstance(rate_limit.create_backend("redis"), MemoryRateLimitBackend)
@@ -0,0 +1,116 @@
+"""
+Read-replica routing: analytics reads hit the replica, writes stay on the primary.
+Two SQLite files stand in for the primary and its replica.
+"""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import create_engine, func
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import database
+from app.db.database import Base, RoutingSession
+from app.models import DemandForecast, Dish, Sale, SalesPattern
+from app.services.forecast_store import get_stored_forecast, store_forecasts
+from app.services.sales_aggregation import count_sales
+
+USER_EMAIL = "chef@menurithm.com"
+
+@pytest.fixture
+def paths(tmp_path):
+    return tmp_path / "primary.db", tmp_path / "replica.db"
+
+@pytest.fixture
+def engines(paths):
+    primary, replica = (create_engine(f"sqlite:///{path}") for path in paths)
+    for engine in (primary, replica):
+        Base.metadata.create_all(engine)
+    # Only the replica has sales history, so a read that reaches it is visible
+    with replica.begin() as conn:
+        conn.execute(Sale.__table__.insert(), [
+            {"user_id": USER_EMAIL, "timestamp": datetime(2025, 1, day), "dish_id": 1, "quantity_sold": 1, "price_per_unit": 2.0}
+            for day in (1, 2, 3)
+        ])
+    yield primary, replica
+    primary.dispose()
+    replica.dispose()
+
+def count_rows(engine, model):
+    with engine.connect() as conn:
+        return conn.execute(func.count().select().select_from(model.__table__)).scalar()
+
+def test_reads_go_to_replica_and_writes_to_primary(engines):
+    primary, replica = engines
+    db = RoutingSession(primary=primary, replica=replica)
+
+    assert count_sales(db, USER_EMAIL, datetime(2024, 12, 31)) == 3
+
+    db.add(Dish(user_id=USER_EMAIL, name="soup"))
+    db.query(Sale).filter(Sale.user_id == USER_EMAIL).update({Sale.quantity_sold: 5}, synchronize_session=False)
+    db.commit()
+    db.close()
+
+    assert (count_rows(primary, Dish), count_rows(replica, Dish)) == (1, 0)
+    with replica.connect() as conn:
+        assert conn.execute(func.sum(Sale.quantity_sold).select()).scalar() == 3
+
+def test_analysis_results_are_stored_on_primary(engines):
+    from app.services.demand_prediction import DemandPredictionService
+
+    primary, replica = engines
+    db = RoutingSession(primary=primary, replica=replica)
+    asyncio.run(DemandPredictionService()._store_patterns(db, USER_EMAIL, {"demo_mode": True}))
+    db.close()
+
+    assert (count_rows(primary, SalesPattern), count_rows(replica, SalesPattern)) == (1, 0)
+
+def test_forecast_store_writes_go_to_primary(engines):
+    # The DELETE is bound by its clause, the bulk INSERT's row batch by mapper only
+    primary, replica = engines
+    db = RoutingSession(primary=primary, replica=replica)
+    store_forecasts(db, USER_EMAIL, 7, {"soup": (1, {"confidence_level": 80})})
+    assert (count_rows(primary, DemandForecast), count_rows(replica, DemandForecast)) == (1, 0)
+
+    # Committed: reads are back on the replica
+    assert get_stored_forecast(db, USER_EMAIL, "soup", 7) == (None, None)
+    db.close()
+
+def test_reads_after_a_write_stay_on_primary(engines):
+    primary, replica = engines
+    db = RoutingSession(primary=primary, replica=replica)
+    db.add(Dish(user_id=USER_EMAIL, name="soup"))
+    db.flush()
+    assert db.query(Dish).count() == 1
+    db.rollback()
+    assert count_sales(db, USER_EMAIL, datetime(2024, 12, 31)) == 3
+    db.close()
+
+def test_falls_back_to_primary_without_replica():
+    if database.REPLICA_DATABASE_URL:
+        pytest.skip("REPLICA_DATABASE_URL is set")
+    assert database.replica_engine is database.engine
+    db = database.AnalyticsSessionLocal()
+    assert db.get_bind() is database.engine
+    db.close()
+
+def test_async_routing(engines, paths):
+    primary_path, replica_path = paths
+    async_primary, async_replica = (create_async_engine(f"sqlite+aiosqlite:///{path}") for path in paths)
+    factory = async_sessionmaker(
+        sync_session_class=RoutingSession, primary=async_primary.sync_engine, replica=async_replica.sync_engine
+    )
+
+    async def run():
+        async with factory() as db:
+            sales = await db.run_sync(count_sales, USER_EMAIL, datetime(2024, 12, 31))
+            db.add(Dish(user_id=USER_EMAIL, name="stew"))
+            await db.commit()
+        await async_primary.dispose()
+        await async_replica.dispose()
+        return sales
+
+    assert asyncio.run(run()) == 3
+    primary, replica = engines
+    assert (count_rows(primary, Dish), count_rows(replica, Dish)) == (1, 0)
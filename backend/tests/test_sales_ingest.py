@@ -0,0 +1,71 @@
+"""
+Bulk sales ingestion: chunked INSERT ... RETURNING, ids matched to rows by parameter order.
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db import upsert
+from app.db.database import Base
+from app.models import Dish, DishSalesCount, Sale, SalesAnalytics
+from app.services.sales_counts import record_sales
+from app.services.sales_ingest import SalesIngestor
+
+USER_EMAIL = "chef@menurithm.com"
+
+@pytest.fixture
+def session():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    session.add_all([Dish(id=1, user_id=USER_EMAIL, name="soup"), Dish(id=2, user_id=USER_EMAIL, name="bread")])
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+def row(dish, date="2025-01-01", quantity="1", price="4.5"):
+    return {"dish_name": dish, "date": date, "quantity_sold": quantity, "price_per_unit": price}
+
+def test_ids_follow_row_order_across_chunks(session):
+    # Identical rows, and chunks smaller than a batch
+    rows = [row("soup")] * 3 + [row("bread", quantity="2"), row("stew"), row("soup", date="01/02/2025")] + [row("bread")] * 3
+    ingestor = SalesIngestor(session, USER_EMAIL, chunk_size=2)
+    ingestor.add_rows(enumerate(rows, start=2))
+    ingestor.finish()
+    session.commit()
+
+    stored = {sale.id: (sale.dish_id, sale.quantity_sold) for sale in session.query(Sale)}
+    assert [added["row"] for added in ingestor.added_sales] == [2, 3, 4, 5, 8, 9, 10]
+    assert [stored[added["id"]] for added in ingestor.added_sales] == [
+        (added["dish_id"], added["quantity_sold"]) for added in ingestor.added_sales
+    ]
+    assert len({added["id"] for added in ingestor.added_sales}) == 7
+    assert ingestor.skipped_sales == ["Row 6: Dish 'stew' not found"]
+    assert ingestor.errors == ["Row 7: Invalid date format '01/02/2025'"]
+
+    features = dict(session.query(SalesAnalytics.sale_id, SalesAnalytics.dish_id))
+    assert features == {added["id"]: added["dish_id"] for added in ingestor.added_sales}
+    counts = dict(session.query(DishSalesCount.dish_id, DishSalesCount.sales_count))
+    assert counts == {1: 3, 2: 4}
+
+@pytest.mark.parametrize("on_conflict", [True, False], ids=["on_conflict", "fallback"])
+def test_record_sales_adds_to_existing_and_new_counts(session, monkeypatch, on_conflict):
+    if not on_conflict:
+        monkeypatch.setattr(upsert, "_dialect_insert", lambda dialect_name: None)
+    # Written by another upload since this one started
+    session.add(DishSalesCount(user_id=USER_EMAIL, dish_id=1, sales_count=2, version=3))
+    session.commit()
+    statements = []
+    event.listen(session.get_bind(), "before_cursor_execute", lambda *args: statements.append(args[2]))
+
+    record_sales(session, USER_EMAIL, [1, 1, 2, None])
+    session.commit()
+
+    if on_conflict:
+        # No lookup ahead of the write for a concurrent insert to slip past
+        assert len(statements) == 1
+    rows = session.query(DishSalesCount.dish_id, DishSalesCount.sales_count, DishSalesCount.version)
+    assert sorted(rows) == [(1, 4, 4), (2, 1, 1)]
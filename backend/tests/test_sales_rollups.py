@@ -0,0 +1,133 @@
+"""
+Analytics rollups: aggregated in SQL on the ingest-time SalesAnalytics features,
+or in memory from raw sale columns; both give the same summary as a plain
+pandas pass over the raw sales.
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.database import Base
+from app.models import Dish, Sale, SalesAnalytics
+from app.services.sales_aggregation import (
+    DAY_NAMES, count_sales, load_dish_names, load_sales_frame, rollup_sales, summarize_sales
+)
+from app.services.sales_features import backfill_sale_features
+
+USER_EMAIL = "chef@menurithm.com"
+START = datetime(2025, 3, 1)
+END = datetime(2025, 4, 30, 23, 59, 59)
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session(engine):
+    session = sessionmaker(bind=engine, autocommit=False, autoflush=False)()
+    yield session
+    session.close()
+
+def seed(session, sales=2000):
+    rng = random.Random(7)
+    session.add_all([Dish(id=d, user_id=USER_EMAIL, name=f"dish_{d}") for d in range(1, 16)])
+    rows = [
+        {
+            "user_id": USER_EMAIL,
+            # Dish 99 has been deleted since; it is reported as Dish_99
+            "dish_id": rng.choice(list(range(1, 16)) + [99]),
+            "timestamp": START + timedelta(seconds=rng.randrange(61 * 86400)),
+            "quantity_sold": rng.randint(1, 5),
+            "price_per_unit": round(rng.uniform(5, 30), 2),
+        }
+        for _ in range(sales)
+    ]
+    # Another tenant's sales must not leak in
+    rows.append({**rows[0], "user_id": "other@menurithm.com", "quantity_sold": 1000})
+    session.bulk_insert_mappings(Sale, rows)
+    session.commit()
+    return rows[:-1]
+
+def expected_summary(rows):
+    frame = pd.DataFrame(rows)
+    days = frame["timestamp"].dt.normalize()
+    daily = frame["quantity_sold"].groupby(days).sum()
+    names = {d: f"dish_{d}" for d in range(1, 16)}
+    top = frame.groupby("dish_id")["quantity_sold"].sum().nlargest(10)
+    return {
+        "total_sales": len(frame),
+        "total_revenue": float((frame["quantity_sold"] * frame["price_per_unit"]).sum()),
+        "avg_daily_sales": float(daily.mean()),
+        "top_dishes": {names.get(d, f"Dish_{d}"): int(q) for d, q in top.items()},
+        "daily_patterns": {DAY_NAMES[d]: int(q) for d, q in frame["quantity_sold"].groupby(frame["timestamp"].dt.dayofweek).sum().items()},
+        "hourly_patterns": {int(h): int(q) for h, q in frame["quantity_sold"].groupby(frame["timestamp"].dt.hour).sum().items()},
+        "weekly_trends": {int(w): int(q) for w, q in daily.groupby(daily.index.isocalendar().week.to_numpy()).sum().items()},
+    }
+
+def sql_rollup(session):
+    return rollup_sales(session, USER_EMAIL, START, END)
+
+def in_memory_summary(session):
+    return summarize_sales(load_sales_frame(session, USER_EMAIL, START, END), load_dish_names(session, USER_EMAIL))
+
+@pytest.mark.parametrize("summarize", [sql_rollup, in_memory_summary])
+@pytest.mark.parametrize("with_features", [False, True])
+def test_summary_matches_pandas(session, with_features, summarize):
+    rows = seed(session)
+    if with_features:
+        backfill_sale_features(session, USER_EMAIL)
+
+    expected = expected_summary(rows)
+    summary = summarize(session)
+
+    assert summary["total_sales"] == expected["total_sales"] == 2000
+    assert summary["total_revenue"] == pytest.approx(expected["total_revenue"])
+    assert summary["avg_daily_sales"] == pytest.approx(expected["avg_daily_sales"])
+    for key in ("daily_patterns", "hourly_patterns", "weekly_trends"):
+        assert summary[key] == expected[key]
+    assert list(summary["top_dishes"].values()) == list(expected["top_dishes"].values())
+
+@pytest.mark.parametrize("summarize", [sql_rollup, in_memory_summary])
+def test_summary_reads_features(session, summarize):
+    seed(session, sales=50)
+    backfill_sale_features(session, USER_EMAIL)
+    # Features win over the timestamp: every sale recorded as a Sunday lunch
+    session.query(SalesAnalytics).update({SalesAnalytics.hour_of_day: 12, SalesAnalytics.day_of_week: 7})
+    session.commit()
+
+    summary = summarize(session)
+    assert list(summary["hourly_patterns"]) == [12]
+    assert list(summary["daily_patterns"]) == ["Sunday"]
+
+def test_rollup_returns_grouped_rows_only(session, engine):
+    seed(session)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        rollup_sales(session, USER_EMAIL, START, END)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 2
+    assert all("GROUP BY" in statement for statement in statements)
+
+def test_rollup_without_sales(session):
+    assert rollup_sales(session, USER_EMAIL, START, END) == {}
+
+def test_count_sales(session):
+    rows = seed(session, sales=300)
+    since = START + timedelta(days=30)
+    assert count_sales(session, USER_EMAIL, since) == sum(row["timestamp"] >= since for row in rows)